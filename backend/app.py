@@ -1,11 +1,26 @@
+import click
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 import os
-from database import db
+from database import db, init_engine
+import events
+import instrumentation
+import metrics
+import serialization
+import writer
 
 # Import models to ensure they're registered with SQLAlchemy
 import models
 
+# Registers the full-text index DDL on db.metadata
+import search  # noqa: F401
+
+# Registers the change tracking tables and triggers on db.metadata
+import sync
+
+# Registers the duplicate pair table on db.metadata
+import dedupe
+
 
 def create_app(test_config=None):
     app = Flask(__name__)
@@ -14,22 +29,44 @@ def create_app(test_config=None):
     # Configuration
     if test_config is None:
         app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key")
-        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///phonebook.db"
+        app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+            "DATABASE_URL", "sqlite:///phonebook.db"
+        )
     else:
         app.config.update(test_config)
 
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
     db.init_app(app)
+    init_engine(app)
+    serialization.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    writer.init_app(app)
+    events.init_app(app)
 
     # Import and register blueprints
     try:
-        from routes import auth, contacts, companies, notices, users
+        from routes import (
+            auth,
+            contacts,
+            companies,
+            events as events_routes,
+            lookup,
+            notices,
+            stats,
+            sync as sync_routes,
+            users,
+        )
 
         app.register_blueprint(auth.bp)
         app.register_blueprint(contacts.bp)
         app.register_blueprint(companies.bp)
+        app.register_blueprint(events_routes.bp)
+        app.register_blueprint(lookup.bp)
         app.register_blueprint(notices.bp)
+        app.register_blueprint(stats.bp)
+        app.register_blueprint(sync_routes.bp)
         app.register_blueprint(users.bp)
     except ImportError:
         # Routes not implemented yet
@@ -52,34 +89,128 @@ def create_app(test_config=None):
         # If file doesn't exist, serve the React app (for client-side routing)
         return send_from_directory(static_dir, "index.html")
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-
-        # Create default admin user if none exists
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create or upgrade the database schema."""
+        applied = init_db(app)
+        click.echo(f"Applied migrations: {applied or 'none'}")
+
+    @app.cli.command("ensure-admin")
+    def ensure_admin_command():
+        """Create the default admin user if no admin exists."""
+        if ensure_admin(app):
+            click.echo("Created default admin user: admin / admin123")
+        else:
+            click.echo("An admin user already exists")
+
+    @app.cli.command("import-contacts")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--user", "username", default="admin", help="Owner of the rows.")
+    @click.option("--format", "fmt", help="csv, vcf or xlsx (default: by suffix).")
+    @click.option("--encoding", default="utf-8-sig", help="Text file encoding.")
+    @click.option("--batch-size", default=500, help="Rows per transaction.")
+    def import_contacts_command(path, username, fmt, encoding, batch_size):
+        """Import contacts from a CSV, vCard or Excel file."""
+        import json
+
+        import importer
         from models import User
 
-        if not User.query.filter_by(role="admin").first():
-            admin_user = User(
-                username="admin",
-                email="admin@phonebook.local",
-                first_name="Administrator",
-                last_name="User",
-                role="admin",
-                is_active=True,
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username}")
+
+        def progress(result):
+            click.echo(
+                f"{result.rows} rows read, {result.imported} imported, "
+                f"{result.failed} failed",
+                err=True,
             )
-            admin_user.set_password("admin123")
-            db.session.add(admin_user)
-            db.session.commit()
-            print("Created default admin user: admin / admin123")
 
+        try:
+            fmt = importer.detect_format(path, fmt)
+            with open(path, "rb") as stream:
+                rows = importer.open_rows(stream, fmt, encoding)
+                result = importer.import_contacts(rows, user.id, batch_size, progress)
+        except importer.ImportFormatError as exc:
+            raise click.ClickException(str(exc))
+        click.echo(json.dumps(result.to_dict(), indent=2))
+
+    @app.cli.command("prune-tombstones")
+    @click.option("--days", default=90, help="Keep deletions this many days.")
+    def prune_tombstones_command(days):
+        """Forget deletions older than --days; older sync tokens expire."""
+        with db.engine.begin() as connection:
+            removed = sync.prune_tombstones(connection, days)
+        click.echo(f"Removed {removed} tombstones")
+
+    @app.cli.command("find-duplicates")
+    @click.option("--min-score", default=dedupe.MIN_SCORE, help="Lowest pair score.")
+    def find_duplicates_command(min_score):
+        """Scan all contacts for duplicates and store the pairs found."""
+        import json
+
+        stats = dedupe.find_duplicates(min_score=min_score)
+        click.echo(json.dumps(stats, indent=2))
+
+    return app
+
+
+def init_db(app):
+    """Create or upgrade the database schema; return the applied versions"""
+    import migrations
+
+    with app.app_context():
+        return migrations.upgrade(db.engine)
+
+
+def ensure_admin(app):
+    """Create the default admin user if none exists; return True if created"""
+    from models import User
+
+    with app.app_context():
+        if User.query.filter_by(role="admin").first():
+            return False
+
+        admin_user = User(
+            username="admin",
+            email="admin@phonebook.local",
+            first_name="Administrator",
+            last_name="User",
+            role="admin",
+            is_active=True,
+        )
+        admin_user.set_password("admin123")
+        db.session.add(admin_user)
+        db.session.commit()
+        return True
+
+
+def create_dev_app():
+    """Build the app and prepare its database, as ``python app.py`` does"""
+    app = create_app()
+    init_db(app)
+    if ensure_admin(app):
+        print("Created default admin user: admin / admin123")
     return app
 
 
-# Create app instance for development
-app_instance = create_app()
+_app_instance = None
+
+
+def __getattr__(name):
+    # ``app_instance`` is built on first access, so importing this module
+    # creates no app and touches no database
+    global _app_instance
+    if name == "app_instance":
+        if _app_instance is None:
+            _app_instance = create_dev_app()
+        return _app_instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
+    app_instance = create_dev_app()
     print("Starting Phonebook application...")
     print("Server will be available at: http://127.0.0.1:5000")
     try:
@@ -0,0 +1,79 @@
+"""
+Cold-start import time budget.
+
+Imports a module in fresh interpreters with ``-X importtime``, keeps the
+fastest of several runs, prints the total and the slowest imports as JSON,
+and exits with status 1 when the total is over budget.
+
+Usage (from backend/):
+    python benchmarks/import_time.py --module app --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = float(os.environ.get("PHONEBOOK_IMPORT_BUDGET_MS", 1000))
+
+
+def measure(module):
+    """Return ``{name: (self_us, cumulative_us)}`` for one cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = min(
+        (measure(args.module) for _ in range(args.runs)),
+        key=lambda run: run[args.module][1],
+    )
+    total_ms = timings[args.module][1] / 1000
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+
+    print(
+        json.dumps(
+            {
+                "benchmark": "import_time",
+                "module": args.module,
+                "total_ms": round(total_ms, 1),
+                "budget_ms": args.budget_ms,
+                "slowest_self": [
+                    {
+                        "module": name,
+                        "self_ms": round(self_us / 1000, 1),
+                        "cumulative_ms": round(cumulative_us / 1000, 1),
+                    }
+                    for name, (self_us, cumulative_us) in slowest[: args.top]
+                ],
+            },
+            indent=2,
+        )
+    )
+    sys.exit(0 if total_ms <= args.budget_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
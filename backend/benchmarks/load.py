@@ -0,0 +1,467 @@
+"""
+Endpoint throughput and latency against a seeded synthetic dataset.
+
+Seeds a temporary database with ``benchmarks/seed.py`` and drives every
+route in routes/ (login, search, deep pagination, create, update, delete,
+notices, lookup, stats, users) through the Flask test client and over real
+HTTP with concurrent clients. Prints throughput and p50/p95/p99 latency per
+endpoint as JSON, tagged with the git commit so runs can be compared.
+
+Usage (from backend/):
+    python benchmarks/load.py --contacts 1000000 --requests 500 --concurrency 16
+    python benchmarks/load.py --transport http --url http://127.0.0.1:5000
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app import create_app, db, init_db
+from pagination import encode_cursor
+from seed import ADMIN_USERNAME, CITIES, LAST_NAMES, PASSWORD, seed
+
+LOGIN = {"username": ADMIN_USERNAME, "password": PASSWORD}
+
+
+class State:
+    """Ids and sample values shared by the scenarios of one run"""
+
+    def __init__(self, connection, contacts, per_page=20):
+        tables = db.metadata.tables
+        contact, company, notice = (
+            tables["contact"],
+            tables["company"],
+            tables["notice"],
+        )
+
+        self.contact_ids = connection.scalars(select(contact.c.id)).all()
+        self.company_ids = connection.scalars(select(company.c.id)).all()
+        self.notice_ids = connection.scalars(select(notice.c.id)).all()
+        self.phones = connection.scalars(
+            select(contact.c.mobile).where(contact.c.mobile.is_not(None)).limit(1000)
+        ).all()
+
+        # Both deep pages point 90% of the way into the name ordering
+        deep = int(contacts * 0.9)
+        self.deep_page = max(deep // per_page, 1)
+        row = connection.execute(
+            select(contact.c.last_name, contact.c.first_name, contact.c.id)
+            .order_by(contact.c.last_name, contact.c.first_name, contact.c.id)
+            .offset(deep)
+            .limit(1)
+        ).first()
+        self.deep_cursor = encode_cursor(list(row)) if row else ""
+
+        # Created by the create scenarios, consumed by the delete scenarios
+        self.created = {"contacts": deque(), "notices": deque()}
+        self.serial = 0
+        self.lock = threading.Lock()
+
+    def next_serial(self):
+        with self.lock:
+            self.serial += 1
+            return self.serial
+
+
+def _created_id(key, kind):
+    def record(state, body):
+        state.created[kind].append(json.loads(body)[key]["id"])
+
+    return record
+
+
+def _pop_created(kind):
+    def pop(state):
+        try:
+            return state.created[kind].popleft()
+        except IndexError:
+            return 0
+
+    return pop
+
+
+def _contact_body(state, rng):
+    n = state.next_serial()
+    return {
+        "first_name": f"Load{n}",
+        "last_name": rng.choice(LAST_NAMES),
+        "phone": f"021-555-{n % 10000:04d}",
+        "city": rng.choice(CITIES),
+        "company_id": rng.choice(state.company_ids) if state.company_ids else None,
+    }
+
+
+# (name, build(state, rng) -> (method, path, body), expected status, record)
+SCENARIOS = [
+    ("auth.login", lambda s, r: ("POST", "/api/auth/login", LOGIN), 200, None),
+    ("auth.status", lambda s, r: ("GET", "/api/auth/status", None), 200, None),
+    ("contacts.list", lambda s, r: ("GET", "/api/contacts", None), 200, None),
+    (
+        "contacts.page_deep",
+        lambda s, r: ("GET", f"/api/contacts?page={s.deep_page}", None),
+        200,
+        None,
+    ),
+    (
+        "contacts.cursor_deep",
+        lambda s, r: ("GET", f"/api/contacts?cursor={s.deep_cursor}", None),
+        200,
+        None,
+    ),
+    (
+        "contacts.search",
+        lambda s, r: ("GET", f"/api/contacts?search={r.choice(LAST_NAMES)}", None),
+        200,
+        None,
+    ),
+    (
+        "contacts.search_fuzzy",
+        lambda s, r: (
+            "GET",
+            f"/api/contacts?search={r.choice(LAST_NAMES)[:-1]}x&fuzzy=1",
+            None,
+        ),
+        200,
+        None,
+    ),
+    (
+        "contacts.suggest",
+        lambda s, r: (
+            "GET",
+            f"/api/contacts/suggest?q={r.choice(LAST_NAMES)[:3]}",
+            None,
+        ),
+        200,
+        None,
+    ),
+    (
+        "contacts.create",
+        lambda s, r: ("POST", "/api/contacts", _contact_body(s, r)),
+        201,
+        _created_id("contact", "contacts"),
+    ),
+    (
+        "contacts.update",
+        lambda s, r: (
+            "PUT",
+            f"/api/contacts/{r.choice(s.contact_ids)}",
+            {"notes": f"updated {s.next_serial()}"},
+        ),
+        200,
+        None,
+    ),
+    (
+        "contacts.delete",
+        lambda s, r: ("DELETE", f"/api/contacts/{_pop_created('contacts')(s)}", None),
+        200,
+        None,
+    ),
+    ("companies.list", lambda s, r: ("GET", "/api/companies", None), 200, None),
+    (
+        "companies.search",
+        lambda s, r: ("GET", f"/api/companies?search={r.choice(CITIES)}", None),
+        200,
+        None,
+    ),
+    (
+        "companies.summary",
+        lambda s, r: ("GET", "/api/companies?view=summary&per_page=1000", None),
+        200,
+        None,
+    ),
+    (
+        "companies.suggest",
+        lambda s, r: ("GET", "/api/companies/suggest?q=pa", None),
+        200,
+        None,
+    ),
+    (
+        "companies.create",
+        lambda s, r: (
+            "POST",
+            "/api/companies",
+            {"name": f"Load Company {s.next_serial()}", "city": r.choice(CITIES)},
+        ),
+        201,
+        None,
+    ),
+    (
+        "lookup.phone",
+        lambda s, r: ("GET", f"/api/lookup/phone/{quote(r.choice(s.phones))}", None),
+        200,
+        None,
+    ),
+    ("notices.list", lambda s, r: ("GET", "/api/notices", None), 200, None),
+    (
+        "notices.create",
+        lambda s, r: (
+            "POST",
+            "/api/notices",
+            {"title": f"Load notice {s.next_serial()}", "content": "Benchmark"},
+        ),
+        201,
+        _created_id("notice", "notices"),
+    ),
+    (
+        "notices.update",
+        lambda s, r: (
+            "PUT",
+            f"/api/notices/{r.choice(s.notice_ids)}",
+            {"content": f"updated {s.next_serial()}"},
+        ),
+        200,
+        None,
+    ),
+    (
+        "notices.delete",
+        lambda s, r: ("DELETE", f"/api/notices/{_pop_created('notices')(s)}", None),
+        200,
+        None,
+    ),
+    ("stats", lambda s, r: ("GET", "/api/stats", None), 200, None),
+    ("users.list", lambda s, r: ("GET", "/api/users", None), 200, None),
+]
+
+
+class TestClientSession:
+    """Logged-in Flask test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.request("POST", "/api/auth/login", LOGIN)
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+
+class HTTPSession:
+    """Logged-in keep-alive HTTP connection carrying the session cookie"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port)
+        self.cookie = None
+        self.request("POST", "/api/auth/login", LOGIN)
+
+    def request(self, method, path, body):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return response.status, data
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted ``samples``"""
+    if not samples:
+        return None
+    rank = max(math.ceil(fraction * len(samples)) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def run_scenario(scenario, sessions, state, requests, seed=0):
+    """Send ``requests`` requests split across ``sessions``; return stats"""
+    name, build, expected, record = scenario
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counts = [requests // len(sessions)] * len(sessions)
+    for i in range(requests % len(sessions)):
+        counts[i] += 1
+
+    def worker(n, session, count):
+        rng = random.Random(f"{seed}-{name}-{n}")
+        local = []
+        for _ in range(count):
+            method, path, body = build(state, rng)
+            start = time.perf_counter()
+            try:
+                status, data = session.request(method, path, body)
+            except Exception as exc:
+                status, data = type(exc).__name__, b""
+            local.append(time.perf_counter() - start)
+            if status != expected:
+                with lock:
+                    errors.append(status)
+            elif record is not None:
+                record(state, data)
+        with lock:
+            latencies.extend(local)
+
+    threads = [
+        threading.Thread(target=worker, args=(n, session, count))
+        for n, (session, count) in enumerate(zip(sessions, counts))
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": len(errors),
+        "error_statuses": sorted({str(status) for status in errors}),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+@contextlib.contextmanager
+def serve(app):
+    """Serve ``app`` on a free local port in a background thread"""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--notices", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument(
+        "--login-requests",
+        type=int,
+        default=20,
+        help="requests for auth.login, which is bound by bcrypt",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="HTTP clients")
+    parser.add_argument(
+        "--transport", choices=("client", "http", "both"), default="both"
+    )
+    parser.add_argument(
+        "--url", help="benchmark a running server seeded with benchmarks/seed.py"
+    )
+    parser.add_argument("--scenario", action="append", help="only these scenarios")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "SECRET_KEY": "benchmark",
+        }
+    )
+    report = {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "dataset": None,
+        "results": [],
+    }
+    try:
+        # The login route prints debug output; keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            with app.app_context():
+                init_db(app)
+                report["dataset"] = seed(
+                    db.engine,
+                    users=args.users,
+                    companies=args.companies,
+                    contacts=args.contacts,
+                    notices=args.notices,
+                )
+                with db.engine.connect() as connection:
+                    state = State(connection, args.contacts)
+
+            if args.url:
+                report["dataset"]["url"] = args.url
+
+            runs = []
+            if args.transport in ("client", "both") and not args.url:
+                runs.append(("client", 1, None))
+            if args.transport in ("http", "both") or args.url:
+                runs.append(("http", args.concurrency, args.url))
+
+            for transport, concurrency, url in runs:
+                with contextlib.ExitStack() as stack:
+                    if transport == "client":
+                        sessions = [TestClientSession(app)]
+                    else:
+                        base_url = url or stack.enter_context(serve(app))
+                        sessions = [HTTPSession(base_url) for _ in range(concurrency)]
+                    for scenario in scenarios:
+                        requests = args.requests
+                        if scenario[0] == "auth.login":
+                            requests = min(requests, args.login_requests)
+                        result = run_scenario(scenario, sessions, state, requests)
+                        result.update(transport=transport, concurrency=concurrency)
+                        report["results"].append(result)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Synthetic phonebook dataset for benchmarks.
+
+Bulk-inserts users, companies, contacts and notices with batched Core
+``executemany`` statements, filling in the derived columns (search keys,
+reversed phone digits) that the ORM events would otherwise set. The
+full-text index is kept up to date by its triggers. Data is generated from
+a seeded RNG, so the same arguments always produce the same database.
+
+Usage (from backend/):
+    python benchmarks/seed.py bench.db --contacts 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from sqlalchemy import insert
+
+from database import db
+from normalization import company_search_key, contact_search_key
+from phones import reversed_digits
+
+BATCH_SIZE = 10000
+
+# Every seeded user has this password
+PASSWORD = "bench-password"
+ADMIN_USERNAME = "bench-admin"
+EDITOR_USERNAME = "bench-editor"
+
+FIRST_NAMES = (
+    "Ali Reza Sara Maryam Mohammad Zahra Hossein Fatemeh Mehdi Narges Amir "
+    "Leila Hamid Nasrin Saeed Parisa John Jane Peter Anna David Laura Omid Shirin"
+).split()
+LAST_NAMES = (
+    "Ahmadi Mohammadi Hosseini Rezaei Moradi Karimi Jafari Rahimi Hashemi "
+    "Mousavi Sadeghi Ghasemi Smith Johnson Brown Miller Davis Garcia Tehrani "
+    "Shirazi Esfahani Tabrizi Kermani Rostami"
+).split()
+CITIES = "Tehran Shiraz Isfahan Tabriz Mashhad Karaj Qom Ahvaz Rasht Kerman".split()
+INDUSTRIES = (
+    "Software Energy Pharma Banking Retail Logistics Construction Media "
+    "Education Manufacturing"
+).split()
+COMPANY_WORDS = "Pars Arya Nova Sepehr Atlas Kavir Alborz Delta Omega Zagros".split()
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(engine, table, rows):
+    for batch in _batches(rows):
+        with engine.begin() as connection:
+            connection.execute(insert(table), batch)
+
+
+def _phone(rng, prefix):
+    return f"{prefix}-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+
+def seed(engine, users=50, companies=1000, contacts=100000, notices=200, seed=0):
+    """Fill an empty database created with the app schema; return a summary"""
+    rng = random.Random(seed)
+    tables = db.metadata.tables
+    now = datetime.utcnow()
+    start = time.perf_counter()
+
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt())
+    password_hash = password_hash.decode("utf-8")
+    usernames = [ADMIN_USERNAME, EDITOR_USERNAME] + [
+        f"bench-user{i}" for i in range(max(users - 2, 0))
+    ]
+    roles = ["admin", "editor"] + ["user"] * (len(usernames) - 2)
+    _insert(
+        engine,
+        tables["user"],
+        (
+            {
+                "id": i + 1,
+                "username": username,
+                "email": f"{username}@example.com",
+                "password_hash": password_hash,
+                "role": role,
+                "is_active": True,
+            }
+            for i, (username, role) in enumerate(zip(usernames, roles))
+        ),
+    )
+    user_ids = range(1, len(usernames) + 1)
+
+    def company_rows():
+        for i in range(companies):
+            name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(INDUSTRIES)} {i}"
+            phone = _phone(rng, "021")
+            created_at = now - timedelta(minutes=rng.randint(0, 525600))
+            yield {
+                "id": i + 1,
+                "name": name,
+                "search_key": company_search_key(name),
+                "industry": rng.choice(INDUSTRIES),
+                "city": rng.choice(CITIES),
+                "phone": phone,
+                "phone_rev": reversed_digits(phone),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "created_by": rng.choice(user_ids),
+            }
+
+    _insert(engine, tables["company"], company_rows())
+
+    def contact_rows():
+        for i in range(contacts):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            email = f"{first_name}.{last_name}{i}@example.com".lower()
+            phone = _phone(rng, "021")
+            mobile = _phone(rng, "0912")
+            city = rng.choice(CITIES)
+            created_at = now - timedelta(minutes=rng.randint(0, 525600))
+            yield {
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": email,
+                "phone": phone,
+                "mobile": mobile,
+                "phone_rev": reversed_digits(phone),
+                "mobile_rev": reversed_digits(mobile),
+                "search_key": contact_search_key(
+                    first_name, last_name, email, phone, mobile, city
+                ),
+                "city": city,
+                "country": "Iran",
+                "company_id": (
+                    rng.randint(1, companies)
+                    if companies and rng.random() < 0.9
+                    else None
+                ),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "created_by": rng.choice(user_ids),
+            }
+
+    _insert(engine, tables["contact"], contact_rows())
+
+    def notice_rows():
+        for i in range(notices):
+            created_at = now - timedelta(minutes=rng.randint(0, 43200))
+            expires_at = None
+            if rng.random() < 0.5:
+                expires_at = now + timedelta(days=rng.randint(-30, 30))
+            yield {
+                "title": f"Notice {i}",
+                "content": "Benchmark notice " * rng.randint(1, 20),
+                "priority": rng.choice(("low", "medium", "high")),
+                "is_active": True,
+                "created_at": created_at,
+                "updated_at": created_at,
+                "expires_at": expires_at,
+                "created_by": 1,
+            }
+
+    _insert(engine, tables["notice"], notice_rows())
+
+    return {
+        "users": len(usernames),
+        "companies": companies,
+        "contacts": contacts,
+        "notices": notices,
+        "seed_seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main():
+    from sqlalchemy import create_engine
+
+    import migrations
+    import models  # noqa: F401  (registers the tables)
+    import search  # noqa: F401  (registers the FTS table and triggers)
+    from database import install_sqlite_pragmas, sqlite_pragmas
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("database", help="SQLite file to create")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--notices", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        sys.exit(f"{args.database} already exists")
+
+    engine = create_engine(f"sqlite:///{os.path.abspath(args.database)}")
+    # A throwaway benchmark database does not need durable commits
+    install_sqlite_pragmas(
+        engine, sqlite_pragmas({"SQLITE_PRAGMAS": {"synchronous": "OFF"}})
+    )
+    migrations.upgrade(engine)
+    summary = seed(
+        engine,
+        users=args.users,
+        companies=args.companies,
+        contacts=args.contacts,
+        notices=args.notices,
+        seed=args.seed,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
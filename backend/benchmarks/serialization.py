@@ -0,0 +1,167 @@
+"""
+Contact and company list rendering: ORM instances vs column tuples, stdlib
+json vs orjson.
+
+Seeds a temporary database with ``benchmarks/seed.py``, then renders the same
+pages of 100 rows to a JSON body four ways: the previous path (ORM instances,
+``to_dict()``, Flask's stdlib provider), each half of the change on its own,
+and the current path (Core column tuples through ``serialization.row_dicts``,
+``serialization.JSONProvider``). Also times GET /api/contacts and
+/api/companies end to end with ``JSON_SERIALIZER`` set to ``json`` and
+``auto``. Prints milliseconds per page as JSON.
+
+Usage (from backend/):
+    python benchmarks/serialization.py --contacts 100000 --pages 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import joinedload
+
+from app import create_app, db
+from models import COMPANY_DICT_FIELDS, Company, Contact
+from routes.contacts import CONTACT_ROW_COLUMNS, contact_payload, contact_rows_payload
+import serialization
+from seed import ADMIN_USERNAME, PASSWORD, seed
+
+PER_PAGE = 100
+
+
+# Pages are primary key ranges, so the database work is a cheap seek and
+# the timings are mostly loading and encoding
+
+
+def orm_contacts(start):
+    query = Contact.query.options(joinedload(Contact.company))
+    items = query.filter(Contact.id > start).order_by(Contact.id).limit(PER_PAGE)
+    return [contact_payload(contact) for contact in items]
+
+
+def row_contacts(start):
+    query = db.session.query(*CONTACT_ROW_COLUMNS).outerjoin(Contact.company)
+    items = query.filter(Contact.id > start).order_by(Contact.id).limit(PER_PAGE)
+    return contact_rows_payload(items.all())
+
+
+def orm_companies(start):
+    query = Company.query.filter(Company.id > start).order_by(Company.id)
+    return [company.to_dict() for company in query.limit(PER_PAGE)]
+
+
+def row_companies(start):
+    columns = (getattr(Company, field) for field in COMPANY_DICT_FIELDS)
+    query = db.session.query(*columns).filter(Company.id > start)
+    return serialization.row_dicts(
+        query.order_by(Company.id).limit(PER_PAGE), COMPANY_DICT_FIELDS
+    )
+
+
+def time_pages(app, render, provider, starts):
+    """Return ms per page for rendering and encoding each page"""
+    timings = []
+    for page_start in starts:
+        with app.app_context():
+            start = time.perf_counter()
+            body = provider.dumps({"items": render(page_start)}, separators=(",", ":"))
+            body.encode("utf-8")
+            timings.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)], 3),
+    }
+
+
+def time_endpoint(path, serializer, url, pages):
+    """Return ms per page for walking ``url`` with keyset cursors"""
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "SECRET_KEY": "benchmark",
+            "JSON_SERIALIZER": serializer,
+        }
+    )
+    client = app.test_client()
+    client.post(
+        "/api/auth/login",
+        data=json.dumps({"username": ADMIN_USERNAME, "password": PASSWORD}),
+        content_type="application/json",
+    )
+    timings, cursor = [], ""
+    for _ in range(pages):
+        start = time.perf_counter()
+        response = client.get(f"{url}?per_page={PER_PAGE}&cursor={cursor}")
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.data
+        cursor = json.loads(response.data)["pagination"]["next_cursor"] or ""
+    with app.app_context():
+        db.engine.dispose()
+    return summarize(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=200, help="per variant")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = create_app(
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "SECRET_KEY": "x"}
+    )
+    with app.app_context():
+        db.create_all()
+        seed(db.engine, contacts=args.contacts, companies=args.companies)
+        db.engine.dispose()
+
+    stdlib = DefaultJSONProvider(app)
+    fast = serialization.JSONProvider(app)
+    results = {"encoder": "orjson" if fast.orjson else "json", "render": {}}
+    for entity, total, orm, rows in (
+        ("contacts", args.contacts, orm_contacts, row_contacts),
+        ("companies", args.companies, orm_companies, row_companies),
+    ):
+        last_page = max(total // PER_PAGE - 1, 0)
+        starts = [(i * 7919 % (last_page + 1)) * PER_PAGE for i in range(args.pages)]
+        # Warm the page cache and the statement caches
+        time_pages(app, orm, stdlib, starts[:10])
+        time_pages(app, rows, fast, starts[:10])
+        results["render"][entity] = {
+            label: summarize(time_pages(app, render, provider, starts))
+            for label, render, provider in (
+                ("orm_stdlib", orm, stdlib),
+                ("orm_fast_encoder", orm, fast),
+                ("rows_stdlib", rows, stdlib),
+                ("rows_fast_encoder", rows, fast),
+            )
+        }
+        results.setdefault("endpoint", {})[entity] = {
+            serializer: time_endpoint(path, serializer, f"/api/{entity}", args.pages)
+            for serializer in ("json", "auto")
+        }
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    print(json.dumps({"benchmark": "serialization", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Concurrent read/write throughput of SQLite with and without connection tuning.
+
+Runs reader and writer threads against a temporary database built from the
+application schema, once with SQLite's default settings and once with
+``database.SQLITE_PRAGMA_DEFAULTS``, and prints the results as JSON.
+
+Usage (from backend/):
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from database import SQLITE_PRAGMA_DEFAULTS, db, install_sqlite_pragmas
+import models  # noqa: F401  (registers the tables)
+import search  # noqa: F401  (registers the FTS table and triggers)
+
+
+def seed(engine, rows):
+    db.metadata.create_all(engine)
+    contact = db.metadata.tables["contact"]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(contact),
+            [
+                {
+                    "first_name": f"First{i}",
+                    "last_name": f"Last{i}",
+                    "search_key": f"first{i} last{i}",
+                    "created_by": 1,
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+def run(label, pragmas, readers, writers, seconds, rows):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", pool_size=readers + writers)
+    install_sqlite_pragmas(engine, pragmas)
+    seed(engine, rows)
+
+    contact = db.metadata.tables["contact"]
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def reader():
+        done = 0
+        with engine.connect() as connection:
+            while time.monotonic() < stop:
+                contact_id = random.randint(1, rows)
+                connection.execute(
+                    select(contact.c.first_name).where(contact.c.id == contact_id)
+                ).all()
+                connection.commit()
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = locked = 0
+        while time.monotonic() < stop:
+            contact_id = random.randint(1, rows)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        update(contact)
+                        .where(contact.c.id == contact_id)
+                        .values(notes=f"note {time.monotonic()}")
+                    )
+                done += 1
+            except OperationalError:
+                locked += 1
+        with lock:
+            counts["writes"] += done
+            counts["locked"] += locked
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+    return {
+        "config": label,
+        "reads_per_sec": round(counts["reads"] / seconds, 1),
+        "writes_per_sec": round(counts["writes"] / seconds, 1),
+        "locked_errors": counts["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    results = [
+        run(label, pragmas, args.readers, args.writers, args.seconds, args.rows)
+        for label, pragmas in (
+            ("default", {}),
+            ("tuned", SQLITE_PRAGMA_DEFAULTS),
+        )
+    ]
+    print(json.dumps({"benchmark": "sqlite_concurrency", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Sustained contact-write throughput with and without the write queue.
+
+Logs in one test client per thread and has every thread create contacts
+through POST /api/contacts against a temporary database file, first with
+each request committing on its own and then with ``WRITE_QUEUE`` enabled.
+Prints the results as JSON.
+
+Usage (from backend/):
+    python benchmarks/write_queue.py --threads 16 --writes 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+def run(label, write_queue, threads, writes, synchronous):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "SECRET_KEY": "benchmark",
+            "SQLITE_PRAGMAS": {"synchronous": synchronous},
+            "WRITE_QUEUE": write_queue,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        from models import User
+
+        user = User(username="bench", email="bench@example.com", role="editor")
+        user.set_password("bench")
+        db.session.add(user)
+        db.session.commit()
+
+    clients = []
+    for _ in range(threads):
+        client = app.test_client()
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "bench", "password": "bench"}),
+            content_type="application/json",
+        )
+        clients.append(client)
+
+    failures = []
+
+    def worker(client, n):
+        for i in range(writes):
+            response = client.post(
+                "/api/contacts",
+                data=json.dumps({"first_name": f"T{n}", "last_name": f"C{i}"}),
+                content_type="application/json",
+            )
+            if response.status_code != 201:
+                failures.append(response.status_code)
+
+    workers = [
+        threading.Thread(target=worker, args=(client, n))
+        for n, client in enumerate(clients)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "config": label,
+        "synchronous": synchronous,
+        "writes_per_sec": round(threads * writes / elapsed, 1),
+        "failures": len(failures),
+    }
+    queue = app.extensions.get("write_queue")
+    if queue is not None:
+        result["commits"] = queue.batches
+        result["mean_group_size"] = round(queue.jobs / max(queue.batches, 1), 1)
+        queue.close()
+
+    with app.app_context():
+        db.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=100, help="per thread")
+    parser.add_argument(
+        "--synchronous",
+        default="FULL",
+        help="SQLite synchronous setting; group commit saves one fsync per write",
+    )
+    args = parser.parse_args()
+
+    results = [
+        run(label, enabled, args.threads, args.writes, args.synchronous)
+        for label, enabled in (("per_request_commit", False), ("write_queue", True))
+    ]
+    print(json.dumps({"benchmark": "write_queue", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
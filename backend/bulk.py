@@ -0,0 +1,282 @@
+"""
+Bulk contact changes for ``POST /api/contacts/bulk``.
+
+A request lists up to ``MAX_OPERATIONS`` create, update and delete
+operations. They are checked together and applied in one transaction with
+a fixed number of statements, however many operations there are:
+
+* one ``IN`` query for the referenced companies;
+* one ``IN`` query for the contacts being updated or deleted;
+* one multi-row ``INSERT`` for the creates;
+* one executemany ``UPDATE`` per set of changed columns;
+* one ``DELETE ... IN`` for the deletes.
+
+Derived columns (``search_key``, ``*_rev``) are computed here, because Core
+statements skip the ORM events that fill them for single writes.
+
+In ``atomic`` mode (the default) nothing is written when any operation is
+invalid. In ``partial`` mode the valid operations are applied and the
+invalid ones are reported. Either way the response has one result per
+operation, in request order.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from database import db
+from importer import IMPORT_FIELDS
+from models import Company, Contact
+from normalization import contact_search_key
+from phones import reversed_digits
+
+MAX_OPERATIONS = 5000
+MODES = ("atomic", "partial")
+OPERATIONS = ("create", "update", "delete")
+
+# Columns a client may set, as for POST /api/contacts
+FIELDS = IMPORT_FIELDS
+# Columns that feed contact_search_key
+_KEY_FIELDS = ("first_name", "last_name", "email", "phone", "mobile", "city")
+
+_contacts = Contact.__table__
+
+
+class BulkRequestError(ValueError):
+    """Raised for a bulk request that cannot be processed at all"""
+
+
+class _OperationError(ValueError):
+    pass
+
+
+def parse_request(payload):
+    """Return ``(operations, atomic)`` from a request body"""
+    if not isinstance(payload, dict):
+        raise BulkRequestError("Expected a JSON object")
+    operations = payload.get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise BulkRequestError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise BulkRequestError(f"At most {MAX_OPERATIONS} operations per request")
+    mode = payload.get("mode", "atomic")
+    if mode not in MODES:
+        raise BulkRequestError("mode must be atomic or partial")
+    return operations, mode == "atomic"
+
+
+def _integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_data(data, creating):
+    """Return ``(fields, company_id)``; ``company_id`` is ``...`` when the
+    operation does not set it"""
+    if not isinstance(data, dict):
+        raise _OperationError("data must be an object")
+    fields = {}
+    for field in FIELDS:
+        if field in data:
+            value = data[field]
+            if value is not None and not isinstance(value, str):
+                raise _OperationError(f"{field} must be a string")
+            fields[field] = value
+    for field in ("first_name", "last_name"):
+        if (creating or field in fields) and not fields.get(field):
+            raise _OperationError("First name and last name required")
+
+    company_id = ...
+    if "company_id" in data:
+        company_id = data["company_id"] or None
+        if company_id is not None and not _integer(company_id):
+            raise _OperationError("Invalid company_id")
+    return fields, company_id
+
+
+def _check_operation(operation):
+    """Return ``(kind, contact id, fields, company_id)`` for one operation"""
+    if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+        raise _OperationError("op must be create, update or delete")
+    kind = operation["op"]
+    contact_id = operation.get("id")
+    if kind != "create" and not _integer(contact_id):
+        raise _OperationError("id required")
+    if kind == "delete":
+        return kind, contact_id, None, ...
+    fields, company_id = _check_data(operation.get("data"), kind == "create")
+    return kind, contact_id, fields, company_id
+
+
+def _derived(values, changed):
+    """Derived column values for a row with ``values`` after ``changed``"""
+    derived = {"search_key": contact_search_key(*(values[f] for f in _KEY_FIELDS))}
+    for field in ("phone", "mobile"):
+        if field in changed:
+            derived[f"{field}_rev"] = reversed_digits(values[field])
+    return derived
+
+
+def apply_operations(operations, atomic, user_id, can_edit_all):
+    """Check and apply ``operations``; runs through ``run_write``.
+
+    Users who cannot edit all contacts may not create any, and may update
+    or delete only their own. Returns a dict with ``applied``, per-operation
+    ``results``, and the ``saved`` and ``deleted`` contacts for the
+    in-memory indexes.
+    """
+    checked, results = [], [None] * len(operations)
+    for index, operation in enumerate(operations):
+        try:
+            checked.append((index, *_check_operation(operation)))
+        except _OperationError as exc:
+            kind = operation.get("op") if isinstance(operation, dict) else None
+            results[index] = {"index": index, "op": kind, "error": str(exc)}
+
+    company_ids = {c for _, _, _, _, c in checked if c is not ... and c is not None}
+    companies = {}
+    if company_ids:
+        companies = dict(
+            db.session.execute(
+                select(Company.id, Company.name).where(Company.id.in_(company_ids))
+            ).all()
+        )
+    contact_ids = [
+        contact_id for _, kind, contact_id, _, _ in checked if kind != "create"
+    ]
+    current = {}
+    if contact_ids:
+        current = {
+            row.id: row
+            for row in db.session.execute(
+                select(
+                    _contacts.c.id,
+                    _contacts.c.created_by,
+                    _contacts.c.company_id,
+                    *(_contacts.c[field] for field in _KEY_FIELDS),
+                    Company.name.label("company_name"),
+                )
+                .outerjoin(Company, Company.id == _contacts.c.company_id)
+                .where(_contacts.c.id.in_(contact_ids))
+            )
+        }
+        # Updates that keep their company still index its name
+        companies.update(
+            (row.company_id, row.company_name)
+            for row in current.values()
+            if row.company_id is not None
+        )
+
+    creates, updates, deletes, seen = [], [], [], set()
+    for index, kind, contact_id, fields, company_id in checked:
+        error = None
+        if kind == "create" and not can_edit_all:
+            error = "Editor or admin access required"
+        elif kind != "create" and contact_id in seen:
+            error = "Contact appears in more than one operation"
+        elif kind != "create" and contact_id not in current:
+            error = "Contact not found"
+        elif (
+            kind != "create"
+            and not can_edit_all
+            and current[contact_id].created_by != user_id
+        ):
+            error = "Permission denied"
+        elif (
+            company_id is not ...
+            and company_id is not None
+            and (company_id not in companies)
+        ):
+            error = "Invalid company_id"
+        if error:
+            results[index] = {"index": index, "op": kind, "error": error}
+            continue
+        seen.add(contact_id)
+        entry = (index, contact_id, fields, company_id)
+        {"create": creates, "update": updates, "delete": deletes}[kind].append(entry)
+
+    if atomic and any(results):
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {
+                    "index": index,
+                    "op": operations[index]["op"],
+                    "error": "Not applied, another operation failed",
+                }
+        return {"applied": False, "results": results, "saved": [], "deleted": []}
+
+    saved = []
+    now = datetime.utcnow()
+    if creates:
+        rows = []
+        for _, _, fields, company_id in creates:
+            row = {field: fields.get(field) for field in FIELDS}
+            row.update(_derived(row, ("phone", "mobile")))
+            row.update(
+                company_id=None if company_id is ... else company_id,
+                created_at=now,
+                updated_at=now,
+                created_by=user_id,
+            )
+            rows.append(row)
+        # sort_by_parameter_order would make SQLAlchemy send one INSERT per
+        # row on SQLite. Instead: the first INSERT takes SQLite's write lock,
+        # held until commit, so no other connection inserts in between, and
+        # each new rowid is one more than the largest. The ids are therefore
+        # consecutive and ascend in parameter order; that is checked, and a
+        # mismatch rolls the job back rather than misreporting ids.
+        ids = sorted(
+            db.session.scalars(insert(_contacts).returning(_contacts.c.id), rows)
+        )
+        if len(ids) != len(rows) or ids[-1] - ids[0] != len(ids) - 1:
+            raise RuntimeError("Inserted contact ids are not consecutive")
+        for (index, _, _, _), row, contact_id in zip(creates, rows, ids):
+            results[index] = {"index": index, "op": "create", "id": contact_id}
+            saved.append((contact_id, row))
+
+    # executemany needs the same columns in every row, so group by them
+    groups = {}
+    for index, contact_id, fields, company_id in updates:
+        values = {**current[contact_id]._asdict(), **fields}
+        changes = {**fields, **_derived(values, fields)}
+        if company_id is not ...:
+            changes["company_id"] = company_id
+        groups.setdefault(tuple(sorted(changes)), []).append((contact_id, changes))
+        values["company_id"] = changes.get("company_id", values["company_id"])
+        results[index] = {"index": index, "op": "update", "id": contact_id}
+        saved.append((contact_id, values))
+    for columns, rows in groups.items():
+        db.session.execute(
+            update(_contacts)
+            .where(_contacts.c.id == bindparam("contact_id"))
+            .values({column: bindparam(f"new_{column}") for column in columns}),
+            [
+                {"contact_id": contact_id}
+                | {f"new_{column}": value for column, value in changes.items()}
+                for contact_id, changes in rows
+            ],
+        )
+
+    deleted = [contact_id for _, contact_id, _, _ in deletes]
+    if deleted:
+        db.session.execute(delete(_contacts).where(_contacts.c.id.in_(deleted)))
+        for index, contact_id, _, _ in deletes:
+            results[index] = {"index": index, "op": "delete", "id": contact_id}
+
+    return {
+        "applied": True,
+        "results": results,
+        "saved": [
+            {
+                "id": contact_id,
+                "first_name": values["first_name"],
+                "last_name": values["last_name"],
+                **(
+                    {"company": {"id": company, "name": companies.get(company)}}
+                    if (company := values["company_id"])
+                    else {}
+                ),
+            }
+            for contact_id, values in saved
+        ],
+        "deleted": deleted,
+    }
@@ -0,0 +1,140 @@
+"""
+In-process caches and write-driven invalidation.
+
+Caches register a callback with ``on_tables_changed``. The callback runs after
+every successful commit that inserted, updated or deleted ORM objects of the
+listed tables. Code that writes through Core statements (bulk inserts and
+similar) must call ``tables_changed`` itself after committing.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from metrics import CACHE_REQUESTS
+
+_listeners = []
+_missing = object()
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize=10000, ttl=300, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Label for hit/miss metrics; unnamed caches are not counted
+        self.name = name
+        # Bumped by clear() so values computed before a write can be dropped
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        value = self._get(key, _missing)
+        if self.name is not None:
+            CACHE_REQUESTS.inc(self.name, "miss" if value is _missing else "hit")
+        return default if value is _missing else value
+
+    def _get(self, key, default):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store ``value``; skipped if the cache was cleared since
+        ``generation`` was read"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            ttl = self.ttl if ttl is None else ttl
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+
+def on_tables_changed(*tables):
+    """Decorator registering ``f(changed_tables)`` for writes to ``tables``"""
+
+    def decorator(f):
+        _listeners.append((frozenset(tables), f))
+        return f
+
+    return decorator
+
+
+def per_app_cache(name, *tables, maxsize=128, ttl=300):
+    """Return a getter for a per-application ``TTLCache``.
+
+    The cache lives in ``app.extensions[name]`` and is cleared whenever one
+    of ``tables`` changes.
+    """
+    caches = weakref.WeakSet()
+
+    @on_tables_changed(*tables)
+    def _clear(changed):
+        for cache in list(caches):
+            cache.clear()
+
+    def get_cache():
+        cache = current_app.extensions.get(name)
+        if cache is None:
+            cache = TTLCache(maxsize=maxsize, ttl=ttl, name=name)
+            current_app.extensions[name] = cache
+            caches.add(cache)
+        return cache
+
+    return get_cache
+
+
+def tables_changed(tables):
+    """Notify listeners that rows in ``tables`` were committed"""
+    tables = set(tables)
+    for watched, callback in _listeners:
+        if watched & tables:
+            callback(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            changed.add(table)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_changed_tables(session):
+    changed = session.info.pop("changed_tables", None)
+    if changed:
+        tables_changed(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_tables(session):
+    session.info.pop("changed_tables", None)
@@ -1,3 +1,95 @@
+import os
+import re
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
 
 db = SQLAlchemy()
+
+# Pragmas applied to every SQLite connection. Override per app with the
+# SQLITE_PRAGMAS config dict (None drops a pragma) or per pragma with a
+# PHONEBOOK_SQLITE_<NAME> environment variable.
+SQLITE_PRAGMA_DEFAULTS = {
+    # Readers no longer block behind the writer
+    "journal_mode": "WAL",
+    # Safe with WAL; fsync only at checkpoints
+    "synchronous": "NORMAL",
+    # Wait for the write lock instead of failing with "database is locked"
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative values are KiB: 64 MiB page cache per connection
+    "cache_size": -64000,
+    "temp_store": "MEMORY",
+}
+
+_PRAGMA_VALUE_RE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas(config, environ=os.environ):
+    """Resolve the pragmas for an app from defaults, config and environment"""
+    pragmas = dict(SQLITE_PRAGMA_DEFAULTS)
+    pragmas.update(config.get("SQLITE_PRAGMAS") or {})
+    for name in list(pragmas):
+        value = environ.get(f"PHONEBOOK_SQLITE_{name.upper()}")
+        if value is not None:
+            pragmas[name] = value
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA name = value`` on every new connection of ``engine``"""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    statements = []
+    for name, value in pragmas.items():
+        if not _PRAGMA_VALUE_RE.match(name) or not _PRAGMA_VALUE_RE.match(str(value)):
+            raise ValueError(f"Invalid SQLite pragma: {name}={value!r}")
+        statements.append(f"PRAGMA {name} = {value}")
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def init_engine(app):
+    """Apply connection-level tuning to the app's engine"""
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
+
+
+def sync_table_schema(connection, table):
+    """Add columns and indexes that ``create_all`` skips on existing tables.
+
+    Returns the names of the columns that were added.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    existing = {
+        column["name"] for column in inspect(connection).get_columns(table.name)
+    }
+
+    added = []
+    for column in table.columns:
+        if column.name not in existing:
+            column_type = column.type.compile(connection.dialect)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {quote(table.name)} "
+                f"ADD COLUMN {quote(column.name)} {column_type}"
+            )
+            added.append(column.name)
+
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+    return added
+
+
+@event.listens_for(db.metadata, "after_create")
+def _sync_existing_tables(target, connection, **kw):
+    for table in target.sorted_tables:
+        sync_table_schema(connection, table)
@@ -0,0 +1,485 @@
+"""
+Duplicate contact detection and merging.
+
+Comparing every contact with every other one is quadratic, so a scan first
+puts contacts into blocks that share a blocking key:
+
+* ``phone``: the last ``MATCH_DIGITS`` of the phone or mobile number, read
+  from the already normalized ``*_rev`` columns;
+* ``email``: the local part of the email, lower-cased, without dots or a
+  ``+tag``;
+* ``name``: phonetic codes of the last and first name, see
+  ``phonetic_key``. It covers Latin and Persian spellings.
+
+Only contacts within the same block are compared. Each key is hashed and
+packed with the contact id into one 64-bit integer in an ``array('q')``.
+Sorting that array groups each block, so the keys of a million contacts
+take 8 bytes each rather than a dict of strings; only the kind being
+grouped is sorted as a list at a time. Blocks larger than
+``MAX_BLOCK_SIZE`` ("info@", a switchboard number, the most common names)
+say little about identity and are skipped. Their members are still compared
+through their other keys.
+
+Candidate pairs are packed into 64-bit integers as well, in
+``PAIR_BUCKETS`` arrays split by the lower contact id. Buckets are sorted
+and deduplicated one at a time and scored in chunks, loading only the
+contacts involved, so besides 8 bytes per candidate only one bucket is held
+as Python objects. The score combines name trigram similarity with matching
+or conflicting phones and emails. Pairs reaching ``MIN_SCORE`` are kept in
+packed arrays too and replace the contents of ``duplicate_pair`` in one
+transaction, inserted in batches.
+"""
+
+import threading
+import time
+from array import array
+from collections import namedtuple
+from itertools import islice
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    Integer,
+    String,
+    delete,
+    func,
+    insert,
+    select,
+)
+
+from database import db
+from fuzzy import trigrams
+from models import Contact
+from normalization import normalize_text
+from phones import MATCH_DIGITS
+from writer import run_write
+
+MIN_SCORE = 0.6
+MAX_BLOCK_SIZE = 100
+# Numbers shorter than this are extensions or typos, not evidence
+MIN_PHONE_DIGITS = 6
+SCAN_BATCH_SIZE = 10000
+SCORE_CHUNK = 5000
+INSERT_BATCH_SIZE = 5000
+# Candidate pairs are split by lower id so one bucket is sorted at a time
+PAIR_BUCKETS = 64
+
+# Score weights; a pair is reported from MIN_SCORE up
+NAME_WEIGHT = 0.6
+PHONE_WEIGHT = 0.35
+EMAIL_WEIGHT = 0.35
+EMAIL_LOCAL_WEIGHT = 0.2
+# Both sides have phones (emails) and none agree
+PHONE_CONFLICT = 0.2
+EMAIL_CONFLICT = 0.1
+
+KINDS = ("phone", "email", "name")
+
+duplicate_pair = db.Table(
+    "duplicate_pair",
+    # contact_id < duplicate_id
+    Column("contact_id", Integer, primary_key=True),
+    Column("duplicate_id", Integer, primary_key=True, index=True),
+    Column("score", Float, nullable=False),
+    # Comma separated: name, phone, email
+    Column("reasons", String(50), nullable=False),
+    Index("ix_duplicate_pair_score", "score"),
+)
+
+# Soundex-like classes shared by Latin and Persian letters, so "Rezaei" and
+# its Persian spelling get the same code. Letters not listed (vowels, h, w,
+# alef, yeh, heh, ain) are skipped.
+_SOUND_CLASSES = {}
+for _letters, _code in (
+    ("bfpv" "بپفو", "1"),
+    (
+        "cgjkqsxz" "جچژکگقغخ" "سصثزذضظش",
+        "2",
+    ),
+    ("dt" "تطد", "3"),
+    ("l" "ل", "4"),
+    ("mn" "من", "5"),
+    ("r" "ر", "6"),
+):
+    for _letter in _letters:
+        _SOUND_CLASSES[_letter] = _code
+
+PHONETIC_LENGTH = 4
+
+
+def phonetic_key(name):
+    """Return the sound-class code of ``name``, e.g. ``"62"`` for Rezaei"""
+    codes = []
+    for char in normalize_text(name):
+        code = _SOUND_CLASSES.get(char)
+        if code is not None and (not codes or codes[-1] != code):
+            codes.append(code)
+            if len(codes) == PHONETIC_LENGTH:
+                break
+    return "".join(codes)
+
+
+def email_key(email):
+    """Return the normalized local part of ``email``, or None"""
+    if not email or "@" not in email:
+        return None
+    local = email.split("@", 1)[0].lower().split("+", 1)[0].replace(".", "")
+    return local or None
+
+
+def phone_keys(*reversed_numbers):
+    """Return the match suffixes of ``*_rev`` column values"""
+    return {
+        value[:MATCH_DIGITS]
+        for value in reversed_numbers
+        if value and len(value) >= MIN_PHONE_DIGITS
+    }
+
+
+def blocking_keys(first_name, last_name, email, phone_rev, mobile_rev):
+    """Return ``(kind, key)`` pairs for one contact"""
+    keys = [("phone", key) for key in phone_keys(phone_rev, mobile_rev)]
+    local = email_key(email)
+    if local:
+        keys.append(("email", local))
+    surname = phonetic_key(last_name)
+    if surname:
+        keys.append(("name", f"{surname}:{phonetic_key(first_name)}"))
+    return keys
+
+
+def _unpack_pair(pair):
+    return pair >> 32, pair & 0xFFFFFFFF
+
+
+def candidate_pairs(rows, max_id, max_block_size=MAX_BLOCK_SIZE):
+    """Return ``(buckets, stats)`` for contacts that share a blocking key.
+
+    ``rows`` yields ``(id, first_name, last_name, email, phone_rev,
+    mobile_rev)``. ``buckets`` is a list of ``array('q')`` of packed
+    ``(low id, high id)`` pairs, split by the low id. A pair repeats when
+    its contacts share several keys; ``unique_pairs`` removes repeats.
+    """
+    id_bits = max(max_id, 1).bit_length()
+    hash_mask = (1 << (63 - id_bits)) - 1
+    packed = {kind: array("q") for kind in KINDS}
+    contacts = 0
+    for row in rows:
+        contacts += 1
+        for kind, key in blocking_keys(*row[1:]):
+            packed[kind].append(((hash(key) & hash_mask) << id_bits) | row[0])
+
+    id_mask = (1 << id_bits) - 1
+    buckets = [array("q") for _ in range(PAIR_BUCKETS)]
+    bucket_width = max_id // PAIR_BUCKETS + 1
+    stats = {"contacts": contacts, "blocks": 0, "oversized_blocks": 0}
+    for kind in KINDS:
+        # Sorting groups each block; a block's ids come out ascending
+        entries = sorted(packed.pop(kind))
+        start = 0
+        for end in range(1, len(entries) + 1):
+            if end < len(entries) and (
+                entries[end] >> id_bits == entries[start] >> id_bits
+            ):
+                continue
+            size = end - start
+            if size > max_block_size:
+                stats["oversized_blocks"] += 1
+            elif size > 1:
+                stats["blocks"] += 1
+                ids = [entry & id_mask for entry in entries[start:end]]
+                for i, low in enumerate(ids):
+                    bucket = buckets[low // bucket_width]
+                    for high in ids[i + 1 :]:
+                        if low != high:
+                            bucket.append((low << 32) | high)
+            start = end
+        del entries
+    return buckets, stats
+
+
+def unique_pairs(buckets):
+    """Yield the packed pairs of ``buckets`` in ascending order without
+    repeats, emptying each bucket once it is sorted"""
+    for position, bucket in enumerate(buckets):
+        buckets[position] = None
+        previous = None
+        for pair in sorted(bucket):
+            if pair != previous:
+                yield pair
+                previous = pair
+
+
+_Record = namedtuple("_Record", "grams email email_key phones")
+
+
+def _record(first_name, last_name, email, phone_rev, mobile_rev):
+    return _Record(
+        trigrams(f"{first_name} {last_name}"),
+        email.lower() if email else None,
+        email_key(email),
+        phone_keys(phone_rev, mobile_rev),
+    )
+
+
+def score_pair(a, b):
+    """Return ``(score, reasons)`` for two contact records"""
+    union = len(a.grams | b.grams)
+    name = len(a.grams & b.grams) / union if union else 0.0
+    score = NAME_WEIGHT * name
+    reasons = ["name"] if name >= 0.5 else []
+
+    if a.phones and b.phones:
+        if a.phones & b.phones:
+            score += PHONE_WEIGHT
+            reasons.append("phone")
+        else:
+            score -= PHONE_CONFLICT
+    if a.email and b.email:
+        if a.email == b.email:
+            score += EMAIL_WEIGHT
+            reasons.append("email")
+        elif a.email_key == b.email_key:
+            score += EMAIL_LOCAL_WEIGHT
+            reasons.append("email")
+        else:
+            score -= EMAIL_CONFLICT
+    return round(max(0.0, min(score, 1.0)), 3), reasons
+
+
+_SCAN_COLUMNS = (
+    Contact.id,
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone_rev,
+    Contact.mobile_rev,
+)
+
+
+def score_candidates(pairs, min_score=MIN_SCORE):
+    """Yield ``(contact_id, duplicate_id, score, reasons)`` for the packed
+    candidate ``pairs`` that reach ``min_score``, loading contacts chunk by
+    chunk"""
+    pairs = iter(pairs)
+    while chunk := [_unpack_pair(pair) for pair in islice(pairs, SCORE_CHUNK)]:
+        ids = {contact_id for pair in chunk for contact_id in pair}
+        records = {
+            row[0]: _record(*row[1:])
+            for row in db.session.execute(
+                select(*_SCAN_COLUMNS).where(Contact.id.in_(ids))
+            )
+        }
+        for low, high in chunk:
+            if low in records and high in records:
+                score, reasons = score_pair(records[low], records[high])
+                if score >= min_score:
+                    yield low, high, score, ",".join(reasons)
+
+
+class _ScoredPairs:
+    """Scored pairs in packed arrays: 17 bytes a pair instead of a tuple"""
+
+    def __init__(self):
+        self.pairs = array("q")
+        self.scores = array("d")
+        self.reasons = array("B")
+        self.reason_names = []
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def append(self, low, high, score, reasons):
+        if reasons not in self.reason_names:
+            self.reason_names.append(reasons)
+        self.pairs.append((low << 32) | high)
+        self.scores.append(score)
+        self.reasons.append(self.reason_names.index(reasons))
+
+    def batches(self, size):
+        """Yield lists of ``duplicate_pair`` rows of up to ``size``"""
+        for start in range(0, len(self.pairs), size):
+            end = start + size
+            yield [
+                {
+                    "contact_id": pair >> 32,
+                    "duplicate_id": pair & 0xFFFFFFFF,
+                    "score": score,
+                    "reasons": self.reason_names[reasons],
+                }
+                for pair, score, reasons in zip(
+                    self.pairs[start:end],
+                    self.scores[start:end],
+                    self.reasons[start:end],
+                )
+            ]
+
+
+def _replace_pairs_job(scored):
+    """Replace the stored duplicate pairs; runs through ``run_write``"""
+    db.session.execute(delete(duplicate_pair))
+    for rows in scored.batches(INSERT_BATCH_SIZE):
+        db.session.execute(insert(duplicate_pair), rows)
+    return len(scored)
+
+
+def find_duplicates(min_score=MIN_SCORE, max_block_size=MAX_BLOCK_SIZE):
+    """Scan all contacts, store the duplicate pairs and return scan stats"""
+    started = time.perf_counter()
+    max_id = db.session.scalar(select(func.max(Contact.id))) or 0
+    result = db.session.execute(
+        select(*_SCAN_COLUMNS).execution_options(yield_per=SCAN_BATCH_SIZE)
+    )
+    try:
+        buckets, stats = candidate_pairs(result, max_id, max_block_size)
+    finally:
+        result.close()
+
+    candidates = 0
+
+    def counted(pairs):
+        nonlocal candidates
+        for pair in pairs:
+            candidates += 1
+            yield pair
+
+    scored = _ScoredPairs()
+    for row in score_candidates(counted(unique_pairs(buckets)), min_score):
+        scored.append(*row)
+    db.session.rollback()
+    stats["candidates"] = candidates
+    stats["duplicates"] = run_write(_replace_pairs_job, scored)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def _contact_references():
+    """Return the columns of other tables that hold contact ids"""
+    return [
+        fk.parent
+        for table in db.metadata.tables.values()
+        for fk in table.foreign_keys
+        if fk.column.table.name == "contact" and table.name != "contact"
+    ]
+
+
+# Columns taken from a duplicate when the kept contact has no value
+MERGE_FIELDS = (
+    "email",
+    "phone",
+    "mobile",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "company_id",
+)
+
+
+def merge_contacts(contact_id, duplicate_ids):
+    """Merge ``duplicate_ids`` into contact ``contact_id`` in the current
+    transaction and return the kept contact, or None if any is missing.
+
+    Empty fields of the kept contact are filled from the duplicates in the
+    given order and distinct notes are appended. References to the
+    duplicates are re-pointed, then the duplicates are deleted, each with
+    one statement.
+    """
+    contact = db.session.get(Contact, contact_id)
+    duplicates = db.session.scalars(
+        select(Contact).where(Contact.id.in_(duplicate_ids))
+    ).all()
+    if contact is None or len(duplicates) != len(set(duplicate_ids)):
+        return None
+    order = {duplicate_id: i for i, duplicate_id in enumerate(duplicate_ids)}
+    duplicates.sort(key=lambda duplicate: order[duplicate.id])
+
+    for field in MERGE_FIELDS:
+        if not getattr(contact, field):
+            for duplicate in duplicates:
+                if getattr(duplicate, field):
+                    setattr(contact, field, getattr(duplicate, field))
+                    break
+    notes = [contact.notes] if contact.notes else []
+    for duplicate in duplicates:
+        if duplicate.notes and duplicate.notes not in notes:
+            notes.append(duplicate.notes)
+    contact.notes = "\n\n".join(notes) or None
+    db.session.flush()
+
+    ids = [duplicate.id for duplicate in duplicates]
+    for column in _contact_references():
+        db.session.execute(
+            column.table.update().where(column.in_(ids)).values({column: contact.id})
+        )
+    db.session.execute(
+        delete(duplicate_pair).where(
+            duplicate_pair.c.contact_id.in_(ids)
+            | duplicate_pair.c.duplicate_id.in_(ids)
+        )
+    )
+    for duplicate in duplicates:
+        db.session.expunge(duplicate)
+    db.session.execute(delete(Contact).where(Contact.id.in_(ids)))
+    return contact
+
+
+class DedupeScan:
+    """Runs ``find_duplicates`` in a background thread, one scan at a time"""
+
+    def __init__(self, app):
+        self.app = app
+        self.status = {"running": False}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, **options):
+        """Start a scan; return False if one is already running"""
+        with self._lock:
+            if self.status["running"]:
+                return False
+            self.status = {
+                "running": True,
+                "started_at": datetime.utcnow().isoformat(),
+            }
+        self._thread = threading.Thread(
+            target=self._run, kwargs=options, name="phonebook-dedupe", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def join(self, timeout=None):
+        """Wait for the running scan, if any"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, **options):
+        status = {}
+        with self.app.app_context():
+            try:
+                status = find_duplicates(**options)
+            except Exception as exc:
+                status = {"error": type(exc).__name__}
+            finally:
+                db.session.remove()
+        with self._lock:
+            self.status = {
+                **self.status,
+                **status,
+                "running": False,
+                "finished_at": datetime.utcnow().isoformat(),
+            }
+
+
+def get_scan():
+    """Return the app's ``DedupeScan``"""
+    scan = current_app.extensions.get("dedupe")
+    if scan is None:
+        scan = current_app.extensions.setdefault(
+            "dedupe", DedupeScan(current_app._get_current_object())
+        )
+    return scan
@@ -0,0 +1,137 @@
+"""
+Weak ETags from per-table versions, for conditional GET.
+
+A table's version is the newest change number among its rows and its
+tombstones (see ``sync``), read from the ``change_seq`` indexes. It grows
+with every insert, update and delete from any process, CLI imports
+included. When sync is unavailable, a counter in this process is used
+instead; it is bumped after each commit that touched the table. Tables
+without change numbers (``STAMPED``) are versioned by their newest
+``updated_at`` and their row count, which any process changes too.
+
+``@conditional(*tables)`` reads the versions before the view runs and
+answers a matching ``If-None-Match`` with ``304`` right away. An unchanged
+resource then costs one index probe instead of the page query and the
+serialization. Views that cache their serialized body can key it on
+``current_etag`` and tag it with ``body_etag`` through ``tagged_response``.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy import func, select
+
+import sync
+from cache import on_tables_changed
+from database import db
+from models import User
+
+# Tables without change numbers, versioned by updated_at and row count
+STAMPED = {"user": User}
+
+# Tables that views may depend on
+TABLES = (*sync.SYNCED, *STAMPED)
+
+# Local counters restart at zero with the process; the boot token keeps tags
+# handed out by an earlier process from matching
+_BOOT = os.urandom(4).hex()
+_local_versions = dict.fromkeys(TABLES, 0)
+_lock = threading.Lock()
+
+
+@on_tables_changed(*TABLES)
+def _bump(changed):
+    with _lock:
+        for table in changed:
+            if table in _local_versions:
+                _local_versions[table] += 1
+
+
+def _tracked_columns(table):
+    model = sync.SYNCED[table][1]
+    tombstone = sync.tombstone.c
+    return (
+        select(func.max(model.change_seq)).scalar_subquery(),
+        select(func.max(tombstone.change_seq))
+        .where(tombstone.entity == table)
+        .scalar_subquery(),
+    )
+
+
+def current_etag(tables):
+    """Return the ETag value for a resource built from ``tables``"""
+    tracked = [table for table in tables if table in sync.SYNCED]
+    if not sync.sync_enabled():
+        tracked = []
+    stamped = [table for table in tables if table in STAMPED]
+    local = [table for table in tables if table not in tracked + stamped]
+
+    columns = [column for table in tracked for column in _tracked_columns(table)]
+    if tracked:
+        # Pruning may lower a version, so it has to change the tag too
+        columns.append(
+            select(sync.sync_counter.c.pruned_through)
+            .where(sync.sync_counter.c.id == 1)
+            .scalar_subquery()
+        )
+    for table in stamped:
+        model = STAMPED[table]
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+
+    parts = []
+    if columns:
+        values = db.session.execute(select(*columns)).one()
+        for i in range(len(tracked)):
+            parts.append(max(values[2 * i] or 0, values[2 * i + 1] or 0))
+        if tracked:
+            parts.append(values[2 * len(tracked)])
+        for stamp in values[len(columns) - 2 * len(stamped) :]:
+            parts.append(stamp.timestamp() if isinstance(stamp, datetime) else stamp)
+    if local:
+        with _lock:
+            parts.append(_BOOT)
+            parts.extend(_local_versions[table] for table in local)
+    return "-".join(str(part) for part in parts)
+
+
+def body_etag(body):
+    """Return an ETag value for a serialized response body"""
+    return hashlib.blake2b(body.encode(), digest_size=8).hexdigest()
+
+
+def tagged_response(etag, view, *args, **kwargs):
+    """Return 304 if the request already has ``etag``, else call ``view``
+    and tag its response if that is a 200"""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    # Browsers keep the body but revalidate before every use
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional(*tables):
+    """Decorator adding a weak ETag to 200 responses and answering a
+    matching ``If-None-Match`` with 304 before the view runs"""
+
+    def decorator(f):
+        def wrapper(*args, **kwargs):
+            try:
+                etag = current_etag(tables)
+            except Exception:
+                return jsonify({"success": False, "error": "Server error"}), 500
+            return tagged_response(etag, f, *args, **kwargs)
+
+        wrapper.__name__ = f.__name__
+        return wrapper
+
+    return decorator
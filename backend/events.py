@@ -0,0 +1,175 @@
+"""
+Live change events for ``GET /api/events`` (Server-Sent Events).
+
+Each process has one ``EventHub``. Its poller thread reads new entries of
+the sync change sequence (see ``sync``) every ``EVENTS_POLL_INTERVAL``
+seconds. Because the sequence lives in the database, writes made by any
+worker process or by the CLI are seen. Each change becomes one compact,
+pre-serialized event, ``{"entity", "id", "op", "version"}``, that is kept
+in a bounded backlog. Streams wait on one shared condition and are woken
+together when events arrive.
+
+An idle stream is only a suspended generator; it holds no thread of the
+hub and no database connection. The poll costs one query per process,
+whatever the number of listeners. To hold thousands of idle connections
+without a server thread each, serve the app with an async worker such as
+``gunicorn -k gevent``.
+
+``version`` is the same token ``/api/sync`` takes. A client that was away
+reconnects with ``Last-Event-ID`` and gets the events it missed from the
+backlog, or a ``resync`` event when they are no longer there.
+"""
+
+import json
+import threading
+from collections import deque
+
+from database import db
+import sync
+
+DEFAULT_POLL_INTERVAL = 1.0
+# Comment lines keep proxies from closing idle streams and reveal
+# disconnected clients
+DEFAULT_KEEPALIVE = 15
+DEFAULT_BACKLOG = 1000
+# Changes read per poll; more are read right away
+POLL_LIMIT = 500
+# Reconnect delay suggested to browsers, in milliseconds
+RETRY_MS = 3000
+
+
+class EventHub:
+    """Polls the change sequence and fans events out to all streams"""
+
+    def __init__(
+        self,
+        app,
+        interval=DEFAULT_POLL_INTERVAL,
+        keepalive=DEFAULT_KEEPALIVE,
+        backlog=DEFAULT_BACKLOG,
+    ):
+        self.app = app
+        self.interval = interval
+        self.keepalive = keepalive
+        self.backlog = backlog
+        self.listeners = 0
+        # Newest change seen, and the change the backlog starts after
+        self.version = None
+        self.floor = None
+        self._events = deque()
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def close(self):
+        """Stop the poller thread"""
+        with self._condition:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._stop.clear()
+
+    def _ensure_started(self, after):
+        # Called with the condition held
+        if self.version is None:
+            self.version = self.floor = after
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="phonebook-events", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                with self._condition:
+                    if self.listeners == 0:
+                        # Nobody is listening; the next stream restarts us
+                        self._thread = None
+                        break
+                    after = self.version
+                try:
+                    changes = sync.change_log(after, POLL_LIMIT)
+                except Exception:
+                    changes = []
+                finally:
+                    # End the read so the next poll sees new commits
+                    db.session.remove()
+                if changes:
+                    self._publish(changes)
+                if len(changes) < POLL_LIMIT:
+                    self._stop.wait(self.interval)
+
+    def _publish(self, changes):
+        with self._condition:
+            for seq, entity, entity_id, op in changes:
+                data = json.dumps(
+                    {"entity": entity, "id": entity_id, "op": op, "version": seq},
+                    separators=(",", ":"),
+                )
+                self._events.append((seq, entity, data))
+            while len(self._events) > self.backlog:
+                self.floor = self._events.popleft()[0]
+            self.version = changes[-1][0]
+            self._condition.notify_all()
+
+    def wait(self, after, timeout):
+        """Return the events after ``after`` as ``(seq, entity, data)``.
+
+        Waits up to ``timeout`` seconds for one and returns an empty list if
+        none came. Returns None if events after ``after`` have left the
+        backlog, or were never seen by this hub.
+        """
+        with self._condition:
+            self._ensure_started(after)
+            if after < self.floor:
+                return None
+            self._condition.wait_for(lambda: self.version > after, timeout)
+            if after < self.floor:
+                return None
+            return [event for event in self._events if event[0] > after]
+
+    def stream(self, after, entities=None, resync=False):
+        """Yield the Server-Sent Events text for changes after ``after``"""
+        with self._condition:
+            self.listeners += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                if resync:
+                    # The client has to reload; carry on from the newest change
+                    with self._condition:
+                        self._ensure_started(after)
+                        after = max(self.version, after)
+                    yield f"id: {after}\nevent: resync\ndata: {after}\n\n"
+                    resync = False
+                events = self.wait(after, self.keepalive)
+                if events is None:
+                    resync = True
+                    continue
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                after = events[-1][0]
+                chunk = "".join(
+                    f"id: {seq}\nevent: change\ndata: {data}\n\n"
+                    for seq, entity, data in events
+                    if entities is None or entity in entities
+                )
+                if chunk:
+                    yield chunk
+        finally:
+            with self._condition:
+                self.listeners -= 1
+
+
+def init_app(app):
+    """Attach the event hub to ``app``; its poller starts with the first
+    stream"""
+    app.extensions["event_hub"] = EventHub(
+        app,
+        interval=app.config.get("EVENTS_POLL_INTERVAL", DEFAULT_POLL_INTERVAL),
+        keepalive=app.config.get("EVENTS_KEEPALIVE", DEFAULT_KEEPALIVE),
+        backlog=app.config.get("EVENTS_BACKLOG", DEFAULT_BACKLOG),
+    )
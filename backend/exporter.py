@@ -0,0 +1,268 @@
+"""
+Streaming exports of contacts, companies and notices.
+
+Rows are read with a Core ``select()`` executed with ``yield_per``, so the
+driver hands them over ``EXPORT_BATCH_SIZE`` at a time. Each batch is
+rendered to one chunk of CSV, NDJSON or vCard text, yielded to the client
+and then dropped. Memory therefore stays flat whatever the table size. The
+CSV header goes out before the query runs, so the first byte arrives at
+once. Contacts carry their company name from an outer join in the same
+query.
+
+Exports use the same column names as ``importer``, so an exported CSV or
+vCard file can be imported again.
+"""
+
+import csv
+import io
+from datetime import datetime
+
+from flask import current_app, request, stream_with_context
+from sqlalchemy import select
+
+from database import db
+from models import Company, Contact, Notice, User
+
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "vcf": "text/vcard; charset=utf-8",
+}
+_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "vcf": "vcf"}
+
+# vCard lines are folded at 75 octets (RFC 6350 section 3.2)
+_FOLD_AT = 75
+
+
+class ExportFormatError(ValueError):
+    """Raised for a format an entity cannot be exported in"""
+
+
+def _contact_query():
+    return (
+        select(
+            Contact.id,
+            Contact.first_name,
+            Contact.last_name,
+            Contact.email,
+            Contact.phone,
+            Contact.mobile,
+            Contact.address,
+            Contact.city,
+            Contact.state,
+            Contact.zip_code,
+            Contact.country,
+            Contact.company_id,
+            Company.name.label("company"),
+            Contact.notes,
+            Contact.created_at,
+            Contact.updated_at,
+            Contact.created_by,
+        )
+        .outerjoin(Company, Company.id == Contact.company_id)
+        .order_by(Contact.id)
+    )
+
+
+def _company_query():
+    return select(
+        Company.id,
+        Company.name,
+        Company.industry,
+        Company.website,
+        Company.email,
+        Company.phone,
+        Company.address,
+        Company.city,
+        Company.state,
+        Company.zip_code,
+        Company.country,
+        Company.description,
+        Company.created_at,
+        Company.updated_at,
+        Company.created_by,
+    ).order_by(Company.id)
+
+
+def _notice_query():
+    now = datetime.utcnow()
+    return (
+        select(
+            Notice.id,
+            Notice.title,
+            Notice.content,
+            Notice.priority,
+            Notice.created_at,
+            Notice.updated_at,
+            Notice.expires_at,
+            Notice.created_by,
+            User.username.label("created_by_username"),
+        )
+        .outerjoin(User, User.id == Notice.created_by)
+        .where(
+            Notice.is_active == True,
+            (Notice.expires_at.is_(None) | (Notice.expires_at > now)),
+        )
+        .order_by(Notice.id)
+    )
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Fold a content line into CRLF-terminated lines of at most 75 octets"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= _FOLD_AT:
+        return line + "\r\n"
+    parts, current, size, limit = [], [], 0, _FOLD_AT
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            parts.append("".join(current))
+            # Continuation lines start with a space, which counts too
+            current, size, limit = [], 0, _FOLD_AT - 1
+        current.append(char)
+        size += width
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _card(lines):
+    body = "".join(_fold(line) for line in lines if line)
+    return f"BEGIN:VCARD\r\nVERSION:3.0\r\n{body}END:VCARD\r\n"
+
+
+def _address(row):
+    parts = (row.address, row.city, row.state, row.zip_code, row.country)
+    if not any(parts):
+        return None
+    return "ADR;TYPE=WORK:;;" + ";".join(_escape(part or "") for part in parts)
+
+
+def _rev(row):
+    return f"REV:{row.updated_at.isoformat()}" if row.updated_at else None
+
+
+def _contact_card(row):
+    return _card(
+        [
+            f"N:{_escape(row.last_name)};{_escape(row.first_name)};;;",
+            f"FN:{_escape(f'{row.first_name} {row.last_name}')}",
+            row.company and f"ORG:{_escape(row.company)}",
+            row.email and f"EMAIL;TYPE=INTERNET:{_escape(row.email)}",
+            row.phone and f"TEL;TYPE=WORK,VOICE:{_escape(row.phone)}",
+            row.mobile and f"TEL;TYPE=CELL:{_escape(row.mobile)}",
+            _address(row),
+            row.notes and f"NOTE:{_escape(row.notes)}",
+            f"UID:phonebook-contact-{row.id}",
+            _rev(row),
+        ]
+    )
+
+
+def _company_card(row):
+    return _card(
+        [
+            f"N:{_escape(row.name)};;;;",
+            f"FN:{_escape(row.name)}",
+            f"ORG:{_escape(row.name)}",
+            "X-ABSHOWAS:COMPANY",
+            row.email and f"EMAIL;TYPE=INTERNET:{_escape(row.email)}",
+            row.phone and f"TEL;TYPE=WORK,VOICE:{_escape(row.phone)}",
+            row.website and f"URL:{_escape(row.website)}",
+            _address(row),
+            row.description and f"NOTE:{_escape(row.description)}",
+            f"UID:phonebook-company-{row.id}",
+            _rev(row),
+        ]
+    )
+
+
+# entity -> (query builder, vCard renderer or None)
+EXPORTS = {
+    "contacts": (_contact_query, _contact_card),
+    "companies": (_company_query, _company_card),
+    "notices": (_notice_query, None),
+}
+
+
+def check_format(entity, fmt):
+    """Validate ``fmt`` for ``entity`` and return it"""
+    if fmt not in FORMATS:
+        raise ExportFormatError("Unsupported format, use csv, ndjson or vcf")
+    if fmt == "vcf" and EXPORTS[entity][1] is None:
+        raise ExportFormatError(f"{entity} cannot be exported as vcf")
+    return fmt
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _batches(query):
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _csv_chunks(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    writer.writerow([column.name for column in query.selected_columns])
+    yield buffer.getvalue()
+    for rows in _batches(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(query):
+    dumps = current_app.json.dumps
+    names = [column.name for column in query.selected_columns]
+    for rows in _batches(query):
+        yield "".join(dumps(dict(zip(names, map(_plain, row)))) + "\n" for row in rows)
+
+
+def _vcard_chunks(query, render):
+    for rows in _batches(query):
+        yield "".join(render(row) for row in rows)
+
+
+def export_chunks(entity, fmt):
+    """Yield the export of ``entity`` in ``fmt`` as text chunks"""
+    build_query, render = EXPORTS[entity]
+    query = build_query()
+    if fmt == "csv":
+        return _csv_chunks(query)
+    if fmt == "ndjson":
+        return _ndjson_chunks(query)
+    return _vcard_chunks(query, render)
+
+
+def content_disposition(entity, fmt):
+    """Attachment header value naming the download after the entity"""
+    return f'attachment; filename="{entity}.{_EXTENSIONS[fmt]}"'
+
+
+def export_response(entity):
+    """Streaming response for ``GET /api/<entity>/export?format=``"""
+    fmt = check_format(entity, request.args.get("format", "csv").lower())
+    return current_app.response_class(
+        stream_with_context(export_chunks(entity, fmt)),
+        content_type=FORMATS[fmt],
+        headers={"Content-Disposition": content_disposition(entity, fmt)},
+    )
@@ -0,0 +1,214 @@
+"""
+Typo-tolerant contact search over a trigram index.
+
+Every contact's normalized first name, last name and company name are split
+into character trigrams. Each trigram maps to a sorted ``array('I')`` of
+contact ids. A query only touches the posting lists of its own trigrams:
+the shortest lists produce candidates, and the others are merely probed
+for those candidates with ``bisect``.
+
+Lists of common trigrams (frequent name fragments) grow with the table, so
+candidates are counted from at most ``MAX_SCANNED`` posting entries; lists
+that do not fit only confirm candidates found elsewhere. When none fits,
+the lowest ids of the shortest non-empty list are taken, so a query made
+only of very common trigrams gets a sample of its matches. Work per query is
+therefore bounded by the query length and ``MAX_SCANNED``, with bisect
+probes costing ``log`` of the list length.
+
+The index is built lazily per application and kept current by the contact
+handlers through ``contact_saved``/``contact_deleted``.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+
+from database import db
+from models import Company, Contact
+from normalization import normalize_text
+
+# Share of the query trigrams a contact must contain to be a candidate
+MIN_SIMILARITY = 0.3
+# Posting entries a query reads to find candidates
+MAX_SCANNED = 5000
+
+_EMPTY = array("I")
+_build_lock = threading.Lock()
+
+
+def trigrams(text):
+    """Return the set of padded word trigrams of normalized ``text``"""
+    grams = set()
+    for word in normalize_text(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _contains(postings, entry_id):
+    position = bisect_left(postings, entry_id)
+    return position < len(postings) and postings[position] == entry_id
+
+
+class TrigramIndex:
+    """Trigram -> sorted ``array('I')`` posting lists"""
+
+    def __init__(self, max_scanned=MAX_SCANNED):
+        self.max_scanned = max_scanned
+        self._postings = {}
+        self._texts = {}
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def load(self, entries):
+        """Replace the contents with ``(id, text)`` entries"""
+        postings = {}
+        texts = {}
+        sizes = {}
+        for entry_id, text in sorted(entries):
+            grams = trigrams(text)
+            texts[entry_id] = text
+            sizes[entry_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, array("I")).append(entry_id)
+
+        with self._lock:
+            self._postings = postings
+            self._texts = texts
+            self._sizes = sizes
+
+    def add(self, entry_id, text):
+        """Insert or replace one entry"""
+        grams = trigrams(text)
+        with self._lock:
+            self._remove(entry_id)
+            for gram in grams:
+                insort(self._postings.setdefault(gram, array("I")), entry_id)
+            self._texts[entry_id] = text
+            self._sizes[entry_id] = len(grams)
+
+    def remove(self, entry_id):
+        """Drop one entry if present"""
+        with self._lock:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id):
+        text = self._texts.pop(entry_id, None)
+        if text is None:
+            return
+        del self._sizes[entry_id]
+        for gram in trigrams(text):
+            postings = self._postings[gram]
+            del postings[bisect_left(postings, entry_id)]
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, query, limit=20, min_similarity=MIN_SIMILARITY):
+        """Return up to ``limit`` ``(id, similarity)`` pairs, best first, or
+        all of them when ``limit`` is None.
+
+        Similarity is the share of query trigrams found in the entry, with
+        ties broken by the Jaccard similarity of both trigram sets.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        needed = max(1, math.ceil(min_similarity * len(grams)))
+
+        with self._lock:
+            lists = sorted(
+                (self._postings.get(gram, _EMPTY) for gram in grams), key=len
+            )
+            # An entry missing from all of the first len - needed + 1 lists
+            # cannot reach ``needed`` shared trigrams. Of those, count the
+            # ones that fit the scan budget and probe the rest.
+            split = len(lists) - needed + 1
+            budget = self.max_scanned
+            counts = Counter()
+            probed = []
+            for position, postings in enumerate(lists):
+                if position < split and len(postings) <= budget:
+                    counts.update(postings)
+                    budget -= len(postings)
+                else:
+                    probed.append(postings)
+            if not counts:
+                # Only common (or unknown) trigrams: sample the shortest
+                # non-empty list
+                shortest = next((p for p in probed if p), None)
+                if shortest is not None:
+                    counts.update(shortest[: self.max_scanned])
+                    probed.remove(shortest)
+            for postings in probed:
+                for entry_id in counts:
+                    if _contains(postings, entry_id):
+                        counts[entry_id] += 1
+
+            scored = []
+            for entry_id, shared in counts.items():
+                if shared < needed:
+                    continue
+                jaccard = shared / (len(grams) + self._sizes[entry_id] - shared)
+                scored.append((shared / len(grams), jaccard, -entry_id))
+
+        scored.sort(reverse=True)
+        return [(-neg_id, score) for score, _, neg_id in scored[:limit]]
+
+
+def contact_text(first_name, last_name, company_name=None):
+    """Text indexed for a contact"""
+    return " ".join(part for part in (first_name, last_name, company_name) if part)
+
+
+def _contact_entries():
+    rows = db.session.execute(
+        select(
+            Contact.id, Contact.first_name, Contact.last_name, Company.name
+        ).outerjoin(Company, Company.id == Contact.company_id)
+    )
+    for contact_id, first_name, last_name, company_name in rows:
+        yield contact_id, contact_text(first_name, last_name, company_name)
+
+
+def _loaded_index():
+    return current_app.extensions.get("fuzzy")
+
+
+def get_index():
+    """Return the contacts trigram index, building it on first use"""
+    index = _loaded_index()
+    if index is None:
+        with _build_lock:
+            index = current_app.extensions.get("fuzzy")
+            if index is None:
+                index = TrigramIndex()
+                index.load(_contact_entries())
+                current_app.extensions["fuzzy"] = index
+    return index
+
+
+def fuzzy_search(query, limit=20):
+    """Return ``(contact_id, similarity)`` pairs for a raw user query"""
+    return get_index().search(query, limit)
+
+
+def contact_saved(contact_id, first_name, last_name, company_name=None):
+    """Update the index after a create or update"""
+    index = _loaded_index()
+    if index is not None:
+        index.add(contact_id, contact_text(first_name, last_name, company_name))
+
+
+def contact_deleted(contact_id):
+    """Update the index after a delete"""
+    index = _loaded_index()
+    if index is not None:
+        index.remove(contact_id)
@@ -0,0 +1,514 @@
+"""
+Bulk contact import from CSV, vCard 3/4 and Excel files.
+
+Files are parsed as a stream of rows, so memory does not grow with the file:
+only one batch of rows is held at a time. Each row is validated and
+normalized on its own. Bad rows are reported by line number and skipped,
+and good rows are inserted ``batch_size`` at a time, one transaction per
+batch through ``run_write``. Companies are matched by name through an
+in-memory map of search key to id, which is loaded once per import. Names
+that are not in the map are resolved or created inside the batch
+transaction.
+
+Excel files need the optional ``openpyxl`` package.
+"""
+
+import csv
+import io
+import re
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+import cache
+import fuzzy
+import suggest
+from database import db
+from models import Company, Contact
+from normalization import company_search_key, contact_search_key
+from phones import reversed_digits
+from writer import run_write
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+# Row errors kept for the report; later ones are only counted
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("csv", "vcf", "xlsx")
+_EXTENSIONS = {"csv": "csv", "txt": "csv", "vcf": "vcf", "vcard": "vcf", "xlsx": "xlsx"}
+
+IMPORT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "mobile",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "notes",
+)
+
+# Spreadsheet column headers accepted for each field
+_HEADER_ALIASES = {
+    "first_name": ("first", "firstname", "given_name", "given"),
+    "last_name": ("last", "lastname", "surname", "family_name", "family"),
+    "name": ("full_name", "fullname", "display_name"),
+    "email": ("e_mail", "email_address", "mail"),
+    "phone": ("telephone", "tel", "phone_number", "work_phone", "business_phone"),
+    "mobile": ("cell", "cellphone", "cell_phone", "mobile_phone", "mobile_number"),
+    "address": ("street", "street_address", "address_1"),
+    "state": ("province", "region"),
+    "zip_code": ("zip", "postal_code", "postcode", "post_code"),
+    "company": ("company_name", "organization", "organisation", "org", "employer"),
+}
+HEADERS = {
+    alias: field
+    for field, aliases in _HEADER_ALIASES.items()
+    for alias in (field,) + aliases
+}
+HEADERS.update({field: field for field in IMPORT_FIELDS})
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_HEADER_RE = re.compile(r"[^a-z0-9]+")
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file cannot be read in the requested format"""
+
+
+class RowError(ValueError):
+    """Raised by ``normalize_row`` for a row that cannot be imported"""
+
+
+def detect_format(filename, requested=None):
+    """Return the import format from an explicit choice or the file name"""
+    if requested:
+        requested = requested.lower()
+        fmt = _EXTENSIONS.get(requested, requested)
+    else:
+        extension = (filename or "").rsplit(".", 1)[-1].lower()
+        fmt = _EXTENSIONS.get(extension)
+    if fmt not in FORMATS:
+        raise ImportFormatError("Unsupported format, use csv, vcf or xlsx")
+    return fmt
+
+
+def header_field(name):
+    """Map a column header like "E-mail" or "Zip Code" to a field name"""
+    key = _HEADER_RE.sub("_", str(name or "").strip().lower()).strip("_")
+    return HEADERS.get(key)
+
+
+def _mapped(header, values):
+    """Build a row dict from a header mapping and one row of cell values"""
+    row = {}
+    for field, value in zip(header, values):
+        if field and value not in (None, "") and field not in row:
+            row[field] = value
+    return row
+
+
+def parse_csv(text):
+    """Yield ``(line, row)`` pairs from a text stream with a header line"""
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [header_field(name) for name in header]
+    if not any(header):
+        raise ImportFormatError("No known columns in the header row")
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, _mapped(header, values)
+
+
+def _cell_text(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value if isinstance(value, str) else str(value)
+
+
+def parse_xlsx(binary):
+    """Yield ``(row number, row)`` pairs from the first sheet of a workbook"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("Excel import requires the openpyxl package")
+
+    try:
+        workbook = load_workbook(binary, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFormatError("Not a valid .xlsx file")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [header_field(name) for name in header]
+        if not any(header):
+            raise ImportFormatError("No known columns in the header row")
+        for number, values in enumerate(rows, start=2):
+            values = [None if value is None else _cell_text(value) for value in values]
+            if any(value and value.strip() for value in values):
+                yield number, _mapped(header, values)
+    finally:
+        workbook.close()
+
+
+def _unfold(text):
+    """Yield ``(line number, logical line)`` with folded lines joined"""
+    current, start = None, 0
+    for number, line in enumerate(text, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, number
+    if current is not None:
+        yield start, current
+
+
+def _split_escaped(value, separator):
+    """Split a vCard value on unescaped ``separator`` and unescape the parts"""
+    parts, current, escaped = [], [], False
+    for char in value:
+        if escaped:
+            current.append("\n" if char in "nN" else char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == separator:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _unescape(value):
+    return _split_escaped(value, None)[0]
+
+
+def _property(line):
+    """Split a content line into ``(name, parameter tokens, value)``"""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    tokens = set()
+    for param in params:
+        key, _, param_value = param.partition("=")
+        # vCard 2.1 writes bare types (TEL;CELL), 3.0 and 4.0 use TYPE=
+        for token in (param_value or key).strip('"').split(","):
+            tokens.add(token.strip().lower())
+    return name.rsplit(".", 1)[-1].upper(), tokens, value
+
+
+def _card_row(card):
+    row = {}
+    for name, tokens, value in card:
+        if name == "N":
+            parts = _split_escaped(value, ";") + ["", ""]
+            row.setdefault("last_name", parts[0])
+            row.setdefault("first_name", parts[1])
+        elif name == "FN":
+            row.setdefault("name", _unescape(value))
+        elif name == "EMAIL":
+            row.setdefault("email", _unescape(value))
+        elif name == "TEL":
+            number = value[4:] if value.lower().startswith("tel:") else value
+            row.setdefault("mobile" if "cell" in tokens else "phone", number)
+        elif name == "ADR":
+            parts = _split_escaped(value, ";") + [""] * 7
+            row.setdefault("address", " ".join(p for p in parts[:3] if p).strip())
+            row.setdefault("city", parts[3])
+            row.setdefault("state", parts[4])
+            row.setdefault("zip_code", parts[5])
+            row.setdefault("country", parts[6])
+        elif name == "ORG":
+            row.setdefault("company", _split_escaped(value, ";")[0])
+        elif name == "NOTE":
+            row.setdefault("notes", _unescape(value))
+    return {field: value for field, value in row.items() if value}
+
+
+def parse_vcard(text):
+    """Yield ``(line, row)`` pairs, one per card in a vCard stream"""
+    card, start = None, 0
+    for number, line in _unfold(text):
+        if not line.strip():
+            continue
+        upper = line.upper()
+        if upper == "BEGIN:VCARD":
+            card, start = [], number
+        elif upper == "END:VCARD":
+            if card is not None:
+                yield start, _card_row(card)
+            card = None
+        elif card is not None and ":" in line:
+            card.append(_property(line))
+
+
+def _max_length(column):
+    return getattr(column.type, "length", None)
+
+
+FIELD_LENGTHS = {
+    field: _max_length(Contact.__table__.c[field]) for field in IMPORT_FIELDS
+}
+COMPANY_NAME_LENGTH = _max_length(Company.__table__.c.name)
+
+
+def normalize_row(raw):
+    """Validate one parsed row; return ``(contact fields, company name)``"""
+    row = {
+        key: " ".join(str(value).split()) if key != "notes" else str(value).strip()
+        for key, value in raw.items()
+        if value is not None
+    }
+
+    if not row.get("first_name") and not row.get("last_name") and row.get("name"):
+        first, _, last = row["name"].rpartition(" ")
+        row["first_name"], row["last_name"] = (first, last) if first else (last, "")
+    if not row.get("first_name") or not row.get("last_name"):
+        raise RowError("First name and last name required")
+
+    fields = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field) or None
+        length = FIELD_LENGTHS[field]
+        if value and length and len(value) > length:
+            raise RowError(f"{field} is longer than {length} characters")
+        fields[field] = value
+
+    if fields["email"]:
+        fields["email"] = fields["email"].lower()
+        if not _EMAIL_RE.match(fields["email"]):
+            raise RowError("Invalid email address")
+    for field in ("phone", "mobile"):
+        if fields[field] and not reversed_digits(fields[field]):
+            raise RowError(f"Invalid {field} number")
+
+    company = row.get("company") or None
+    if company and len(company) > COMPANY_NAME_LENGTH:
+        raise RowError(f"company is longer than {COMPANY_NAME_LENGTH} characters")
+    return fields, company
+
+
+class ImportResult:
+    """Running totals and row errors of one import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.companies_created = 0
+        self.batches = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def progress(self):
+        """Counters without the error list"""
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "companies_created": self.companies_created,
+            "batches": self.batches,
+        }
+
+    def to_dict(self):
+        result = self.progress()
+        result["errors"] = self.errors
+        result["errors_truncated"] = self.failed > len(self.errors)
+        return result
+
+
+class _IdsNotConsecutive(RuntimeError):
+    """A multi-row insert returned ids that cannot be matched to its rows"""
+
+
+def _consecutive(ids, count):
+    return len(ids) == count and (not ids or ids[-1] - ids[0] == count - 1)
+
+
+def _insert_contacts(values, ordered):
+    """Insert contact rows and return their ids in row order.
+
+    ``sort_by_parameter_order`` would make SQLAlchemy send one INSERT per
+    row on SQLite, so unless ``ordered`` is set, the rows go in one
+    statement. The first INSERT takes SQLite's write lock, held until
+    commit, and each new rowid is one more than the largest, so the ids are
+    consecutive in row order. Otherwise ``_IdsNotConsecutive`` is raised
+    and the caller retries the batch with ``ordered``.
+    """
+    if ordered:
+        statement = insert(Contact).returning(Contact.id, sort_by_parameter_order=True)
+        return db.session.scalars(statement, values).all()
+    ids = sorted(db.session.scalars(insert(Contact).returning(Contact.id), values))
+    if not _consecutive(ids, len(values)):
+        raise _IdsNotConsecutive("Inserted contact ids are not consecutive")
+    return ids
+
+
+def _import_batch_job(contacts, new_companies, user_id, ordered=False):
+    """Insert one batch of contacts; runs through ``run_write``.
+
+    ``new_companies`` maps company search keys missing from the importer's
+    map to a display name. Those are looked up again here, inside the write
+    transaction, and created if they still do not exist. ``ordered`` inserts
+    the contacts one statement per row, see ``_insert_contacts``.
+    """
+    company_ids, created = {}, []
+    if new_companies:
+        company_ids.update(
+            db.session.execute(
+                select(Company.search_key, Company.id).where(
+                    Company.search_key.in_(list(new_companies))
+                )
+            ).all()
+        )
+        missing = [key for key in new_companies if key not in company_ids]
+        if missing:
+            now = datetime.utcnow()
+            # Rows come back in any order; the search key identifies them
+            rows = db.session.execute(
+                insert(Company).returning(Company.search_key, Company.id),
+                [
+                    {
+                        "name": new_companies[key],
+                        "search_key": key,
+                        "created_at": now,
+                        "updated_at": now,
+                        "created_by": user_id,
+                    }
+                    for key in missing
+                ],
+            ).all()
+            company_ids.update(rows)
+            created = [(company_id, new_companies[key]) for key, company_id in rows]
+
+    now = datetime.utcnow()
+    values = []
+    for fields, company_key, company_id in contacts:
+        row = dict(fields)
+        row["company_id"] = company_ids.get(company_key, company_id)
+        row["phone_rev"] = reversed_digits(fields["phone"])
+        row["mobile_rev"] = reversed_digits(fields["mobile"])
+        row["search_key"] = contact_search_key(
+            fields["first_name"],
+            fields["last_name"],
+            fields["email"],
+            fields["phone"],
+            fields["mobile"],
+            fields["city"],
+        )
+        row["created_at"] = row["updated_at"] = now
+        row["created_by"] = user_id
+        values.append(row)
+    ids = _insert_contacts(values, ordered)
+    return {"ids": ids, "companies": company_ids, "created_companies": created}
+
+
+class ContactImporter:
+    """Imports parsed rows for one user, ``batch_size`` rows per transaction"""
+
+    def __init__(self, user_id, batch_size=DEFAULT_BATCH_SIZE):
+        self.user_id = user_id
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.result = ImportResult()
+        self.companies = dict(
+            db.session.execute(select(Company.search_key, Company.id)).all()
+        )
+
+    def run(self, rows):
+        """Import ``(line, row)`` pairs; yield the result after every batch"""
+        batch = []
+        for line, raw in rows:
+            self.result.rows += 1
+            try:
+                fields, company = normalize_row(raw)
+            except RowError as exc:
+                self.result.add_error(line, str(exc))
+                continue
+            batch.append((fields, company))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+                yield self.result
+        if batch:
+            self._flush(batch)
+        yield self.result
+
+    def _flush(self, batch):
+        contacts, new_companies = [], {}
+        for fields, company in batch:
+            key = company_search_key(company) if company else None
+            if key and key not in self.companies:
+                new_companies.setdefault(key, company)
+            contacts.append((fields, key, self.companies.get(key)))
+
+        job = (_import_batch_job, contacts, new_companies, self.user_id)
+        try:
+            saved = run_write(*job)
+        except _IdsNotConsecutive:
+            # The batch was rolled back; insert it again row by row
+            db.session.rollback()
+            saved = run_write(*job, ordered=True)
+        cache.tables_changed({"contact", "company"} if new_companies else {"contact"})
+
+        self.companies.update(saved["companies"])
+        self.result.companies_created += len(saved["created_companies"])
+        self.result.imported += len(saved["ids"])
+        self.result.batches += 1
+
+        names = {company_id: name for company_id, name in saved["created_companies"]}
+        for company_id, name in names.items():
+            suggest.company_saved(company_id, name)
+        for contact_id, (fields, company) in zip(saved["ids"], batch):
+            suggest.contact_saved(contact_id, fields["first_name"], fields["last_name"])
+            fuzzy.contact_saved(
+                contact_id, fields["first_name"], fields["last_name"], company
+            )
+
+
+def _checked(rows, encoding):
+    try:
+        yield from rows
+    except UnicodeDecodeError:
+        raise ImportFormatError(f"File is not valid {encoding} text")
+    except csv.Error as exc:
+        raise ImportFormatError(f"Malformed CSV: {exc}")
+
+
+def open_rows(stream, fmt, encoding="utf-8-sig"):
+    """Return the ``(line, row)`` iterator for a binary ``stream``"""
+    if fmt == "xlsx":
+        return parse_xlsx(stream)
+    try:
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    except LookupError:
+        raise ImportFormatError(f"Unknown encoding {encoding}")
+    rows = parse_csv(text) if fmt == "csv" else parse_vcard(text)
+    return _checked(rows, encoding)
+
+
+def import_contacts(rows, user_id, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Import ``(line, row)`` pairs and return the ``ImportResult``.
+
+    ``progress(result)`` is called after every committed batch.
+    """
+    importer = ContactImporter(user_id, batch_size)
+    for result in importer.run(rows):
+        if progress is not None:
+            progress(result)
+    return importer.result
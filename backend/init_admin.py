@@ -8,7 +8,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import create_app
+from app import create_app, init_db
 from database import db
 from models import User
 
@@ -18,8 +18,8 @@ def init_admin_user():
     app = create_app()
 
     with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
+        # Create or upgrade the schema
+        init_db(app)
 
         # Check if any admin user exists
         admin_count = User.query.filter_by(role="admin").count()
@@ -0,0 +1,195 @@
+"""
+Per-request SQL instrumentation.
+
+Every statement executed while an app context is active is counted on
+``flask.g``. In debug and testing mode the count is returned in the
+``X-Query-Count`` response header so tests can assert that an endpoint runs a
+constant number of queries.
+
+With ``SERVER_TIMING`` enabled, statements and JSON encoding are also timed
+and each response carries a ``Server-Timing`` header with the database time,
+query count, serialization time and total time of the request. With
+``SLOW_QUERY_MS`` set, statements at least that slow are logged to the
+``phonebook.slow_query`` logger with their parameter shape and
+``EXPLAIN QUERY PLAN``. Both can also be set through the
+``PHONEBOOK_SERVER_TIMING`` and ``PHONEBOOK_SLOW_QUERY_MS`` environment
+variables. When neither is enabled no timing listeners are installed.
+"""
+
+import logging
+import os
+import time
+
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+slow_query_log = logging.getLogger("phonebook.slow_query")
+
+# Statements worth an EXPLAIN QUERY PLAN in the slow-query log
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_timers_installed = False
+
+
+class RequestTiming:
+    """Time spent in the database and JSON encoding during one request"""
+
+    __slots__ = ("start", "db_time", "json_time", "slow_query_s")
+
+    def __init__(self, slow_query_s=None):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.json_time = 0.0
+        self.slow_query_s = slow_query_s
+
+    def header(self, queries):
+        """Format the ``Server-Timing`` header value"""
+        total = time.perf_counter() - self.start
+        return (
+            f'db;desc="{queries} queries";dur={self.db_time * 1000:.2f}, '
+            f"json;dur={self.json_time * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+
+class TimedJSONMixin:
+    """JSON provider mixin adding ``dumps`` time to the request timing"""
+
+    def dumps(self, obj, **kwargs):
+        timing = g.get("timing") if has_app_context() else None
+        if timing is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            timing.json_time += time.perf_counter() - start
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and "timing" in g:
+        conn.info["query_start"] = time.perf_counter()
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context() or "timing" not in g:
+        return
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    timing = g.timing
+    timing.db_time += elapsed
+    if timing.slow_query_s is not None and elapsed >= timing.slow_query_s:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+def _install_timers():
+    global _timers_installed
+    if not _timers_installed:
+        event.listen(Engine, "before_cursor_execute", _start_timer)
+        event.listen(Engine, "after_cursor_execute", _stop_timer)
+        _timers_installed = True
+
+
+def parameter_shape(parameters, executemany=False):
+    """Describe bound parameters by type only, so no values reach the log"""
+    if executemany:
+        rows = list(parameters)
+        first = parameter_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        types = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in parameters.items()
+        )
+        return "{" + types + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+def explain_query_plan(conn, statement, parameters):
+    """Return SQLite's query plan for ``statement`` as text lines"""
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(conn, statement, parameters, executemany, elapsed):
+    plan = None
+    if (
+        not executemany
+        and conn.dialect.name == "sqlite"
+        and statement.lstrip().upper().startswith(_EXPLAINABLE)
+    ):
+        try:
+            plan = explain_query_plan(conn, statement, parameters)
+        except Exception:
+            plan = None
+
+    slow_query_log.warning(
+        "Slow query (%.1f ms): %s\nParameters: %s\nQuery plan:\n%s",
+        elapsed * 1000,
+        statement,
+        parameter_shape(parameters, executemany),
+        "\n".join(f"  {line}" for line in plan) if plan else "  (not available)",
+    )
+
+
+def query_count():
+    """Return the number of SQL statements run in the current app context"""
+    return g.get("query_count", 0)
+
+
+def server_timing_settings(config, environ=os.environ):
+    """Return ``(enabled, slow_query_ms)`` from config and environment"""
+    enabled = environ.get("PHONEBOOK_SERVER_TIMING")
+    if enabled is None:
+        enabled = bool(config.get("SERVER_TIMING", False))
+    else:
+        enabled = enabled.lower() in ("1", "true", "yes", "on")
+
+    slow_query_ms = environ.get("PHONEBOOK_SLOW_QUERY_MS")
+    if slow_query_ms is None:
+        slow_query_ms = config.get("SLOW_QUERY_MS")
+    return enabled, None if slow_query_ms is None else float(slow_query_ms)
+
+
+def init_app(app):
+    """Register the request hooks on ``app``"""
+    timing_enabled, slow_query_ms = server_timing_settings(app.config)
+    timed = timing_enabled or slow_query_ms is not None
+    slow_query_s = None if slow_query_ms is None else slow_query_ms / 1000
+
+    if timed:
+        _install_timers()
+    if timing_enabled:
+        provider_class = type(app.json)
+        app.json = type(
+            f"Timed{provider_class.__name__}", (TimedJSONMixin, provider_class), {}
+        )(app)
+
+    @app.before_request
+    def reset_query_count():
+        g.query_count = 0
+        if timed:
+            g.timing = RequestTiming(slow_query_s)
+
+    @app.after_request
+    def add_query_count_header(response):
+        if app.debug or app.testing:
+            response.headers[QUERY_COUNT_HEADER] = str(query_count())
+        if timing_enabled:
+            response.headers[SERVER_TIMING_HEADER] = g.timing.header(query_count())
+        return response
@@ -0,0 +1,523 @@
+"""
+Prometheus metrics served from the app at ``/metrics``.
+
+Counters and histograms keep one value shard per thread; shards are summed
+when the metrics are scraped. A thread takes a metric's lock only the first
+time it records into it, to register its shard, and once ``_MAX_SHARDS``
+shards exist that registration also folds the shards of finished threads
+into a retired total. Long-lived worker threads therefore record without a
+lock. A server that starts a thread per request, like the threaded
+development server, takes each metric's lock once per request.
+
+With several worker processes, set ``METRICS_DIR`` (or
+``PHONEBOOK_METRICS_DIR``) to a directory shared by the workers. Each process
+then writes a snapshot there every ``METRICS_FLUSH_INTERVAL`` seconds, and a
+scrape of any worker sums the counters and histograms of all snapshots.
+Per-process gauges (RSS, pool state) get a ``pid`` label and are only
+reported for processes that are still running. The counters and histograms
+of an exited process are adopted into the snapshot of the live worker whose
+scrape finds it, and its file is deleted, so totals never go backwards and
+snapshot files do not pile up.
+
+Disable the endpoint and request recording with ``METRICS = False``.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+from flask import g, request
+
+from database import db
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_FLUSH_INTERVAL = 5
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Dead threads are folded into the retired total once this many shards exist
+_MAX_SHARDS = 256
+
+REGISTRY = []
+
+
+class _ThreadShardedMetric:
+    """Base for metrics whose values live in per-thread dicts"""
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self):
+        """Return this thread's values, registering them on first use"""
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                if len(self._shards) >= _MAX_SHARDS:
+                    self._retire_dead()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def _retire_dead(self):
+        live = []
+        for ref, shard in self._shards:
+            thread = ref()
+            if thread is None or not thread.is_alive():
+                self._merge(self._retired, shard)
+            else:
+                live.append((ref, shard))
+        self._shards = live
+
+    def collect(self):
+        """Return ``{labels: value}`` summed over all threads"""
+        with self._lock:
+            self._retire_dead()
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, shard in self._shards:
+                self._merge(totals, shard)
+        return totals
+
+    def _merge(self, into, values):
+        raise NotImplementedError
+
+
+class Counter(_ThreadShardedMetric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, into, values):
+        # list() copies in one step, so a writer adding a key cannot break it
+        for labels, value in list(values.items()):
+            into[labels] = into.get(labels, 0) + value
+
+
+class Histogram(_ThreadShardedMetric):
+    """Values are per-bucket counts (the last bucket is +Inf) plus the sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, into, values):
+        for labels, counts in list(values.items()):
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(counts)
+            else:
+                for i, count in enumerate(counts):
+                    total[i] += count
+
+
+REQUESTS = Counter(
+    "phonebook_http_requests_total",
+    "HTTP requests by endpoint, method and status",
+    ("endpoint", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "phonebook_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("endpoint",),
+)
+PASSWORD_CHECK_SECONDS = Histogram(
+    "phonebook_password_check_seconds",
+    "Time spent verifying bcrypt password hashes",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0),
+)
+CACHE_REQUESTS = Counter(
+    "phonebook_cache_requests_total",
+    "In-process cache lookups by cache and result",
+    ("cache", "result"),
+)
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (field, ctypes.c_size_t)
+                for field in (
+                    "PeakWorkingSetSize",
+                    "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage",
+                    "PagefileUsage",
+                    "PeakPagefileUsage",
+                )
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+            process, ctypes.byref(counters), counters.cb
+        ):
+            return counters.WorkingSetSize
+        return None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _gauges(app):
+    """Per-process gauges as ``{name: (help, {labels: value})}``"""
+    gauges = {}
+    rss = process_rss()
+    if rss is not None:
+        gauges["phonebook_process_resident_memory_bytes"] = (
+            "Resident memory of the worker process",
+            {(): rss},
+        )
+
+    with app.app_context():
+        pool = db.engine.pool
+    for name, method, help in (
+        ("phonebook_db_pool_size", "size", "Configured connection pool size"),
+        ("phonebook_db_pool_checked_out", "checkedout", "Connections in use"),
+        ("phonebook_db_pool_overflow", "overflow", "Connections above pool size"),
+    ):
+        if hasattr(pool, method):
+            gauges[name] = (help, {(): getattr(pool, method)()})
+    return gauges
+
+
+def snapshot(app):
+    """Collect this process's metrics into a JSON-serializable dict"""
+    families = {}
+    for metric in REGISTRY:
+        family = {
+            "type": metric.kind,
+            "help": metric.help,
+            "labelnames": list(metric.labelnames),
+            "samples": [
+                [list(labels), value] for labels, value in metric.collect().items()
+            ],
+        }
+        if metric.kind == "histogram":
+            family["buckets"] = list(metric.buckets)
+        families[metric.name] = family
+
+    for name, (help, samples) in _gauges(app).items():
+        families[name] = {
+            "type": "gauge",
+            "help": help,
+            "labelnames": [],
+            "samples": [[list(labels), value] for labels, value in samples.items()],
+        }
+    return {"pid": os.getpid(), "families": families}
+
+
+def _pid_alive(pid):
+    """Whether process ``pid`` is running; the process is never signalled"""
+    if sys.platform == "win32":
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows
+        import ctypes
+        from ctypes import wintypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        ERROR_ACCESS_DENIED = 5
+        STILL_ACTIVE = 259
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+        kernel32.GetExitCodeProcess.argtypes = (
+            wintypes.HANDLE,
+            ctypes.POINTER(wintypes.DWORD),
+        )
+        kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            code = wintypes.DWORD()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # EPERM: the process exists but belongs to someone else
+        return True
+    return True
+
+
+def _fold(into, families):
+    """Add the counter and histogram samples of ``families`` to ``into``"""
+    for name, family in families.items():
+        if family["type"] == "gauge":
+            continue
+        target = into.setdefault(name, {**family, "samples": []})
+        samples = {tuple(labels): value for labels, value in target["samples"]}
+        for labels, value in family["samples"]:
+            key = tuple(labels)
+            total = samples.get(key)
+            if total is None:
+                samples[key] = value
+            elif family["type"] == "histogram":
+                samples[key] = [a + b for a, b in zip(total, value)]
+            else:
+                samples[key] = total + value
+        target["samples"] = [[list(key), value] for key, value in samples.items()]
+
+
+def merge_snapshots(snapshots):
+    """Sum counters and histograms over processes; label gauges by pid"""
+    merged = {}
+    multiprocess = len(snapshots) > 1
+    for snap in snapshots:
+        for name, family in snap["families"].items():
+            target = merged.setdefault(
+                name,
+                {**family, "samples": {}, "labelnames": list(family["labelnames"])},
+            )
+            is_gauge = family["type"] == "gauge"
+            if is_gauge and multiprocess:
+                if "pid" not in target["labelnames"]:
+                    target["labelnames"].append("pid")
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                if is_gauge:
+                    if multiprocess:
+                        key += (str(snap["pid"]),)
+                    target["samples"][key] = value
+                elif family["type"] == "histogram":
+                    total = target["samples"].get(key)
+                    if total is None:
+                        target["samples"][key] = list(value)
+                    else:
+                        for i, count in enumerate(value):
+                            total[i] += count
+                else:
+                    target["samples"][key] = target["samples"].get(key, 0) + value
+    _add_cache_hit_ratios(merged)
+    return merged
+
+
+def _add_cache_hit_ratios(merged):
+    requests = merged.get(CACHE_REQUESTS.name)
+    if not requests:
+        return
+    totals = {}
+    for (cache, result), count in requests["samples"].items():
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == "hit" else 0), lookups + count)
+    merged["phonebook_cache_hit_ratio"] = {
+        "type": "gauge",
+        "help": "Share of cache lookups that were hits",
+        "labelnames": ["cache"],
+        "samples": {
+            (cache,): hits / lookups for cache, (hits, lookups) in totals.items()
+        },
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(merged):
+    """Format merged metric families in the Prometheus text format"""
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        names = family["labelnames"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in sorted(family["samples"].items()):
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            bounds = list(family["buckets"]) + [float("inf")]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class SnapshotWriter:
+    """Periodically writes this process's snapshot to the shared directory"""
+
+    def __init__(self, app, directory, interval):
+        self.app = app
+        self.directory = directory
+        self.interval = interval
+        # The start time keeps a recycled pid from overwriting older totals
+        self.path = os.path.join(
+            directory, f"metrics-{os.getpid()}-{time.time_ns()}.json"
+        )
+        self._started = False
+        self._lock = threading.Lock()
+        # Counters and histograms adopted from exited processes
+        self._adopted = {}
+        self._adopted_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(
+                target=self._run, name="phonebook-metrics", daemon=True
+            ).start()
+            atexit.register(self.write)
+            self._started = True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.write()
+
+    def snapshot(self):
+        """This process's snapshot, including the adopted totals"""
+        snap = snapshot(self.app)
+        with self._adopted_lock:
+            _fold(snap["families"], self._adopted)
+        return snap
+
+    def write(self, snap=None):
+        snap = snap or self.snapshot()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as out:
+            json.dump(snap, out)
+        os.replace(tmp_path, self.path)
+
+    def collect(self):
+        """Return every process's snapshot, with live data for this one.
+
+        Snapshots of exited processes are adopted: renaming the file claims
+        it, so only one worker adds its totals to its own snapshot, and the
+        file is deleted once that snapshot is written.
+        """
+        snapshots, claimed = [], []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            if path == self.path:
+                continue
+            try:
+                with open(path) as src:
+                    snap = json.load(src)
+            except (OSError, ValueError):
+                continue
+            if _pid_alive(snap["pid"]):
+                snapshots.append(snap)
+                continue
+            try:
+                os.rename(path, f"{path}.adopted")
+            except OSError:
+                # Another worker adopted it first
+                continue
+            with self._adopted_lock:
+                _fold(self._adopted, snap["families"])
+            claimed.append(f"{path}.adopted")
+
+        own = self.snapshot()
+        self.write(own)
+        for path in claimed:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return [own] + snapshots
+
+
+def init_app(app):
+    """Record request metrics for ``app`` and serve them at ``/metrics``"""
+    if not app.config.get("METRICS", True):
+        return
+
+    directory = os.environ.get("PHONEBOOK_METRICS_DIR", app.config.get("METRICS_DIR"))
+    writer = None
+    if directory:
+        interval = app.config.get("METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+        writer = SnapshotWriter(app, directory, interval)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        if writer is not None:
+            writer.ensure_started()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            endpoint = request.endpoint or "unmatched"
+            REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint)
+            REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    def metrics_view():
+        snapshots = writer.collect() if writer else [snapshot(app)]
+        body = render(merge_snapshots(snapshots))
+        return app.response_class(body, content_type=CONTENT_TYPE)
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
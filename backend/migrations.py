@@ -0,0 +1,176 @@
+"""
+Versioned schema migrations.
+
+``schema_version`` records which numbered migrations a database has had, and
+``upgrade`` applies the missing ones in order. Register a step with
+``@migration(version, name)``; it receives the connection and must only add
+things (tables, columns, indexes) so that running code keeps working.
+
+New columns and indexes are declared on the models as usual, so fresh
+databases get them from the baseline ``create_all``. The migration then
+brings existing databases up to the same schema. Steps work from
+``db.metadata``, so callers import every module that declares tables
+(models, search, sync, dedupe) before upgrading, as app.py and the
+``__main__`` block below do.
+
+Upgrade any database file, e.g. the packaged one, with:
+    python migrations.py ../dist/instance/phonebook.db
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    insert,
+    select,
+)
+
+from database import db
+
+schema_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# (version, name, step) in version order
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Decorator registering ``step(connection)`` as migration ``version``"""
+
+    def decorator(step):
+        if any(existing == version for existing, _, _ in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, name, step))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return step
+
+    return decorator
+
+
+def create_indexes(connection, *names):
+    """Create the model-declared indexes called ``names`` if missing"""
+    indexes = {
+        index.name: index
+        for table in db.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def current_version(connection):
+    """Return the highest applied migration, 0 for an unversioned database"""
+    return connection.scalar(
+        select(func.coalesce(func.max(schema_version.c.version), 0))
+    )
+
+
+def upgrade(engine):
+    """Apply pending migrations in one transaction; return their versions"""
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # Take the write lock before reading the version, so workers
+            # starting together do not apply the same migration twice
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        schema_metadata.create_all(connection)
+        version = current_version(connection)
+
+        applied = []
+        for number, name, step in MIGRATIONS:
+            if number <= version:
+                continue
+            step(connection)
+            connection.execute(
+                insert(schema_version).values(
+                    version=number, name=name, applied_at=datetime.utcnow()
+                )
+            )
+            applied.append(number)
+
+        connection.commit()
+    return applied
+
+
+@migration(1, "baseline schema")
+def _baseline(connection):
+    """Create missing tables. Databases from before versioning also get
+    their missing columns, indexes and backfills from the ``after_create``
+    listeners."""
+    db.metadata.create_all(connection)
+
+
+@migration(2, "indexes for hot queries")
+def _hot_query_indexes(connection):
+    """Index the filter, ownership and ordering columns of the list queries"""
+    create_indexes(
+        connection,
+        "ix_contact_email",
+        "ix_contact_created_by",
+        "ix_contact_updated_at",
+        "ix_company_created_by",
+        "ix_company_updated_at",
+        "ix_notice_created_at",
+        "ix_notice_created_by",
+        "ix_notice_expires_at",
+        "ix_notice_updated_at",
+        "ix_user_role",
+    )
+
+
+@migration(3, "change tracking for sync")
+def _change_tracking(connection):
+    """Add ``change_seq`` columns, the counter and tombstone tables and the
+    sync triggers; existing rows are numbered in id order"""
+    db.metadata.create_all(connection)
+
+
+@migration(4, "tombstone entity index")
+def _tombstone_entity_index(connection):
+    """Index tombstones by entity for per-table versions"""
+    create_indexes(connection, "ix_tombstone_entity_seq")
+
+
+@migration(5, "duplicate pairs")
+def _duplicate_pairs(connection):
+    """Add the table of duplicate contacts found by scans"""
+    db.metadata.create_all(connection)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from sqlalchemy import create_engine
+
+    import models  # noqa: F401  (registers the tables)
+    import search  # noqa: F401  (registers the FTS table and triggers)
+    import sync  # noqa: F401  (registers the change tracking tables and triggers)
+    import dedupe  # noqa: F401  (registers the duplicate pair table)
+    from database import install_sqlite_pragmas, sqlite_pragmas
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: python migrations.py <database file or URL>")
+
+    target = sys.argv[1]
+    url = target if "://" in target else f"sqlite:///{os.path.abspath(target)}"
+    engine = create_engine(url)
+    install_sqlite_pragmas(engine, sqlite_pragmas({}))
+
+    applied = upgrade(engine)
+    with engine.connect() as connection:
+        version = current_version(connection)
+    print(f"Applied migrations: {applied or 'none'}; schema version {version}")
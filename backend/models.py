@@ -1,5 +1,11 @@
 from database import db
 from datetime import datetime
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import validates
+from phones import reversed_digits
+from normalization import company_search_key, contact_search_key
+from metrics import PASSWORD_CHECK_SECONDS
 import bcrypt
 
 
@@ -10,7 +16,9 @@ class User(db.Model):
     first_name = db.Column(db.String(50), nullable=True)
     last_name = db.Column(db.String(50), nullable=True)
     password_hash = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.Enum("admin", "editor", "user"), nullable=False, default="user")
+    role = db.Column(
+        db.Enum("admin", "editor", "user"), nullable=False, default="user", index=True
+    )
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -28,9 +36,13 @@ class User(db.Model):
         ).decode("utf-8")
 
     def check_password(self, password):
-        return bcrypt.checkpw(
-            password.encode("utf-8"), self.password_hash.encode("utf-8")
-        )
+        start = time.perf_counter()
+        try:
+            return bcrypt.checkpw(
+                password.encode("utf-8"), self.password_hash.encode("utf-8")
+            )
+        finally:
+            PASSWORD_CHECK_SECONDS.observe(time.perf_counter() - start)
 
     def to_dict(self):
         return {
@@ -44,24 +56,53 @@ class User(db.Model):
 
 
 class Contact(db.Model):
+    __table_args__ = (
+        # Serves the (last_name, first_name, id) keyset pagination order
+        db.Index("ix_contact_name_order", "last_name", "first_name", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
-    email = db.Column(db.String(100))
+    email = db.Column(db.String(100), index=True)
     phone = db.Column(db.String(20))
     mobile = db.Column(db.String(20))
+    # Normalized digits stored reversed, for caller-ID suffix lookups
+    phone_rev = db.Column(db.String(20), index=True)
+    mobile_rev = db.Column(db.String(20), index=True)
+    # Normalized names, email, phones and city; filled on every write
+    search_key = db.Column(db.String(400), index=True)
     address = db.Column(db.Text)
     city = db.Column(db.String(50))
     state = db.Column(db.String(50))
     zip_code = db.Column(db.String(10))
     country = db.Column(db.String(50))
-    company_id = db.Column(db.Integer, db.ForeignKey("company.id"))
+    company_id = db.Column(db.Integer, db.ForeignKey("company.id"), index=True)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
+    created_by = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
     )
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Position in the change sequence; set by triggers (sync.py)
+    change_seq = db.Column(db.Integer, index=True)
+
+    @validates("phone", "mobile")
+    def _set_phone_rev(self, key, value):
+        setattr(self, f"{key}_rev", reversed_digits(value))
+        return value
+
+    def build_search_key(self):
+        return contact_search_key(
+            self.first_name,
+            self.last_name,
+            self.email,
+            self.phone,
+            self.mobile,
+            self.city,
+        )
 
     def to_dict(self):
         return {
@@ -83,28 +124,68 @@ class Contact(db.Model):
         }
 
 
+# Keys of Contact.to_dict(), all plain columns. List endpoints select these
+# and render the rows with serialization.row_dicts instead.
+CONTACT_DICT_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "mobile",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "company_id",
+    "notes",
+    "created_at",
+    "created_by",
+)
+
+
 class Company(db.Model):
+    __table_args__ = (
+        # Serves the (created_at, id) sort order of the companies listing
+        db.Index("ix_company_created_order", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
-    industry = db.Column(db.String(50))
+    search_key = db.Column(db.String(100), index=True)
+    industry = db.Column(db.String(50), index=True)
     website = db.Column(db.String(100))
     email = db.Column(db.String(100))
     phone = db.Column(db.String(20))
+    phone_rev = db.Column(db.String(20), index=True)
     address = db.Column(db.Text)
-    city = db.Column(db.String(50))
+    city = db.Column(db.String(50), index=True)
     state = db.Column(db.String(50))
     zip_code = db.Column(db.String(10))
     country = db.Column(db.String(50))
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
+    created_by = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
     )
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # See Contact.change_seq
+    change_seq = db.Column(db.Integer, index=True)
 
     # Relationships
     contacts = db.relationship("Contact", backref="company", lazy=True)
 
+    @validates("phone")
+    def _set_phone_rev(self, key, value):
+        self.phone_rev = reversed_digits(value)
+        return value
+
+    def build_search_key(self):
+        return company_search_key(self.name)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -124,18 +205,41 @@ class Company(db.Model):
         }
 
 
+# Keys of Company.to_dict(), as CONTACT_DICT_FIELDS
+COMPANY_DICT_FIELDS = (
+    "id",
+    "name",
+    "industry",
+    "website",
+    "email",
+    "phone",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "description",
+    "created_at",
+    "created_by",
+)
+
+
 class Notice(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     priority = db.Column(db.Enum("low", "medium", "high"), default="medium")
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
     )
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    expires_at = db.Column(db.DateTime)
+    created_by = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
+    )
+    expires_at = db.Column(db.DateTime, index=True)
+    # See Contact.change_seq
+    change_seq = db.Column(db.Integer, index=True)
 
     def to_dict(self):
         return {
@@ -148,3 +252,11 @@ class Notice(db.Model):
             "created_by": self.created_by,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None,
         }
+
+
+@event.listens_for(Contact, "before_insert")
+@event.listens_for(Contact, "before_update")
+@event.listens_for(Company, "before_insert")
+@event.listens_for(Company, "before_update")
+def _set_search_key(mapper, connection, target):
+    target.search_key = target.build_search_key()
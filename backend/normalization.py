@@ -0,0 +1,125 @@
+"""
+Search normalization for Persian, Arabic and Latin text.
+
+The same name can be typed with Arabic or Persian letter forms, with or
+without ZWNJ, diacritics or tatweel, and with Persian, Arabic-Indic or ASCII
+digits. ``normalize_text`` folds all of these to one form. It is applied once
+at write time to fill the indexed ``search_key`` columns, and to the user's
+query at search time, so the database compares plain stored values.
+"""
+
+import re
+import unicodedata
+
+from sqlalchemy import bindparam, event, select
+
+from database import db
+
+BACKFILL_BATCH_SIZE = 1000
+
+_CHAR_MAP = str.maketrans(
+    {
+        "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+        "\u0649": "\u06cc",  # Alef maksura -> Persian yeh
+        "\u0626": "\u06cc",  # Yeh with hamza -> Persian yeh
+        "\u0643": "\u06a9",  # Arabic kaf -> Persian keheh
+        "\u0629": "\u0647",  # Teh marbuta -> heh
+        "\u06c0": "\u0647",  # Heh with yeh above -> heh
+        "\u0623": "\u0627",  # Alef with hamza above -> alef
+        "\u0625": "\u0627",  # Alef with hamza below -> alef
+        "\u0622": "\u0627",  # Alef with madda -> alef
+        "\u0671": "\u0627",  # Alef wasla -> alef
+        "\u0624": "\u0648",  # Waw with hamza -> waw
+        "\u0640": None,  # Tatweel
+        "\u200c": " ",  # ZWNJ
+        "\u200d": None,  # ZWJ
+        "\u200e": None,  # LRM
+        "\u200f": None,  # RLM
+    }
+)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(value):
+    """Fold ``value`` to the form stored in ``search_key`` columns"""
+    if not value:
+        return ""
+
+    value = value.translate(_CHAR_MAP)
+    # Compatibility decomposition maps Arabic presentation forms to base
+    # letters and splits diacritics off, so they can be dropped
+    value = unicodedata.normalize("NFKD", value)
+    chars = []
+    for char in value:
+        if unicodedata.combining(char):
+            continue
+        digit = unicodedata.decimal(char, None)
+        chars.append(str(digit) if digit is not None else char)
+    value = "".join(chars).translate(_CHAR_MAP)
+    return _SPACE_RE.sub(" ", value).strip().casefold()
+
+
+def _phone_terms(value):
+    """Return the spaced and digits-only spellings of a phone number"""
+    text = normalize_text(value)
+    digits = "".join(char for char in text if char.isdigit())
+    return [text, digits] if digits and digits != text else [text]
+
+
+def contact_search_key(first_name, last_name, email, phone, mobile, city):
+    """Build the normalized search key of a contact"""
+    parts = [normalize_text(first_name), normalize_text(last_name)]
+    parts.append(normalize_text(email))
+    parts += _phone_terms(phone) + _phone_terms(mobile)
+    parts.append(normalize_text(city))
+    return " ".join(part for part in parts if part)
+
+
+def company_search_key(name):
+    """Build the normalized search key of a company"""
+    return normalize_text(name)
+
+
+def _contact_key_row(row):
+    return contact_search_key(
+        row.first_name, row.last_name, row.email, row.phone, row.mobile, row.city
+    )
+
+
+def _company_key_row(row):
+    return company_search_key(row.name)
+
+
+_BACKFILL = {
+    "contact": (
+        ("first_name", "last_name", "email", "phone", "mobile", "city"),
+        _contact_key_row,
+    ),
+    "company": (("name",), _company_key_row),
+}
+
+
+def backfill_search_keys(connection, batch_size=BACKFILL_BATCH_SIZE):
+    """Fill ``search_key`` for rows written before the column existed"""
+    for table_name, (columns, build_key) in _BACKFILL.items():
+        table = db.metadata.tables[table_name]
+        while True:
+            rows = connection.execute(
+                select(table.c.id, *(table.c[name] for name in columns))
+                .where(table.c.search_key.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                table.update()
+                .where(table.c.id == bindparam("row_id"))
+                .values(search_key=bindparam("key")),
+                [{"row_id": row.id, "key": build_key(row)} for row in rows],
+            )
+
+
+@event.listens_for(db.metadata, "after_create")
+def _backfill_after_create(target, connection, **kw):
+    backfill_search_keys(connection)
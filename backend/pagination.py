@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on the previous page, encoded as
+URL-safe base64 JSON. Fetching the next page is a range seek on an index
+over the sort columns, so page N costs the same as page 1.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(values):
+    """Encode a list of sort key values as an opaque cursor string"""
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise InvalidCursor(cursor)
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_page(query, order_columns, cursor, per_page, descending=False):
+    """Return ``(items, next_cursor)`` for one page of ``query``.
+
+    ``order_columns`` must form a unique, stable sort key (end it with the
+    primary key) and should be backed by a composite index in that order.
+    All columns are sorted in the same direction. ``next_cursor`` is None on
+    the last page.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(order_columns))
+        try:
+            values = [
+                (
+                    datetime.fromisoformat(value)
+                    if isinstance(column.type, DateTime) and value is not None
+                    else value
+                )
+                for column, value in zip(order_columns, values)
+            ]
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        key, bound = tuple_(*order_columns), tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+
+    if descending:
+        query = query.order_by(*(column.desc() for column in order_columns))
+    else:
+        query = query.order_by(*order_columns)
+    items = query.limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in order_columns])
+
+    return items, next_cursor
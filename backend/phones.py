@@ -0,0 +1,96 @@
+"""
+Phone number normalization for caller-ID lookups.
+
+Free-form numbers are reduced to E.164-style digits (international ``+``/``00``
+and national trunk ``0`` prefixes dropped, Persian and Arabic-Indic digits
+converted) and stored reversed in indexed ``*_rev`` columns. A suffix match on
+the number ("last 8 digits") then becomes an index range scan on the
+reversed column.
+"""
+
+import unicodedata
+
+from sqlalchemy import and_, bindparam, event, select
+
+from database import db
+
+# Number of trailing digits that must agree for a caller-ID match
+MATCH_DIGITS = 8
+
+# Shortest input accepted by the lookup endpoint
+MIN_MATCH_DIGITS = 4
+
+BACKFILL_BATCH_SIZE = 1000
+
+# table -> (source column, reversed column) pairs
+PHONE_COLUMNS = {
+    "contact": (("phone", "phone_rev"), ("mobile", "mobile_rev")),
+    "company": (("phone", "phone_rev"),),
+}
+
+
+def normalize_phone(value):
+    """Return the E.164-style digits of a free-form number, or None"""
+    if value is None:
+        return None
+
+    digits = []
+    for char in value:
+        digit = unicodedata.decimal(char, None)
+        if digit is not None:
+            digits.append(str(digit))
+    digits = "".join(digits)
+
+    if not value.lstrip().startswith("+"):
+        if digits.startswith("00"):
+            digits = digits[2:]
+        elif digits.startswith("0"):
+            digits = digits[1:]
+    return digits
+
+
+def reversed_digits(value):
+    """Return the value stored in the ``*_rev`` columns for ``value``"""
+    digits = normalize_phone(value)
+    return None if digits is None else digits[::-1]
+
+
+def suffix_key(digits):
+    """Return the reversed last ``MATCH_DIGITS`` of normalized ``digits``"""
+    return digits[-MATCH_DIGITS:][::-1]
+
+
+def suffix_filter(column, key):
+    """Index-friendly ``column`` starts-with ``key`` filter for digit strings"""
+    # ":" sorts right after "9", so this is the range of all digit extensions
+    return and_(column >= key, column < key + ":")
+
+
+def backfill_phone_keys(connection, batch_size=BACKFILL_BATCH_SIZE):
+    """Fill ``*_rev`` columns for rows written before they existed"""
+    for table_name, columns in PHONE_COLUMNS.items():
+        table = db.metadata.tables[table_name]
+        for source, target in columns:
+            source_col, target_col = table.c[source], table.c[target]
+            while True:
+                rows = connection.execute(
+                    select(table.c.id, source_col)
+                    .where(target_col.is_(None), source_col.isnot(None))
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                connection.execute(
+                    table.update()
+                    .where(table.c.id == bindparam("row_id"))
+                    .values({target: bindparam("rev")}),
+                    [
+                        {"row_id": row_id, "rev": reversed_digits(value)}
+                        for row_id, value in rows
+                    ],
+                )
+
+
+@event.listens_for(db.metadata, "after_create")
+def _backfill_after_create(target, connection, **kw):
+    backfill_phone_keys(connection)
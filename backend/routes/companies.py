@@ -1,9 +1,38 @@
 from flask import Blueprint, request, jsonify, session
 from database import db
-from models import Company
+from etags import conditional
+import exporter
+from models import COMPANY_DICT_FIELDS, Company, Contact
+from normalization import normalize_text
+from pagination import InvalidCursor, keyset_page
+from serialization import row_dicts
+from sqlalchemy import func, or_
+import suggest
+from writer import run_write
 
 bp = Blueprint("companies", __name__, url_prefix="/api/companies")
 
+# Sort options; each key is unique and backed by an index in this order
+COMPANY_SORT_KEYS = {
+    "name": (Company.name, Company.id),
+    "created_at": (Company.created_at, Company.id),
+}
+
+# Columns a client may set directly on create
+COMPANY_FIELDS = (
+    "name",
+    "industry",
+    "website",
+    "email",
+    "phone",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "description",
+)
+
 
 def login_required(f):
     """Decorator to require authentication"""
@@ -17,14 +46,162 @@ def login_required(f):
     return wrapper
 
 
+def contact_counts(company_ids=None):
+    """Return ``{company_id: contact_count}`` with one grouped query, for
+    all companies when ``company_ids`` is None"""
+    query = db.select(Contact.company_id, func.count()).group_by(Contact.company_id)
+    if company_ids is not None:
+        if not company_ids:
+            return {}
+        query = query.where(Contact.company_id.in_(company_ids))
+    rows = db.session.execute(query)
+    return dict(rows.all())
+
+
+def _create_company_job(fields, user_id):
+    """Insert a company and return it serialized; runs through ``run_write``"""
+    company = Company(**fields, created_by=user_id)
+    db.session.add(company)
+    db.session.flush()
+    return company.to_dict()
+
+
 @bp.route("", methods=["GET"])
 @login_required
+@conditional("company", "contact")
 def get_companies():
-    """Get all companies"""
+    """Get companies with search, sorting and pagination"""
     try:
-        companies = Company.query.all()
-        companies_data = [company.to_dict() for company in companies]
-        return jsonify({"companies": companies_data}), 200
+        # Without page, per_page or cursor every company is returned, as
+        # before pagination existed
+        paginated = any(arg in request.args for arg in ("page", "per_page", "cursor"))
+        view = request.args.get("view", "full")
+        max_per_page = 1000 if view == "summary" else 100
+        page = int(request.args.get("page", 1))
+        per_page = min(int(request.args.get("per_page", 20)), max_per_page)
+        search = request.args.get("search", "")
+        industry = request.args.get("industry")
+        city = request.args.get("city")
+        cursor = request.args.get("cursor")
+
+        sort = request.args.get("sort", "name")
+        descending = sort.startswith("-")
+        sort_key = COMPANY_SORT_KEYS.get(sort.lstrip("-"))
+        if sort_key is None:
+            return jsonify({"success": False, "error": "Invalid sort"}), 400
+
+        # Pages are rendered from column tuples; summary rows carry the sort
+        # columns for the cursor
+        if view == "summary":
+            columns = (Company.id, Company.name, Company.created_at)
+        else:
+            columns = (getattr(Company, field) for field in COMPANY_DICT_FIELDS)
+        query = db.session.query(*columns)
+
+        # Name matches on the normalized search key, industry/city as text
+        if search:
+            query = query.filter(
+                or_(
+                    Company.search_key.contains(
+                        normalize_text(search), autoescape=True
+                    ),
+                    Company.industry.ilike(f"%{search}%"),
+                    Company.city.ilike(f"%{search}%"),
+                )
+            )
+        if industry:
+            query = query.filter(Company.industry == industry)
+        if city:
+            query = query.filter(Company.city == city)
+
+        if cursor is None:
+            if descending:
+                query = query.order_by(*(column.desc() for column in sort_key))
+            else:
+                query = query.order_by(*sort_key)
+
+        if not paginated:
+            items, pagination = query.all(), None
+        elif cursor is not None:
+            # Keyset mode: ?cursor= (empty for the first page)
+            items, next_cursor = keyset_page(
+                query, sort_key, cursor, per_page, descending=descending
+            )
+            pagination = {"per_page": per_page, "next_cursor": next_cursor}
+            if request.args.get("include_total", "").lower() in ("1", "true"):
+                pagination["total"] = query.order_by(None).count()
+        else:
+            companies = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = companies.items
+            pagination = {
+                "page": companies.page,
+                "per_page": companies.per_page,
+                "total": companies.total,
+                "pages": companies.pages,
+            }
+
+        if view == "summary":
+            counts = contact_counts(
+                [company.id for company in items] if paginated else None
+            )
+            companies_data = [
+                {
+                    "id": company.id,
+                    "name": company.name,
+                    "contact_count": counts.get(company.id, 0),
+                }
+                for company in items
+            ]
+        else:
+            companies_data = row_dicts(items, COMPANY_DICT_FIELDS)
+
+        if pagination is None:
+            return jsonify({"companies": companies_data}), 200
+        return jsonify({"companies": companies_data, "pagination": pagination}), 200
+    except InvalidCursor:
+        return jsonify({"success": False, "error": "Invalid cursor"}), 400
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<int:company_id>", methods=["GET"])
+@login_required
+@conditional("company")
+def get_company(company_id):
+    """Get a single company"""
+    try:
+        company = db.session.get(Company, company_id)
+        if company is None:
+            return jsonify({"success": False, "error": "Company not found"}), 404
+
+        return jsonify({"company": company.to_dict()}), 200
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/export", methods=["GET"])
+@login_required
+def export_companies():
+    """Stream all companies as CSV, NDJSON or vCard"""
+    try:
+        return exporter.export_response("companies")
+    except exporter.ExportFormatError as exc:
+        return jsonify({"success": False, "error": str(exc)}), 400
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/suggest", methods=["GET"])
+@login_required
+def suggest_companies():
+    """Suggest companies whose name starts with ``q``"""
+    try:
+        query = request.args.get("q", "")
+        limit = int(request.args.get("limit", suggest.DEFAULT_LIMIT))
+        return (
+            jsonify({"suggestions": suggest.suggest("companies", query, limit)}),
+            200,
+        )
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
@@ -38,36 +215,10 @@ def create_company():
         if not data or "name" not in data:
             return jsonify({"success": False, "error": "Name required"}), 400
 
-        name = data["name"]
-        industry = data.get("industry")
-        website = data.get("website")
-        email = data.get("email")
-        phone = data.get("phone")
-        address = data.get("address")
-        city = data.get("city")
-        state = data.get("state")
-        zip_code = data.get("zip_code")
-        country = data.get("country")
-        description = data.get("description")
-
-        company = Company(
-            name=name,
-            industry=industry,
-            website=website,
-            email=email,
-            phone=phone,
-            address=address,
-            city=city,
-            state=state,
-            zip_code=zip_code,
-            country=country,
-            description=description,
-            created_by=session["user_id"],
-        )
-
-        db.session.add(company)
-        db.session.commit()
+        fields = {field: data.get(field) for field in COMPANY_FIELDS}
+        company_dict = run_write(_create_company_job, fields, session["user_id"])
+        suggest.company_saved(company_dict["id"], company_dict["name"])
 
-        return jsonify({"success": True, "company": company.to_dict()}), 201
+        return jsonify({"success": True, "company": company_dict}), 201
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
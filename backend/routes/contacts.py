@@ -1,10 +1,58 @@
-from flask import Blueprint, request, jsonify, session
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    request,
+    jsonify,
+    session,
+    stream_with_context,
+)
 from database import db
-from models import Contact, Company
-from sqlalchemy import or_
+import bulk
+import cache
+import dedupe
+from etags import conditional
+import importer
+import exporter
+from models import CONTACT_DICT_FIELDS, Contact, Company
+from pagination import InvalidCursor, keyset_page
+from search import apply_contact_search
+from serialization import row_dicts
+import fuzzy
+import suggest
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from writer import run_write
 
 bp = Blueprint("contacts", __name__, url_prefix="/api/contacts")
 
+# Stable sort for cursor pagination, matches ix_contact_name_order
+CONTACT_SORT_KEY = (Contact.last_name, Contact.first_name, Contact.id)
+
+# A contact list row: the to_dict() columns and the company name
+CONTACT_ROW_COLUMNS = (
+    *(getattr(Contact, field) for field in CONTACT_DICT_FIELDS),
+    Company.name.label("company_name"),
+)
+
+# Ranked fuzzy matches checked per query against the company filter
+FUZZY_CHUNK = 500
+
+# Columns a client may set directly on create and update
+CONTACT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "mobile",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "country",
+    "notes",
+)
+
 
 def login_required(f):
     """Decorator to require authentication"""
@@ -35,8 +83,85 @@ def editor_or_admin_required(f):
     return wrapper
 
 
+def contact_payload(contact):
+    """Serialize a contact with its company id and name.
+
+    The company comes from the relationship, so rows loaded with
+    ``joinedload(Contact.company)`` need no extra query.
+    """
+    contact_dict = contact.to_dict()
+    company = contact.company
+    if company:
+        contact_dict["company"] = {"id": company.id, "name": company.name}
+    return contact_dict
+
+
+def contact_rows_payload(rows):
+    """Serialize rows of ``CONTACT_ROW_COLUMNS`` like ``contact_payload``"""
+    contacts_data = row_dicts(rows, CONTACT_DICT_FIELDS)
+    for contact_dict, row in zip(contacts_data, rows):
+        if row.company_name is not None:
+            contact_dict["company"] = {
+                "id": contact_dict["company_id"],
+                "name": row.company_name,
+            }
+    return contacts_data
+
+
+def _create_contact_job(fields, company_id, user_id):
+    """Insert a contact and return its payload; runs through ``run_write``"""
+    contact = Contact(**fields, created_by=user_id)
+    contact.company = db.session.get(Company, company_id) if company_id else None
+    db.session.add(contact)
+    db.session.flush()
+
+    # Serialize before commit so nothing is reloaded from the database
+    return contact_payload(contact)
+
+
+def _update_contact_job(contact_id, changes):
+    """Apply ``changes`` to a contact and return its payload, or None if it
+    no longer exists; runs through ``run_write``"""
+    contact = db.session.get(Contact, contact_id)
+    if contact is None:
+        return None
+
+    for field, value in changes.items():
+        if field == "company_id":
+            contact.company = db.session.get(Company, value) if value else None
+        else:
+            setattr(contact, field, value)
+    db.session.flush()
+
+    # Serialize before commit so nothing is reloaded from the database
+    return contact_payload(contact)
+
+
+def _delete_contact_job(contact_id):
+    """Delete a contact; runs through ``run_write``"""
+    contact = db.session.get(Contact, contact_id)
+    if contact is not None:
+        db.session.delete(contact)
+
+
+def _merge_contacts_job(contact_id, duplicate_ids):
+    """Merge duplicates into a contact and return its payload, or None if
+    one of them no longer exists; runs through ``run_write``"""
+    contact = dedupe.merge_contacts(contact_id, duplicate_ids)
+    return None if contact is None else contact_payload(contact)
+
+
+def _index_contact(contact_dict):
+    """Update the in-memory name indexes after a contact was saved"""
+    first_name, last_name = contact_dict["first_name"], contact_dict["last_name"]
+    company_name = contact_dict.get("company", {}).get("name")
+    suggest.contact_saved(contact_dict["id"], first_name, last_name)
+    fuzzy.contact_saved(contact_dict["id"], first_name, last_name, company_name)
+
+
 @bp.route("", methods=["GET"])
 @login_required
+@conditional("contact", "company")
 def get_contacts():
     """Get contacts with filtering and pagination"""
     try:
@@ -44,49 +169,189 @@ def get_contacts():
         per_page = min(int(request.args.get("per_page", 20)), 100)
         search = request.args.get("search", "")
         company_id = request.args.get("company_id")
-
-        query = Contact.query
-
-        # Apply search filter
+        cursor = request.args.get("cursor")
+        fuzzy_mode = request.args.get("fuzzy", "").lower() in ("1", "true")
+
+        # Typo-tolerant mode: top matches from the trigram index. The index
+        # knows nothing of companies, so with a company filter the ranking is
+        # walked chunk by chunk until the page is full.
+        if search and fuzzy_mode:
+            ranked = fuzzy.fuzzy_search(search, None if company_id else per_page)
+            scores, contacts = dict(ranked), []
+            for start in range(0, len(ranked), FUZZY_CHUNK):
+                chunk = [entry[0] for entry in ranked[start : start + FUZZY_CHUNK]]
+                query = Contact.query.options(joinedload(Contact.company))
+                query = query.filter(Contact.id.in_(chunk))
+                if company_id:
+                    query = query.filter(Contact.company_id == company_id)
+                contacts.extend(sorted(query, key=lambda c: -scores[c.id]))
+                if len(contacts) >= per_page:
+                    break
+            contacts_data = []
+            for contact in contacts[:per_page]:
+                contact_dict = contact_payload(contact)
+                contact_dict["similarity"] = round(scores[contact.id], 3)
+                contacts_data.append(contact_dict)
+            pagination = {"per_page": per_page, "total": len(contacts_data)}
+            return jsonify({"contacts": contacts_data, "pagination": pagination}), 200
+
+        # Pages are rendered from column tuples, with the company name loaded
+        # in the same query
+        query = db.session.query(*CONTACT_ROW_COLUMNS).outerjoin(Contact.company)
+
+        # Apply search filter, ranked by relevance when FTS is available.
+        # Cursor pages are ordered by name, so they skip the ranking.
         if search:
-            query = query.filter(
-                or_(
-                    Contact.first_name.ilike(f"%{search}%"),
-                    Contact.last_name.ilike(f"%{search}%"),
-                    Contact.email.ilike(f"%{search}%"),
-                )
-            )
+            query = apply_contact_search(query, search, ranked=cursor is None)
 
         # Apply company filter
         if company_id:
             query = query.filter(Contact.company_id == company_id)
 
-        # Paginate
-        contacts = query.paginate(page=page, per_page=per_page, error_out=False)
+        if cursor is not None:
+            # Keyset mode: ?cursor= (empty for the first page)
+            items, next_cursor = keyset_page(query, CONTACT_SORT_KEY, cursor, per_page)
+            pagination = {"per_page": per_page, "next_cursor": next_cursor}
+            if request.args.get("include_total", "").lower() in ("1", "true"):
+                pagination["total"] = query.order_by(None).count()
+        else:
+            # Paginate
+            contacts = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = contacts.items
+            pagination = {
+                "page": contacts.page,
+                "per_page": contacts.per_page,
+                "total": contacts.total,
+                "pages": contacts.pages,
+            }
+
+        contacts_data = contact_rows_payload(items)
+
+        return jsonify({"contacts": contacts_data, "pagination": pagination}), 200
+    except InvalidCursor:
+        return jsonify({"success": False, "error": "Invalid cursor"}), 400
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<int:contact_id>", methods=["GET"])
+@login_required
+@conditional("contact", "company")
+def get_contact(contact_id):
+    """Get a single contact"""
+    try:
+        contact = db.session.get(
+            Contact, contact_id, options=[joinedload(Contact.company)]
+        )
+        if contact is None:
+            return jsonify({"success": False, "error": "Contact not found"}), 404
+
+        return jsonify({"contact": contact_payload(contact)}), 200
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/export", methods=["GET"])
+@login_required
+def export_contacts():
+    """Stream all contacts as CSV, NDJSON or vCard"""
+    try:
+        return exporter.export_response("contacts")
+    except exporter.ExportFormatError as exc:
+        return jsonify({"success": False, "error": str(exc)}), 400
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
 
-        contacts_data = []
-        for contact in contacts.items:
-            contact_dict = contact.to_dict()
-            if contact.company_id:
-                company = Company.query.get(contact.company_id)
-                if company:
-                    contact_dict["company"] = {"id": company.id, "name": company.name}
-            contacts_data.append(contact_dict)
 
+@bp.route("/duplicates", methods=["GET"])
+@editor_or_admin_required
+def get_duplicates():
+    """Get likely duplicate pairs from the last scan, best matches first"""
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = min(int(request.args.get("per_page", 20)), 100)
+        min_score = float(request.args.get("min_score", 0))
+        contact_id = request.args.get("contact_id", type=int)
+
+        pair = dedupe.duplicate_pair.c
+        query = select(pair.contact_id, pair.duplicate_id, pair.score, pair.reasons)
+        query = query.where(pair.score >= min_score)
+        if contact_id:
+            query = query.where(
+                (pair.contact_id == contact_id) | (pair.duplicate_id == contact_id)
+            )
+        total = db.session.scalar(select(func.count()).select_from(query.subquery()))
+        rows = db.session.execute(
+            query.order_by(pair.score.desc(), pair.contact_id, pair.duplicate_id)
+            .limit(per_page)
+            .offset((max(page, 1) - 1) * per_page)
+        ).all()
+
+        # Both sides of the page's pairs in one query
+        ids = {row.contact_id for row in rows} | {row.duplicate_id for row in rows}
+        contacts = {
+            contact.id: contact_payload(contact)
+            for contact in Contact.query.options(joinedload(Contact.company)).filter(
+                Contact.id.in_(ids)
+            )
+        }
+        duplicates = [
+            {
+                "contact": contacts[row.contact_id],
+                "duplicate": contacts[row.duplicate_id],
+                "score": row.score,
+                "reasons": row.reasons.split(",") if row.reasons else [],
+            }
+            for row in rows
+            if row.contact_id in contacts and row.duplicate_id in contacts
+        ]
+        pagination = {"page": page, "per_page": per_page, "total": total}
         return (
             jsonify(
                 {
-                    "contacts": contacts_data,
-                    "pagination": {
-                        "page": contacts.page,
-                        "per_page": contacts.per_page,
-                        "total": contacts.total,
-                        "pages": contacts.pages,
-                    },
+                    "duplicates": duplicates,
+                    "pagination": pagination,
+                    "scan": dedupe.get_scan().status,
                 }
             ),
             200,
         )
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid parameter"}), 400
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/duplicates/scan", methods=["POST"])
+@editor_or_admin_required
+def scan_duplicates():
+    """Start a background scan for duplicate contacts"""
+    try:
+        scan = dedupe.get_scan()
+        if not scan.start():
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": "A scan is already running",
+                        "scan": scan.status,
+                    }
+                ),
+                409,
+            )
+        return jsonify({"success": True, "scan": scan.status}), 202
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/suggest", methods=["GET"])
+@login_required
+def suggest_contacts():
+    """Suggest contacts whose name starts with ``q``"""
+    try:
+        query = request.args.get("q", "")
+        limit = int(request.args.get("limit", suggest.DEFAULT_LIMIT))
+        return jsonify({"suggestions": suggest.suggest("contacts", query, limit)}), 200
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
@@ -105,53 +370,85 @@ def create_contact():
                 400,
             )
 
-        first_name = data["first_name"]
-        last_name = data["last_name"]
-        email = data.get("email")
-        phone = data.get("phone")
-        mobile = data.get("mobile")
-        address = data.get("address")
-        city = data.get("city")
-        state = data.get("state")
-        zip_code = data.get("zip_code")
-        country = data.get("country")
+        fields = {field: data.get(field) for field in CONTACT_FIELDS}
         company_id = data.get("company_id")
-        notes = data.get("notes")
 
-        # Validate company_id if provided
-        if company_id and not Company.query.get(company_id):
+        # Validate company_id if provided. Holding the instance keeps it in
+        # the identity map, so the job's lookup is free without a write queue.
+        company = db.session.get(Company, company_id) if company_id else None
+        if company_id and not company:
             return jsonify({"success": False, "error": "Invalid company_id"}), 400
 
-        contact = Contact(
-            first_name=first_name,
-            last_name=last_name,
-            email=email,
-            phone=phone,
-            mobile=mobile,
-            address=address,
-            city=city,
-            state=state,
-            zip_code=zip_code,
-            country=country,
-            company_id=company_id,
-            notes=notes,
-            created_by=session["user_id"],
+        contact_dict = run_write(
+            _create_contact_job, fields, company_id, session["user_id"]
         )
+        _index_contact(contact_dict)
 
-        db.session.add(contact)
-        db.session.commit()
+        return jsonify({"success": True, "contact": contact_dict}), 201
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
 
-        contact_dict = contact.to_dict()
-        if contact.company_id:
-            company = Company.query.get(contact.company_id)
-            if company:
-                contact_dict["company"] = {"id": company.id, "name": company.name}
 
-        return jsonify({"success": True, "contact": contact_dict}), 201
+@bp.route("/import", methods=["POST"])
+@editor_or_admin_required
+def import_contacts():
+    """Import contacts from an uploaded CSV, vCard or Excel file.
+
+    With ``?progress=1`` the response is NDJSON: one ``progress`` line per
+    committed batch and a final ``result`` line.
+    """
+    contact_importer = None
+    try:
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"success": False, "error": "No file uploaded"}), 400
+
+        options = request.values
+        fmt = importer.detect_format(upload.filename, options.get("format"))
+        batch_size = int(options.get("batch_size", importer.DEFAULT_BATCH_SIZE))
+        rows = importer.open_rows(
+            upload.stream, fmt, options.get("encoding", "utf-8-sig")
+        )
+        contact_importer = importer.ContactImporter(session["user_id"], batch_size)
+
+        if options.get("progress", "").lower() in ("1", "true"):
+            return Response(
+                stream_with_context(_import_progress(contact_importer, rows)),
+                mimetype="application/x-ndjson",
+            )
+
+        for _ in contact_importer.run(rows):
+            pass
+        return (
+            jsonify({"success": True, "import": contact_importer.result.to_dict()}),
+            200,
+        )
+    except importer.ImportFormatError as exc:
+        response = {"success": False, "error": str(exc)}
+        if contact_importer is not None:
+            response["import"] = contact_importer.result.to_dict()
+        return jsonify(response), 400
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid batch_size"}), 400
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
 
+def _import_progress(contact_importer, rows):
+    """Run an import, yielding NDJSON progress lines"""
+    dumps = current_app.json.dumps
+    try:
+        for result in contact_importer.run(rows):
+            yield dumps({"progress": result.progress()}) + "\n"
+        line = {"success": True, "result": contact_importer.result.to_dict()}
+    except importer.ImportFormatError as exc:
+        line = {"success": False, "error": str(exc)}
+        line["result"] = contact_importer.result.to_dict()
+    except Exception:
+        line = {"success": False, "error": "Server error"}
+    yield dumps(line) + "\n"
+
+
 @bp.route("/<int:contact_id>", methods=["PUT"])
 @login_required
 def update_contact(contact_id):
@@ -171,40 +468,18 @@ def update_contact(contact_id):
         if not data:
             return jsonify({"success": False, "error": "No data provided"}), 400
 
-        if "first_name" in data:
-            contact.first_name = data["first_name"]
-        if "last_name" in data:
-            contact.last_name = data["last_name"]
-        if "email" in data:
-            contact.email = data["email"]
-        if "phone" in data:
-            contact.phone = data["phone"]
-        if "mobile" in data:
-            contact.mobile = data["mobile"]
-        if "address" in data:
-            contact.address = data["address"]
-        if "city" in data:
-            contact.city = data["city"]
-        if "state" in data:
-            contact.state = data["state"]
-        if "zip_code" in data:
-            contact.zip_code = data["zip_code"]
-        if "country" in data:
-            contact.country = data["country"]
+        changes = {field: data[field] for field in CONTACT_FIELDS if field in data}
         if "company_id" in data:
-            if data["company_id"] and not Company.query.get(data["company_id"]):
+            company_id = data["company_id"] or None
+            company = db.session.get(Company, company_id) if company_id else None
+            if company_id and not company:
                 return jsonify({"success": False, "error": "Invalid company_id"}), 400
-            contact.company_id = data["company_id"]
-        if "notes" in data:
-            contact.notes = data["notes"]
+            changes["company_id"] = company_id
 
-        db.session.commit()
-
-        contact_dict = contact.to_dict()
-        if contact.company_id:
-            company = Company.query.get(contact.company_id)
-            if company:
-                contact_dict["company"] = {"id": company.id, "name": company.name}
+        contact_dict = run_write(_update_contact_job, contact_id, changes)
+        if contact_dict is None:
+            return jsonify({"success": False, "error": "Contact not found"}), 404
+        _index_contact(contact_dict)
 
         return jsonify({"success": True, "contact": contact_dict}), 200
     except Exception:
@@ -226,8 +501,9 @@ def delete_contact(contact_id):
         ):
             return jsonify({"success": False, "error": "Permission denied"}), 403
 
-        db.session.delete(contact)
-        db.session.commit()
+        run_write(_delete_contact_job, contact_id)
+        suggest.contact_deleted(contact_id)
+        fuzzy.contact_deleted(contact_id)
 
         return (
             jsonify({"success": True, "message": "Contact deleted successfully"}),
@@ -235,3 +511,103 @@ def delete_contact(contact_id):
         )
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/bulk", methods=["POST"])
+@login_required
+def bulk_contacts():
+    """Create, update and delete many contacts in one transaction.
+
+    The body is ``{"operations": [...], "mode": "atomic" | "partial"}``; see
+    ``bulk`` for the operation format and the two modes.
+    """
+    try:
+        try:
+            operations, atomic = bulk.parse_request(request.get_json(silent=True))
+        except bulk.BulkRequestError as exc:
+            return jsonify({"success": False, "error": str(exc)}), 400
+
+        outcome = run_write(
+            bulk.apply_operations,
+            operations,
+            atomic,
+            session["user_id"],
+            session.get("role") in ["admin", "editor"],
+        )
+        # Contacts were written with Core statements
+        if outcome["saved"] or outcome["deleted"]:
+            cache.tables_changed({"contact"})
+        for contact_id in outcome["deleted"]:
+            suggest.contact_deleted(contact_id)
+            fuzzy.contact_deleted(contact_id)
+        for contact_dict in outcome["saved"]:
+            _index_contact(contact_dict)
+
+        results = outcome["results"]
+        for result in results:
+            result["success"] = "error" not in result
+        summary = {"created": 0, "updated": 0, "deleted": 0, "failed": 0}
+        for result in results:
+            if result["success"]:
+                summary[f"{result['op']}d"] += 1
+            else:
+                summary["failed"] += 1
+
+        return (
+            jsonify(
+                {
+                    "success": summary["failed"] == 0,
+                    "applied": outcome["applied"],
+                    "summary": summary,
+                    "results": results,
+                }
+            ),
+            200 if outcome["applied"] else 400,
+        )
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<int:contact_id>/merge", methods=["POST"])
+@editor_or_admin_required
+def merge_contacts(contact_id):
+    """Merge duplicate contacts into this one and delete them"""
+    try:
+        data = request.get_json(silent=True) or {}
+        duplicate_ids = data.get("duplicate_ids")
+        if (
+            not isinstance(duplicate_ids, list)
+            or not duplicate_ids
+            or len(duplicate_ids) > 100
+            or not all(isinstance(i, int) for i in duplicate_ids)
+            or contact_id in duplicate_ids
+        ):
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": "duplicate_ids must list up to 100 other contacts",
+                    }
+                ),
+                400,
+            )
+        duplicate_ids = list(dict.fromkeys(duplicate_ids))
+
+        contact_dict = run_write(_merge_contacts_job, contact_id, duplicate_ids)
+        if contact_dict is None:
+            return jsonify({"success": False, "error": "Contact not found"}), 404
+        # Duplicates were deleted with Core statements
+        cache.tables_changed({"contact"})
+        for duplicate_id in duplicate_ids:
+            suggest.contact_deleted(duplicate_id)
+            fuzzy.contact_deleted(duplicate_id)
+        _index_contact(contact_dict)
+
+        return (
+            jsonify(
+                {"success": True, "contact": contact_dict, "merged": duplicate_ids}
+            ),
+            200,
+        )
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
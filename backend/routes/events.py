@@ -0,0 +1,63 @@
+from flask import Blueprint, current_app, request, jsonify, session
+import sync
+
+bp = Blueprint("events", __name__, url_prefix="/api/events")
+
+
+def login_required(f):
+    """Decorator to require authentication"""
+
+    def wrapper(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"success": False, "error": "Authentication required"}), 401
+        return f(*args, **kwargs)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+@bp.route("", methods=["GET"])
+@login_required
+def get_events():
+    """Stream change events as Server-Sent Events.
+
+    ``?entities=notices,contacts`` limits the stream to some entities.
+    Reconnecting browsers send ``Last-Event-ID``; ``?since=`` does the same
+    for other clients.
+    """
+    try:
+        if not sync.sync_enabled():
+            return (
+                jsonify({"success": False, "error": "Events are not available"}),
+                501,
+            )
+
+        entities = None
+        if request.args.get("entities"):
+            entities = set(request.args["entities"].split(","))
+            if not entities <= {name for name, _ in sync.SYNCED.values()}:
+                return jsonify({"success": False, "error": "Unknown entity"}), 400
+
+        token = request.headers.get("Last-Event-ID") or request.args.get("since")
+        current = sync.current_token()
+        try:
+            after = current if token is None else int(token)
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid token"}), 400
+        if after < 0:
+            return jsonify({"success": False, "error": "Invalid token"}), 400
+        # A token from the future (a restored database) cannot be continued
+        resync = after > current
+        if resync:
+            after = current
+
+        # Not wrapped in stream_with_context: an idle stream holds no
+        # request context or database session
+        hub = current_app.extensions["event_hub"]
+        return current_app.response_class(
+            hub.stream(after, entities, resync),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
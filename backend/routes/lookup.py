@@ -0,0 +1,125 @@
+from flask import Blueprint, jsonify, session
+from models import Contact, Company
+from cache import TTLCache, on_tables_changed
+from etags import current_etag
+from phones import MIN_MATCH_DIGITS, normalize_phone, suffix_filter, suffix_key
+from routes.contacts import contact_payload
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+bp = Blueprint("lookup", __name__, url_prefix="/api/lookup")
+
+# Tables a lookup reads
+LOOKUP_TABLES = ("contact", "company")
+
+# Suffix keys known to match nothing, with the LOOKUP_TABLES version they
+# were checked at; cleared by this process's writes and ignored once the
+# version shows another worker wrote
+negative_cache = TTLCache(maxsize=50000, ttl=300, name="lookup_negative")
+
+# Candidate rows fetched per suffix before picking the closest match
+MAX_CANDIDATES = 20
+
+
+@on_tables_changed(*LOOKUP_TABLES)
+def _clear_negative_cache(tables):
+    negative_cache.clear()
+
+
+def login_required(f):
+    """Decorator to require authentication"""
+
+    def wrapper(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"success": False, "error": "Authentication required"}), 401
+        return f(*args, **kwargs)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+def _match_length(reversed_number, stored):
+    """Number of trailing digits two numbers have in common"""
+    length = 0
+    for a, b in zip(reversed_number, stored or ""):
+        if a != b:
+            break
+        length += 1
+    return length
+
+
+@bp.route("/phone/<path:number>", methods=["GET"])
+@login_required
+def lookup_phone(number):
+    """Resolve an incoming phone number to a contact or company"""
+    try:
+        digits = normalize_phone(number)
+        if len(digits) < MIN_MATCH_DIGITS:
+            return jsonify({"success": False, "error": "Invalid phone number"}), 400
+
+        key = suffix_key(digits)
+        version = current_etag(LOOKUP_TABLES)
+        if negative_cache.get(key) == version:
+            return jsonify({"success": False, "error": "No match"}), 404
+
+        reversed_number = digits[::-1]
+
+        contacts = (
+            Contact.query.options(joinedload(Contact.company))
+            .filter(
+                or_(
+                    suffix_filter(Contact.phone_rev, key),
+                    suffix_filter(Contact.mobile_rev, key),
+                )
+            )
+            .limit(MAX_CANDIDATES)
+            .all()
+        )
+        if contacts:
+            # Prefer the number sharing the most trailing digits
+            best = None
+            for contact in contacts:
+                for field in ("phone", "mobile"):
+                    stored = getattr(contact, f"{field}_rev")
+                    score = (_match_length(reversed_number, stored), -contact.id)
+                    if best is None or score > best[0]:
+                        best = (score, contact, field)
+            _, contact, field = best
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "type": "contact",
+                        "matched_field": field,
+                        "contact": contact_payload(contact),
+                    }
+                ),
+                200,
+            )
+
+        companies = (
+            Company.query.filter(suffix_filter(Company.phone_rev, key))
+            .limit(MAX_CANDIDATES)
+            .all()
+        )
+        if companies:
+            best = max(
+                companies,
+                key=lambda c: (_match_length(reversed_number, c.phone_rev), -c.id),
+            )
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "type": "company",
+                        "matched_field": "phone",
+                        "company": best.to_dict(),
+                    }
+                ),
+                200,
+            )
+
+        negative_cache.set(key, version)
+        return jsonify({"success": False, "error": "No match"}), 404
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
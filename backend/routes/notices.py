@@ -1,10 +1,26 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, jsonify, session
 from database import db
+from etags import body_etag, conditional, current_etag, tagged_response
+import exporter
 from models import User, Notice
+from cache import per_app_cache
 from datetime import datetime
+from sqlalchemy import select
+from writer import run_write
 
 bp = Blueprint("notices", __name__, url_prefix="/api/notices")
 
+# Longest time a feed is served without an expiry boundary or a write
+FEED_TTL = 3600
+
+# Tables the feed is built from
+FEED_TABLES = ("notice", "user")
+
+# Serialized active-notices feed with the FEED_TABLES version it was built
+# at; cleared by this process's notice and user writes, and rebuilt when
+# the version shows another worker wrote
+feed_cache = per_app_cache("notices_feed", "notice", "user", maxsize=1, ttl=FEED_TTL)
+
 
 def login_required(f):
     """Decorator to require authentication"""
@@ -32,32 +48,111 @@ def admin_required(f):
     return wrapper
 
 
+def _create_notice_job(fields, user_id):
+    """Insert a notice and return it serialized; runs through ``run_write``"""
+    notice = Notice(**fields, created_by=user_id)
+    db.session.add(notice)
+    db.session.flush()
+    return notice.to_dict()
+
+
+def _update_notice_job(notice_id, changes):
+    """Apply ``changes`` to a notice and return it serialized, or None if it
+    no longer exists; runs through ``run_write``"""
+    notice = db.session.get(Notice, notice_id)
+    if notice is None:
+        return None
+    for field, value in changes.items():
+        setattr(notice, field, value)
+    db.session.flush()
+    return notice.to_dict()
+
+
+def _delete_notice_job(notice_id):
+    """Delete a notice; runs through ``run_write``"""
+    notice = db.session.get(Notice, notice_id)
+    if notice is not None:
+        db.session.delete(notice)
+
+
+def build_feed(now):
+    """Serialize the active notices and return ``(body, seconds_valid)``.
+
+    The feed stays valid until the next ``expires_at`` among the notices it
+    contains, so expired notices drop out on time without polling.
+    """
+    rows = db.session.execute(
+        select(Notice, User.username)
+        .outerjoin(User, User.id == Notice.created_by)
+        .where(
+            Notice.is_active == True,
+            (Notice.expires_at.is_(None) | (Notice.expires_at > now)),
+        )
+        .order_by(Notice.created_at.desc())
+    ).all()
+
+    notices_data = []
+    for notice, username in rows:
+        notice_dict = notice.to_dict()
+        notice_dict["created_by"] = (
+            {"id": notice.created_by, "username": username} if username else None
+        )
+        notices_data.append(notice_dict)
+
+    expiries = [notice.expires_at for notice, _ in rows if notice.expires_at]
+    seconds_valid = FEED_TTL
+    if expiries:
+        seconds_valid = min(seconds_valid, (min(expiries) - now).total_seconds())
+
+    return current_app.json.dumps({"notices": notices_data}), seconds_valid
+
+
 @bp.route("", methods=["GET"])
 @login_required
 def get_notices():
     """Get active notices"""
     try:
-        # Get active notices that haven't expired
-        now = datetime.utcnow()
-        notices = (
-            Notice.query.filter(
-                Notice.is_active == True,
-                (Notice.expires_at.is_(None) | (Notice.expires_at > now)),
-            )
-            .order_by(Notice.created_at.desc())
-            .all()
+        cache = feed_cache()
+        generation = cache.generation
+        version = current_etag(FEED_TABLES)
+        feed = cache.get("feed")
+        if feed is None or feed[0] != version:
+            body, seconds_valid = build_feed(datetime.utcnow())
+            feed = (version, body, body_etag(body))
+            cache.set("feed", feed, ttl=seconds_valid, generation=generation)
+
+        # The tag comes from the body, so it also changes when a notice expires
+        _, body, etag = feed
+        return tagged_response(
+            etag, current_app.response_class, body, mimetype="application/json"
         )
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
 
-        notices_data = []
-        for notice in notices:
-            creator = User.query.get(notice.created_by)
-            notice_dict = notice.to_dict()
-            notice_dict["created_by"] = (
-                {"id": creator.id, "username": creator.username} if creator else None
-            )
-            notices_data.append(notice_dict)
 
-        return jsonify({"notices": notices_data}), 200
+@bp.route("/<int:notice_id>", methods=["GET"])
+@login_required
+@conditional("notice")
+def get_notice(notice_id):
+    """Get a single notice"""
+    try:
+        notice = db.session.get(Notice, notice_id)
+        if notice is None:
+            return jsonify({"success": False, "error": "Notice not found"}), 404
+
+        return jsonify({"notice": notice.to_dict()}), 200
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/export", methods=["GET"])
+@login_required
+def export_notices():
+    """Stream all active notices as CSV or NDJSON"""
+    try:
+        return exporter.export_response("notices")
+    except exporter.ExportFormatError as exc:
+        return jsonify({"success": False, "error": str(exc)}), 400
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
@@ -91,18 +186,18 @@ def create_notice():
                     400,
                 )
 
-        notice = Notice(
-            title=title,
-            content=content,
-            priority=priority,
-            expires_at=expires_at,
-            created_by=session["user_id"],
+        notice_dict = run_write(
+            _create_notice_job,
+            {
+                "title": title,
+                "content": content,
+                "priority": priority,
+                "expires_at": expires_at,
+            },
+            session["user_id"],
         )
 
-        db.session.add(notice)
-        db.session.commit()
-
-        return jsonify({"success": True, "notice": notice.to_dict()}), 201
+        return jsonify({"success": True, "notice": notice_dict}), 201
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
@@ -122,16 +217,15 @@ def update_notice(notice_id):
         if not data:
             return jsonify({"success": False, "error": "No data provided"}), 400
 
-        if "title" in data:
-            notice.title = data["title"]
-        if "content" in data:
-            notice.content = data["content"]
-        if "priority" in data:
-            notice.priority = data["priority"]
+        changes = {
+            field: data[field]
+            for field in ("title", "content", "priority")
+            if field in data
+        }
         if "expires_at" in data:
             if data["expires_at"]:
                 try:
-                    notice.expires_at = datetime.fromisoformat(
+                    changes["expires_at"] = datetime.fromisoformat(
                         data["expires_at"].replace("Z", "+00:00")
                     )
                 except ValueError:
@@ -142,11 +236,13 @@ def update_notice(notice_id):
                         400,
                     )
             else:
-                notice.expires_at = None
+                changes["expires_at"] = None
 
-        db.session.commit()
+        notice_dict = run_write(_update_notice_job, notice_id, changes)
+        if notice_dict is None:
+            return jsonify({"success": False, "error": "Notice not found"}), 404
 
-        return jsonify({"success": True, "notice": notice.to_dict()}), 200
+        return jsonify({"success": True, "notice": notice_dict}), 200
     except Exception:
         return jsonify({"success": False, "error": "Server error"}), 500
 
@@ -162,8 +258,7 @@ def delete_notice(notice_id):
         if session.get("role") != "admin" and notice.created_by != session["user_id"]:
             return jsonify({"success": False, "error": "Permission denied"}), 403
 
-        db.session.delete(notice)
-        db.session.commit()
+        run_write(_delete_notice_job, notice_id)
 
         return jsonify({"success": True, "message": "Notice deleted"}), 200
     except Exception:
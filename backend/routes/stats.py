@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify, session
+from sqlalchemy import func, select
+from database import db
+from models import User, Contact, Company, Notice
+from cache import per_app_cache
+
+bp = Blueprint("stats", __name__, url_prefix="/api/stats")
+
+# Notices expire without a write, so cached stats are also time-bounded
+STATS_TTL = 60
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+# Computed stats keyed by ``top``
+stats_cache = per_app_cache(
+    "stats_cache", "user", "contact", "company", "notice", maxsize=8, ttl=STATS_TTL
+)
+
+
+def admin_required(f):
+    """Decorator to require admin role"""
+
+    def wrapper(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"success": False, "error": "Authentication required"}), 401
+        if session.get("role") != "admin":
+            return jsonify({"success": False, "error": "Admin access required"}), 403
+        return f(*args, **kwargs)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+def compute_stats(top):
+    """Run the COUNT aggregates behind the dashboard"""
+    now = datetime.utcnow()
+
+    users_by_role = dict(
+        db.session.execute(select(User.role, func.count()).group_by(User.role)).all()
+    )
+
+    top_companies = db.session.execute(
+        select(Company.id, Company.name, func.count(Contact.id).label("contacts"))
+        .join(Contact, Contact.company_id == Company.id)
+        .group_by(Company.id, Company.name)
+        .order_by(func.count(Contact.id).desc(), Company.name)
+        .limit(top)
+    ).all()
+
+    return {
+        "contacts": db.session.scalar(select(func.count()).select_from(Contact)),
+        "companies": db.session.scalar(select(func.count()).select_from(Company)),
+        "users": {
+            "total": sum(users_by_role.values()),
+            "by_role": {
+                role: users_by_role.get(role, 0) for role in ("admin", "editor", "user")
+            },
+        },
+        "active_notices": db.session.scalar(
+            select(func.count())
+            .select_from(Notice)
+            .where(
+                Notice.is_active == True,
+                (Notice.expires_at.is_(None) | (Notice.expires_at > now)),
+            )
+        ),
+        "top_companies": [
+            {"id": company_id, "name": name, "contact_count": count}
+            for company_id, name, count in top_companies
+        ],
+    }
+
+
+@bp.route("", methods=["GET"])
+@admin_required
+def get_stats():
+    """Get dashboard counts"""
+    try:
+        top = max(1, min(int(request.args.get("top", DEFAULT_TOP)), MAX_TOP))
+
+        cache = stats_cache()
+        stats = cache.get(top)
+        if stats is None:
+            generation = cache.generation
+            stats = compute_stats(top)
+            cache.set(top, stats, generation=generation)
+
+        return jsonify({"stats": stats}), 200
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
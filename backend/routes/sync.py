@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify, session
+import sync
+
+bp = Blueprint("sync", __name__, url_prefix="/api/sync")
+
+
+def login_required(f):
+    """Decorator to require authentication"""
+
+    def wrapper(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"success": False, "error": "Authentication required"}), 401
+        return f(*args, **kwargs)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+@bp.route("", methods=["GET"])
+@login_required
+def get_changes():
+    """Get contacts, companies and notices changed or deleted since a token"""
+    try:
+        try:
+            since = int(request.args.get("since", 0))
+            limit = int(request.args.get("limit", sync.DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid token"}), 400
+        if since < 0:
+            return jsonify({"success": False, "error": "Invalid token"}), 400
+        limit = max(1, min(limit, sync.MAX_LIMIT))
+
+        if not sync.sync_enabled():
+            return (
+                jsonify({"success": False, "error": "Sync is not available"}),
+                501,
+            )
+
+        return jsonify(sync.changes_since(since, limit)), 200
+    except sync.TokenExpired:
+        return (
+            jsonify({"success": False, "error": "Token expired, full sync required"}),
+            410,
+        )
+    except Exception:
+        return jsonify({"success": False, "error": "Server error"}), 500
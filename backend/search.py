@@ -0,0 +1,192 @@
+"""
+Full-text search for contacts.
+
+On SQLite builds with FTS5 a ``contact_fts`` shadow table indexes the contact
+``search_key`` (normalized names, email, phone numbers and city), the notes
+and the normalized name of the linked company. It is kept in sync by
+triggers, so every write path (ORM or bulk SQL) updates it. Other backends
+fall back to a LIKE filter on ``search_key``.
+"""
+
+import re
+import weakref
+
+from sqlalchemy import column, event, false, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+
+from database import db
+from models import Contact
+from normalization import normalize_text
+
+FTS_TABLE = "contact_fts"
+
+# Lightweight handle used to join the virtual table into ORM queries
+contact_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+_FTS_COLUMNS = ("search_key", "notes", "company_name")
+
+_FTS_VALUES = (
+    "new.id, new.search_key, new.notes, "
+    "(SELECT search_key FROM company WHERE id = new.company_id)"
+)
+
+# Contact columns the index is built from; updates of others skip the trigger
+_CONTACT_SOURCE_COLUMNS = "search_key, notes, company_id"
+
+_FTS_TRIGGERS = (
+    "contact_fts_ai",
+    "contact_fts_ad",
+    "contact_fts_au",
+    "company_fts_au",
+    "company_fts_ad",
+)
+
+_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    + ", ".join(_FTS_COLUMNS)
+    + ", tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"""CREATE TRIGGER IF NOT EXISTS contact_fts_ai AFTER INSERT ON contact BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {", ".join(_FTS_COLUMNS)})
+        VALUES ({_FTS_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contact_fts_ad AFTER DELETE ON contact BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS contact_fts_au
+    AFTER UPDATE OF {_CONTACT_SOURCE_COLUMNS} ON contact BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, {", ".join(_FTS_COLUMNS)})
+        VALUES ({_FTS_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS company_fts_au
+    AFTER UPDATE OF search_key ON company BEGIN
+        UPDATE {FTS_TABLE} SET company_name = new.search_key
+        WHERE rowid IN (SELECT id FROM contact WHERE company_id = new.id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS company_fts_ad AFTER DELETE ON company BEGIN
+        UPDATE {FTS_TABLE} SET company_name = NULL
+        WHERE rowid IN (SELECT id FROM contact WHERE company_id = old.id);
+    END""",
+)
+
+_REBUILD_SQL = f"""
+    INSERT INTO {FTS_TABLE}(rowid, {", ".join(_FTS_COLUMNS)})
+    SELECT contact.id, contact.search_key, contact.notes, company.search_key
+    FROM contact LEFT OUTER JOIN company ON company.id = contact.company_id
+"""
+
+# engine -> whether the FTS table is usable on it
+_fts_engines = weakref.WeakKeyDictionary()
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _create_fts(target, connection, **kw):
+    """Create the FTS table and triggers after ``db.create_all()``"""
+    engine = connection.engine
+    if connection.dialect.name != "sqlite":
+        _fts_engines[engine] = False
+        return
+
+    existing_columns = [
+        row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({FTS_TABLE})")
+    ]
+    existed = bool(existing_columns)
+    if existed and tuple(existing_columns) != _FTS_COLUMNS:
+        # Indexed columns changed: drop the old table and triggers and reindex
+        for trigger in _FTS_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        connection.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+        existed = False
+
+    # Databases created before the update trigger was limited to the indexed
+    # columns get it replaced, so bookkeeping updates do not reindex rows
+    update_trigger = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+        "AND name = 'contact_fts_au'"
+    ).scalar()
+    if update_trigger and "UPDATE OF" not in update_trigger:
+        connection.exec_driver_sql("DROP TRIGGER contact_fts_au")
+
+    try:
+        for statement in _FTS_DDL:
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        # SQLite compiled without FTS5
+        _fts_engines[engine] = False
+        return
+
+    if not existed:
+        # Index rows that were written before the FTS table existed
+        connection.exec_driver_sql(_REBUILD_SQL)
+
+    _fts_engines[engine] = True
+
+
+event.listen(db.metadata, "after_create", _create_fts)
+
+
+def fts_enabled():
+    """Return True if the current engine has a usable FTS index"""
+    engine = db.engine
+    enabled = _fts_engines.get(engine)
+    if enabled is None:
+        enabled = False
+        if engine.dialect.name == "sqlite":
+            with engine.connect() as connection:
+                enabled = (
+                    connection.execute(
+                        text(
+                            "SELECT 1 FROM sqlite_master "
+                            "WHERE type = 'table' AND name = :name"
+                        ),
+                        {"name": FTS_TABLE},
+                    ).first()
+                    is not None
+                )
+        _fts_engines[engine] = enabled
+    return enabled
+
+
+def build_match_expression(search):
+    """Turn free user input into a safe FTS5 prefix query.
+
+    Each word becomes a quoted prefix term so that FTS operators typed by the
+    user are treated as plain text. Terms are implicitly ANDed.
+    """
+    tokens = _TOKEN_RE.findall(search)
+    return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def apply_contact_search(query, search, ranked=True):
+    """Filter and rank a Contact query by ``search``.
+
+    The search text is normalized like the stored ``search_key`` values.
+    Uses the FTS index when available, ordered by bm25 relevance unless
+    ``ranked`` is False, and falls back to substring matching on
+    ``search_key`` otherwise.
+    """
+    search = normalize_text(search)
+    if fts_enabled():
+        expression = build_match_expression(search)
+        if not expression:
+            return query.filter(false())
+        query = query.join(contact_fts, contact_fts.c.rowid == Contact.id).filter(
+            literal_column(FTS_TABLE).op("MATCH")(expression)
+        )
+        if ranked:
+            query = query.order_by(contact_fts.c.rank)
+        return query
+
+    if not search:
+        return query.filter(false())
+    return query.filter(Contact.search_key.contains(search, autoescape=True))
+
+
+def rebuild_index():
+    """Repopulate the FTS table from the contact and company tables"""
+    if not fts_enabled():
+        return
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+        connection.exec_driver_sql(_REBUILD_SQL)
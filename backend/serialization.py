@@ -0,0 +1,97 @@
+"""
+JSON encoding for API responses.
+
+``JSONProvider`` is Flask's default provider with ``orjson`` underneath
+when that package is installed. ``JSON_SERIALIZER`` picks the encoder:
+``"auto"`` (the default) uses orjson if it can be imported, ``"orjson"``
+requires it and ``"json"`` keeps the standard library. Anything orjson
+refuses (integers over 64 bits, NaN in request bodies, extra ``dumps``
+arguments) goes through the standard library instead, so both encoders
+accept the same values. Dates and times are written as ISO 8601, like the
+models' ``to_dict()``.
+
+``row_dicts`` renders rows of a Core ``select()`` of plain columns. List
+endpoints use it to skip loading ORM instances and calling ``to_dict()``;
+timestamps are left to the encoder.
+"""
+
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+
+SERIALIZERS = ("auto", "orjson", "json")
+
+
+def _load_orjson(serializer):
+    """Return the orjson module for ``serializer``, or None for stdlib json"""
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"JSON_SERIALIZER must be one of {', '.join(SERIALIZERS)}")
+    if serializer == "json":
+        return None
+    try:
+        import orjson
+    except ImportError:
+        if serializer == "orjson":
+            raise
+        return None
+    return orjson
+
+
+def _default(o):
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, encoding with orjson when it is available"""
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.orjson = _load_orjson(app.config.get("JSON_SERIALIZER", "auto"))
+
+    def _option(self, kwargs):
+        """orjson option flags for ``dumps`` arguments, or None if it cannot
+        honour them"""
+        orjson = self.orjson
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        for name, value in kwargs.items():
+            if name == "indent" and value == 2:
+                option |= orjson.OPT_INDENT_2
+            elif not (name == "separators" and value == (",", ":")):
+                return None
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if self.orjson is not None:
+            option = self._option(kwargs)
+            if option is not None:
+                try:
+                    return self.orjson.dumps(
+                        obj, default=self.default, option=option
+                    ).decode()
+                except TypeError:
+                    pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.orjson is not None and not kwargs:
+            try:
+                return self.orjson.loads(s)
+            except self.orjson.JSONDecodeError:
+                pass
+        return super().loads(s, **kwargs)
+
+
+def init_app(app):
+    """Install ``JSONProvider`` on ``app``"""
+    app.json = JSONProvider(app)
+
+
+def row_dicts(rows, keys):
+    """Return rows of column tuples as dicts with ``keys``"""
+    return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,179 @@
+"""
+In-memory prefix indexes for type-ahead suggestions.
+
+Each index is a sorted array of normalized names searched with ``bisect``,
+so a lookup costs O(log n) plus the number of suggestions returned. Indexes
+are built lazily per application on first use and then kept current by the
+create/update/delete handlers through ``contact_saved``/``contact_deleted``
+and ``company_saved``.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+
+from flask import current_app
+from sqlalchemy import select
+
+from database import db
+from models import Company, Contact
+from normalization import normalize_text
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+_build_lock = threading.Lock()
+
+
+class PrefixIndex:
+    """Sorted array of ``(key, id)`` pairs with a display label per id"""
+
+    def __init__(self):
+        self._keys = []
+        self._ids = []
+        self._labels = {}
+        self._entry_keys = {}
+        self._lock = threading.Lock()
+
+    def load(self, entries):
+        """Replace the contents with ``(id, keys, label)`` entries"""
+        pairs = []
+        labels = {}
+        entry_keys = {}
+        for entry_id, keys, label in entries:
+            keys = tuple(set(key for key in keys if key))
+            labels[entry_id] = label
+            entry_keys[entry_id] = keys
+            pairs.extend((key, entry_id) for key in keys)
+        pairs.sort()
+
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._ids = [entry_id for _, entry_id in pairs]
+            self._labels = labels
+            self._entry_keys = entry_keys
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, entry_id, keys, label):
+        """Insert or replace one entry"""
+        keys = tuple(set(key for key in keys if key))
+        with self._lock:
+            self._remove(entry_id)
+            for key in keys:
+                position = bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._ids.insert(position, entry_id)
+            self._labels[entry_id] = label
+            self._entry_keys[entry_id] = keys
+
+    def remove(self, entry_id):
+        """Drop one entry if present"""
+        with self._lock:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id):
+        for key in self._entry_keys.pop(entry_id, ()):
+            position = bisect_left(self._keys, key)
+            while self._ids[position] != entry_id:
+                position += 1
+            del self._keys[position]
+            del self._ids[position]
+        self._labels.pop(entry_id, None)
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` ``(id, label)`` pairs whose key starts with
+        ``prefix``, in key order"""
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit:
+                if not self._keys[position].startswith(prefix):
+                    break
+                entry_id = self._ids[position]
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    results.append((entry_id, self._labels[entry_id]))
+                position += 1
+        return results
+
+
+def contact_keys(first_name, last_name):
+    """Contacts are suggested by "first last" and by "last first" """
+    first, last = normalize_text(first_name), normalize_text(last_name)
+    return (f"{first} {last}".strip(), f"{last} {first}".strip())
+
+
+def _contact_entries():
+    rows = db.session.execute(select(Contact.id, Contact.first_name, Contact.last_name))
+    for contact_id, first_name, last_name in rows:
+        yield (
+            contact_id,
+            contact_keys(first_name, last_name),
+            f"{first_name} {last_name}",
+        )
+
+
+def _company_entries():
+    rows = db.session.execute(select(Company.id, Company.name))
+    for company_id, name in rows:
+        yield company_id, (normalize_text(name),), name
+
+
+_LOADERS = {"contacts": _contact_entries, "companies": _company_entries}
+
+
+def _loaded_index(name):
+    return current_app.extensions.get("suggest", {}).get(name)
+
+
+def get_index(name):
+    """Return the ``contacts`` or ``companies`` index, building it on first use"""
+    index = _loaded_index(name)
+    if index is None:
+        with _build_lock:
+            indexes = current_app.extensions.setdefault("suggest", {})
+            index = indexes.get(name)
+            if index is None:
+                index = PrefixIndex()
+                index.load(_LOADERS[name]())
+                indexes[name] = index
+    return index
+
+
+def suggest(name, query, limit=DEFAULT_LIMIT):
+    """Return ``{"id", "name"}`` suggestions for a raw user query"""
+    prefix = normalize_text(query)
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    return [
+        {"id": entry_id, "name": label}
+        for entry_id, label in get_index(name).search(prefix, limit)
+    ]
+
+
+def contact_saved(contact_id, first_name, last_name):
+    """Update the contacts index after a create or update"""
+    index = _loaded_index("contacts")
+    if index is not None:
+        index.add(
+            contact_id,
+            contact_keys(first_name, last_name),
+            f"{first_name} {last_name}",
+        )
+
+
+def contact_deleted(contact_id):
+    """Update the contacts index after a delete"""
+    index = _loaded_index("contacts")
+    if index is not None:
+        index.remove(contact_id)
+
+
+def company_saved(company_id, name):
+    """Update the companies index after a create or update"""
+    index = _loaded_index("companies")
+    if index is not None:
+        index.add(company_id, (normalize_text(name),), name)
@@ -0,0 +1,267 @@
+"""
+Change tracking for incremental client sync.
+
+Every insert and update of a contact, company or notice takes the next
+number of one database-wide sequence (``sync_counter``) and stores it in
+the row's indexed ``change_seq`` column. Every delete records the number
+in a ``tombstone`` row. SQLite triggers do the bookkeeping, so every
+write path (ORM, bulk SQL, imports) is covered. Because SQLite commits
+one writer at a time, the numbers grow in commit order.
+
+A client keeps the last token it was given and asks for everything after
+it. When nothing changed, a request costs one primary-key probe of
+``sync_counter``. Other backends do not get the triggers, and sync reports
+itself unavailable there.
+"""
+
+import weakref
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    event,
+    func,
+    select,
+    text,
+)
+
+from database import db
+from models import Company, Contact, Notice
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+# table name -> (API name, model)
+SYNCED = {
+    "contact": ("contacts", Contact),
+    "company": ("companies", Company),
+    "notice": ("notices", Notice),
+}
+
+sync_counter = db.Table(
+    "sync_counter",
+    Column("id", Integer, primary_key=True),
+    Column("value", Integer, nullable=False),
+    # Tombstones up to here were pruned; older tokens need a full sync
+    Column("pruned_through", Integer, nullable=False),
+)
+
+tombstone = db.Table(
+    "tombstone",
+    Column("change_seq", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("deleted_at", DateTime, nullable=False),
+    # Newest delete per entity, for table versions (etags.py)
+    Index("ix_tombstone_entity_seq", "entity", "change_seq"),
+)
+
+_NEXT = "UPDATE sync_counter SET value = value + 1 WHERE id = 1;"
+_CURRENT = "(SELECT value FROM sync_counter WHERE id = 1)"
+
+
+def _trigger_ddl(table):
+    return (
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_sync_ai
+        AFTER INSERT ON {table} BEGIN
+            {_NEXT}
+            UPDATE {table} SET change_seq = {_CURRENT} WHERE id = new.id;
+        END""",
+        # The WHEN clause keeps the trigger's own update from firing it again
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_sync_au
+        AFTER UPDATE ON {table} WHEN new.change_seq IS old.change_seq BEGIN
+            {_NEXT}
+            UPDATE {table} SET change_seq = {_CURRENT} WHERE id = new.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_sync_ad
+        AFTER DELETE ON {table} BEGIN
+            {_NEXT}
+            INSERT INTO tombstone (change_seq, entity, entity_id, deleted_at)
+            VALUES ({_CURRENT}, '{table}', old.id, CURRENT_TIMESTAMP);
+        END""",
+    )
+
+
+# engine -> whether change tracking is installed on it
+_sync_engines = weakref.WeakKeyDictionary()
+
+
+class TokenExpired(ValueError):
+    """Raised for a token this database can no longer continue from"""
+
+
+def _install(target, connection, **kw):
+    """Create the counter row, number existing rows and add the triggers"""
+    if connection.dialect.name != "sqlite":
+        _sync_engines[connection.engine] = False
+        return
+
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO sync_counter (id, value, pruned_through) "
+        "VALUES (1, 0, 0)"
+    )
+    for table in SYNCED:
+        # Rows written before change tracking existed get numbers in id order
+        connection.exec_driver_sql(
+            f"UPDATE {table} SET change_seq = {_CURRENT} + id "
+            "WHERE change_seq IS NULL"
+        )
+        connection.exec_driver_sql(
+            "UPDATE sync_counter SET value = max(value, "
+            f"(SELECT coalesce(max(change_seq), 0) FROM {table})) WHERE id = 1"
+        )
+        for statement in _trigger_ddl(table):
+            connection.exec_driver_sql(statement)
+    _sync_engines[connection.engine] = True
+
+
+event.listen(db.metadata, "after_create", _install)
+
+
+def sync_enabled():
+    """Return True if the current engine tracks changes"""
+    engine = db.engine
+    enabled = _sync_engines.get(engine)
+    if enabled is None:
+        enabled = False
+        if engine.dialect.name == "sqlite":
+            with engine.connect() as connection:
+                enabled = (
+                    connection.execute(
+                        text(
+                            "SELECT 1 FROM sqlite_master "
+                            "WHERE type = 'trigger' AND name = 'contact_sync_ai'"
+                        )
+                    ).first()
+                    is not None
+                )
+        _sync_engines[engine] = enabled
+    return enabled
+
+
+def current_token():
+    """Return the number of the newest change"""
+    return db.session.scalar(select(sync_counter.c.value).where(sync_counter.c.id == 1))
+
+
+def change_log(after, limit=DEFAULT_LIMIT):
+    """Return ``(seq, entity, id, op)`` for changes after ``after``.
+
+    At most ``limit`` entries, oldest first; ``op`` is ``"upsert"`` or
+    ``"delete"``. Only ids are read, so this stays cheap for pollers. A row
+    changed several times appears once, at its latest number.
+    """
+    changes = []
+    for name, model in SYNCED.values():
+        rows = db.session.execute(
+            select(model.change_seq, model.id)
+            .where(model.change_seq > after)
+            .order_by(model.change_seq)
+            .limit(limit)
+        )
+        changes.extend((seq, name, row_id, "upsert") for seq, row_id in rows)
+    deletes = db.session.execute(
+        select(tombstone.c.change_seq, tombstone.c.entity, tombstone.c.entity_id)
+        .where(tombstone.c.change_seq > after)
+        .order_by(tombstone.c.change_seq)
+        .limit(limit)
+    )
+    changes.extend(
+        (seq, SYNCED[entity][0], entity_id, "delete")
+        for seq, entity, entity_id in deletes
+    )
+    changes.sort()
+    return changes[:limit]
+
+
+def changes_since(since, limit=DEFAULT_LIMIT):
+    """Return the changes after token ``since`` as a response dict.
+
+    At most ``limit`` rows and tombstones are returned, oldest first. When
+    more are pending, ``has_more`` is set and ``token`` points at the last
+    change included.
+    """
+    counter = db.session.execute(
+        select(sync_counter.c.value, sync_counter.c.pruned_through).where(
+            sync_counter.c.id == 1
+        )
+    ).one()
+    # Tokens from before a prune, or from the future after a restore from
+    # backup, cannot be continued
+    if 0 < since < counter.pruned_through or since > counter.value:
+        raise TokenExpired(since)
+
+    response = {name: [] for name, _ in SYNCED.values()}
+    response["deleted"] = {name: [] for name, _ in SYNCED.values()}
+    if since == counter.value:
+        response.update(token=counter.value, has_more=False)
+        return response
+
+    # Read one past the limit from every source, then keep the oldest
+    changes = []
+    for name, model in SYNCED.values():
+        rows = db.session.scalars(
+            select(model)
+            .where(model.change_seq > since, model.change_seq <= counter.value)
+            .order_by(model.change_seq)
+            .limit(limit + 1)
+        )
+        changes.extend((row.change_seq, name, row) for row in rows)
+    if since > 0:
+        # A full sync starts from an empty mirror, so it needs no deletes
+        deletes = db.session.execute(
+            select(tombstone.c.change_seq, tombstone.c.entity, tombstone.c.entity_id)
+            .where(
+                tombstone.c.change_seq > since,
+                tombstone.c.change_seq <= counter.value,
+            )
+            .order_by(tombstone.c.change_seq)
+            .limit(limit + 1)
+        )
+        changes.extend(
+            (seq, SYNCED[entity][0], entity_id) for seq, entity, entity_id in deletes
+        )
+
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    present = {(name, row.id) for _, name, row in changes if not isinstance(row, int)}
+    for seq, name, item in changes:
+        if isinstance(item, int):
+            # A deleted id that was reused by a later insert is not deleted
+            if (name, item) not in present:
+                response["deleted"][name].append(item)
+        else:
+            response[name].append(item.to_dict())
+
+    token = changes[-1][0] if has_more else counter.value
+    response.update(token=token, has_more=has_more)
+    return response
+
+
+def prune_tombstones(connection, days):
+    """Delete tombstones older than ``days``; return how many were removed.
+
+    Clients whose token is older than the newest pruned tombstone are asked
+    to do a full sync.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    newest = connection.scalar(
+        select(func.max(tombstone.c.change_seq)).where(tombstone.c.deleted_at < cutoff)
+    )
+    if newest is None:
+        return 0
+    removed = connection.execute(
+        tombstone.delete().where(tombstone.c.change_seq <= newest)
+    ).rowcount
+    connection.execute(
+        sync_counter.update()
+        .where(sync_counter.c.id == 1)
+        .values(pruned_through=newest)
+    )
+    return removed
@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+from app import create_app, db, init_db
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+from load import percentile  # noqa: E402
+from seed import ADMIN_USERNAME, PASSWORD, seed  # noqa: E402
+
+
+class TestBenchmarkSeed:
+    """Test the synthetic dataset used by the load benchmark"""
+
+    def setup_method(self):
+        """Seed a small in-memory dataset"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        with self.app.app_context():
+            init_db(self.app)
+            self.summary = seed(
+                db.engine, users=5, companies=20, contacts=300, notices=10
+            )
+        self.client = self.app.test_client()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": ADMIN_USERNAME, "password": PASSWORD}),
+            content_type="application/json",
+        )
+
+    def test_counts(self):
+        """Test that the requested number of rows is created"""
+        response = self.client.get("/api/stats")
+        assert response.status_code == 200
+        stats = json.loads(response.data)["stats"]
+        assert stats["contacts"] == self.summary["contacts"] == 300
+        assert stats["companies"] == 20
+        assert stats["users"] == {
+            "total": 5,
+            "by_role": {"admin": 1, "editor": 1, "user": 3},
+        }
+
+    def test_derived_columns_are_searchable(self):
+        """Test that seeded contacts are found by search and phone lookup"""
+        contacts = json.loads(self.client.get("/api/contacts?per_page=1").data)
+        contact = contacts["contacts"][0]
+
+        response = self.client.get(f"/api/contacts?search={contact['last_name']}")
+        assert json.loads(response.data)["pagination"]["total"] >= 1
+
+        response = self.client.get(f"/api/lookup/phone/{contact['mobile']}")
+        assert response.status_code == 200
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        samples = list(range(1, 101))
+        assert percentile(samples, 0.50) == 50
+        assert percentile(samples, 0.95) == 95
+        assert percentile(samples, 0.99) == 99
+        assert percentile([7], 0.99) == 7
+        assert percentile([], 0.5) is None
@@ -0,0 +1,271 @@
+import json
+
+from app import create_app, db
+from models import Company, Contact, User
+import bulk
+
+
+class TestBulkContacts:
+    """Test the POST /api/contacts/bulk endpoint"""
+
+    def setup_method(self):
+        """Set up test app, users, a company and some contacts"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            for username, role in (("editor", "editor"), ("viewer", "user")):
+                user = User(
+                    username=username, email=f"{username}@example.com", role=role
+                )
+                user.set_password("password123")
+                db.session.add(user)
+            db.session.flush()
+            company = Company(name="Acme", created_by=1)
+            db.session.add(company)
+            db.session.flush()
+            self.company_id = company.id
+            for index in range(3):
+                db.session.add(
+                    Contact(first_name=f"Old{index}", last_name="Row", created_by=1)
+                )
+            db.session.add(Contact(first_name="Own", last_name="Row", created_by=2))
+            db.session.commit()
+        self.login(self.client, "editor")
+
+    def login(self, client, username):
+        """Helper logging ``client`` in"""
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": username, "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def post(self, body, client=None):
+        """Helper posting a bulk request; returns status and body"""
+        response = (client or self.client).post(
+            "/api/contacts/bulk",
+            data=json.dumps(body),
+            content_type="application/json",
+        )
+        return response.status_code, json.loads(response.data), response
+
+    def test_mixed_operations(self):
+        """Test creates, updates and deletes applied together"""
+        status, data, _ = self.post(
+            {
+                "operations": [
+                    {
+                        "op": "create",
+                        "data": {
+                            "first_name": "Ali",
+                            "last_name": "Rezaei",
+                            "mobile": "0912 111 2222",
+                            "company_id": self.company_id,
+                        },
+                    },
+                    {"op": "update", "id": 1, "data": {"email": "old0@example.com"}},
+                    {"op": "update", "id": 2, "data": {"company_id": self.company_id}},
+                    {"op": "delete", "id": 3},
+                ]
+            }
+        )
+        assert status == 200
+        assert data["success"] is True
+        assert data["summary"] == {
+            "created": 1,
+            "updated": 2,
+            "deleted": 1,
+            "failed": 0,
+        }
+        assert [result["op"] for result in data["results"]] == [
+            "create",
+            "update",
+            "update",
+            "delete",
+        ]
+        new_id = data["results"][0]["id"]
+
+        with self.app.app_context():
+            created = db.session.get(Contact, new_id)
+            assert created.created_by == 1
+            assert created.company_id == self.company_id
+            assert created.mobile_rev is not None
+            assert db.session.get(Contact, 1).email == "old0@example.com"
+            assert db.session.get(Contact, 2).company_id == self.company_id
+            assert db.session.get(Contact, 3) is None
+
+        # Derived columns and the in-memory indexes follow the changes
+        response = self.client.get("/api/contacts?search=old0@example.com")
+        assert json.loads(response.data)["pagination"]["total"] == 1
+        response = self.client.get("/api/contacts?search=2222")
+        assert json.loads(response.data)["contacts"][0]["id"] == new_id
+        response = self.client.get("/api/contacts/suggest?q=Ali")
+        suggestions = json.loads(response.data)["suggestions"]
+        assert new_id in [item["id"] for item in suggestions]
+
+    def test_update_keeps_company_in_fuzzy_index(self):
+        """Test that an update not naming the company keeps its fuzzy hits"""
+
+        def fuzzy_ids(term):
+            response = self.client.get(
+                "/api/contacts", query_string={"search": term, "fuzzy": 1}
+            )
+            return [item["id"] for item in json.loads(response.data)["contacts"]]
+
+        self.post(
+            {
+                "operations": [
+                    {"op": "update", "id": 1, "data": {"company_id": self.company_id}}
+                ]
+            }
+        )
+        assert fuzzy_ids("Acme") == [1]
+        status, _, _ = self.post(
+            {"operations": [{"op": "update", "id": 1, "data": {"first_name": "Alii"}}]}
+        )
+        assert status == 200
+        assert fuzzy_ids("Acme") == [1]
+
+    def test_atomic_mode_writes_nothing_on_error(self):
+        """Test that one invalid operation rejects the whole request"""
+        status, data, _ = self.post(
+            {
+                "operations": [
+                    {"op": "create", "data": {"first_name": "A", "last_name": "B"}},
+                    {"op": "update", "id": 99, "data": {"city": "Tehran"}},
+                    {"op": "delete", "id": 1},
+                    {"op": "create", "data": {"first_name": "A", "company_id": 42}},
+                ]
+            }
+        )
+        assert status == 400
+        assert data["applied"] is False
+        assert data["summary"]["failed"] == 4
+        errors = [result["error"] for result in data["results"]]
+        assert errors[1] == "Contact not found"
+        assert errors[3] == "First name and last name required"
+        assert errors[0] == errors[2]
+        with self.app.app_context():
+            assert db.session.query(Contact).count() == 4
+
+    def test_partial_mode_applies_valid_operations(self):
+        """Test per-operation errors in partial mode"""
+        status, data, _ = self.post(
+            {
+                "mode": "partial",
+                "operations": [
+                    {"op": "create", "data": {"first_name": "A", "last_name": "B"}},
+                    {
+                        "op": "create",
+                        "data": {"first_name": "C", "last_name": "D", "company_id": 42},
+                    },
+                    {"op": "update", "id": 1, "data": {"first_name": ""}},
+                    {"op": "delete", "id": 2},
+                    {"op": "update", "id": 2, "data": {"city": "Tehran"}},
+                    {"op": "rename", "id": 1},
+                    {"op": "update", "id": 4, "data": {"phone": 123}},
+                ],
+            }
+        )
+        assert status == 200
+        assert data["success"] is False
+        assert data["applied"] is True
+        assert data["summary"] == {
+            "created": 1,
+            "updated": 0,
+            "deleted": 1,
+            "failed": 5,
+        }
+        assert [result.get("error") for result in data["results"]] == [
+            None,
+            "Invalid company_id",
+            "First name and last name required",
+            None,
+            "Contact appears in more than one operation",
+            "op must be create, update or delete",
+            "phone must be a string",
+        ]
+        with self.app.app_context():
+            assert db.session.get(Contact, 2) is None
+            assert db.session.get(Contact, 1).first_name == "Old0"
+
+    def test_query_count_does_not_grow_with_operations(self):
+        """Test that validation and writes use a fixed number of statements"""
+        counts = []
+        for size in (3, 300):
+            operations = [
+                {
+                    "op": "create",
+                    "data": {
+                        "first_name": f"N{i}",
+                        "last_name": "Bulk",
+                        "company_id": self.company_id,
+                    },
+                }
+                for i in range(size)
+            ]
+            status, data, _ = self.post({"operations": operations})
+            assert status == 200
+            ids = [result["id"] for result in data["results"]]
+            with self.app.app_context():
+                names = dict(db.session.query(Contact.id, Contact.first_name))
+            assert [names[i] for i in ids] == [f"N{i}" for i in range(size)]
+            # Two column sets for the updates, then one delete
+            operations = [
+                {"op": "update", "id": ids[0], "data": {"city": "Tehran"}},
+                {"op": "delete", "id": ids[-1]},
+            ]
+            operations += [
+                {"op": "update", "id": i, "data": {"notes": "x"}} for i in ids[1:-1]
+            ]
+            status, data, response = self.post({"operations": operations})
+            assert status == 200
+            assert data["summary"]["failed"] == 0
+            counts.append(int(response.headers["X-Query-Count"]))
+        assert counts[0] == counts[1]
+
+    def test_permissions(self):
+        """Test that plain users may only change their own contacts"""
+        client = self.app.test_client()
+        self.login(client, "viewer")
+        status, data, _ = self.post(
+            {
+                "mode": "partial",
+                "operations": [
+                    {"op": "create", "data": {"first_name": "A", "last_name": "B"}},
+                    {"op": "update", "id": 4, "data": {"city": "Tehran"}},
+                    {"op": "delete", "id": 1},
+                ],
+            },
+            client,
+        )
+        assert status == 200
+        assert [result.get("error") for result in data["results"]] == [
+            "Editor or admin access required",
+            None,
+            "Permission denied",
+        ]
+        response = self.app.test_client().post("/api/contacts/bulk", json={})
+        assert response.status_code == 401
+
+    def test_bad_requests(self):
+        """Test request-level validation"""
+        for body in (
+            [],
+            {},
+            {"operations": []},
+            {"operations": [{"op": "delete", "id": 1}], "mode": "maybe"},
+            {"operations": [{"op": "delete", "id": 1}] * (bulk.MAX_OPERATIONS + 1)},
+        ):
+            status, data, _ = self.post(body)
+            assert status == 400
+            assert data["success"] is False
+        with self.app.app_context():
+            assert db.session.query(Contact).count() == 4
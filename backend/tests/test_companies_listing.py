@@ -0,0 +1,140 @@
+import json
+from datetime import datetime, timedelta
+from app import create_app, db
+
+
+class TestCompaniesListing:
+    """Test pagination, search, sorting and views of GET /api/companies"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Company, Contact
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+
+            start = datetime(2024, 1, 1)
+            rows = [
+                ("Acme", "Manufacturing", "Tehran"),
+                ("Globex", "Energy", "Shiraz"),
+                ("شركت نمونه", "Software", "Tehran"),
+                ("Initech", "Software", "Isfahan"),
+                ("Umbrella", "Pharma", "Tabriz"),
+            ]
+            companies = [
+                Company(
+                    name=name,
+                    industry=industry,
+                    city=city,
+                    description="long text " * 50,
+                    created_at=start + timedelta(days=i),
+                    created_by=user.id,
+                )
+                for i, (name, industry, city) in enumerate(rows)
+            ]
+            db.session.add_all(companies)
+            db.session.flush()
+            self.acme_id = companies[0].id
+            db.session.add_all(
+                Contact(
+                    first_name=f"P{i}",
+                    last_name="X",
+                    company_id=self.acme_id,
+                    created_by=user.id,
+                )
+                for i in range(3)
+            )
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def get(self, **params):
+        """Helper to fetch the companies listing"""
+        response = self.client.get("/api/companies", query_string=params)
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def names(self, data):
+        """Helper returning company names in response order"""
+        return [c["name"] for c in data["companies"]]
+
+    def test_unpaginated_by_default(self):
+        """Test that without page, per_page or cursor every company is
+        returned, as before pagination"""
+        from models import Company
+
+        with self.app.app_context():
+            for i in range(25):
+                db.session.add(Company(name=f"Extra {i:02d}", created_by=1))
+            db.session.commit()
+        data = self.get()
+        assert len(data["companies"]) == 30
+        assert "pagination" not in data
+        summary = self.get(view="summary")["companies"]
+        assert len(summary) == 30
+        assert summary[0] == {"id": self.acme_id, "name": "Acme", "contact_count": 3}
+        assert len(self.get(page=1)["companies"]) == 20
+
+    def test_paginated_by_name(self):
+        """Test default sort and page metadata"""
+        data = self.get(per_page=2, page=2)
+        assert self.names(data) == ["Initech", "Umbrella"]
+        assert data["pagination"]["total"] == 5
+        assert data["pagination"]["pages"] == 3
+
+    def test_sort_by_created_at_desc(self):
+        """Test descending sort on creation time"""
+        data = self.get(sort="-created_at", per_page=2)
+        assert self.names(data) == ["Umbrella", "Initech"]
+
+    def test_cursor_pages(self):
+        """Test keyset pagination on a datetime sort key"""
+        seen = []
+        data = self.get(sort="-created_at", cursor="", per_page=2)
+        while True:
+            seen += self.names(data)
+            if data["pagination"]["next_cursor"] is None:
+                break
+            data = self.get(
+                sort="-created_at",
+                cursor=data["pagination"]["next_cursor"],
+                per_page=2,
+            )
+        assert seen == ["Umbrella", "Initech", "شركت نمونه", "Globex", "Acme"]
+
+    def test_search_and_filters(self):
+        """Test name, industry and city matching"""
+        assert self.names(self.get(search="شرکت")) == ["شركت نمونه"]
+        assert self.names(self.get(search="software")) == ["Initech", "شركت نمونه"]
+        assert self.names(self.get(search="shiraz")) == ["Globex"]
+        assert self.names(self.get(city="Tehran")) == ["Acme", "شركت نمونه"]
+        assert self.names(self.get(industry="Pharma")) == ["Umbrella"]
+
+    def test_summary_view(self):
+        """Test the compact id/name/contact_count view"""
+        data = self.get(view="summary", per_page=2)
+        assert data["companies"] == [
+            {"id": self.acme_id, "name": "Acme", "contact_count": 3},
+            {"id": data["companies"][1]["id"], "name": "Globex", "contact_count": 0},
+        ]
+
+    def test_invalid_sort(self):
+        """Test that unknown sort keys are rejected"""
+        response = self.client.get("/api/companies?sort=description")
+        assert response.status_code == 400
@@ -0,0 +1,112 @@
+import json
+from app import create_app, db
+
+
+class TestContactSearch:
+    """Test full-text search on GET /api/contacts"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User
+
+            self.test_user = User(
+                username="editor", email="editor@example.com", role="editor"
+            )
+            self.test_user.set_password("password123")
+            db.session.add(self.test_user)
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def create_contact(self, **fields):
+        """Helper to create a contact and return its id"""
+        response = self.client.post(
+            "/api/contacts", data=json.dumps(fields), content_type="application/json"
+        )
+        return json.loads(response.data)["contact"]["id"]
+
+    def search(self, term):
+        """Helper returning the ids matched by a search term"""
+        response = self.client.get("/api/contacts", query_string={"search": term})
+        assert response.status_code == 200
+        return [c["id"] for c in json.loads(response.data)["contacts"]]
+
+    def test_fts_index_is_created(self):
+        """Test that SQLite builds get the FTS shadow table"""
+        from search import fts_enabled
+
+        with self.app.app_context():
+            assert fts_enabled()
+
+    def test_search_matches_name_prefix_and_other_fields(self):
+        """Test that search covers names, phone, city and notes"""
+        john = self.create_contact(
+            first_name="John", last_name="Doe", phone="+1-555-0123", city="Tehran"
+        )
+        jane = self.create_contact(
+            first_name="Jane", last_name="Smith", notes="Met at the expo"
+        )
+
+        assert self.search("joh") == [john]
+        assert self.search("0123") == [john]
+        assert self.search("tehran") == [john]
+        assert self.search("expo") == [jane]
+        assert self.search("nobody") == []
+
+    def test_search_matches_company_name(self):
+        """Test that the linked company name is indexed and kept in sync"""
+        response = self.client.post(
+            "/api/companies",
+            data=json.dumps({"name": "Acme Corp"}),
+            content_type="application/json",
+        )
+        company_id = json.loads(response.data)["company"]["id"]
+        contact_id = self.create_contact(
+            first_name="Bob", last_name="Wilson", company_id=company_id
+        )
+
+        assert self.search("acme") == [contact_id]
+
+        self.client.put(
+            f"/api/contacts/{contact_id}",
+            data=json.dumps({"company_id": None}),
+            content_type="application/json",
+        )
+        assert self.search("acme") == []
+
+    def test_search_follows_updates_and_deletes(self):
+        """Test that the index follows contact updates and deletes"""
+        contact_id = self.create_contact(first_name="Alice", last_name="Brown")
+
+        self.client.put(
+            f"/api/contacts/{contact_id}",
+            data=json.dumps({"last_name": "Green"}),
+            content_type="application/json",
+        )
+        assert self.search("brown") == []
+        assert self.search("green") == [contact_id]
+
+        self.client.delete(f"/api/contacts/{contact_id}")
+        assert self.search("green") == []
+
+    def test_search_ignores_fts_syntax(self):
+        """Test that FTS operators in user input do not cause errors"""
+        contact_id = self.create_contact(first_name="Sara", last_name="Ahmadi")
+
+        assert self.search('"sara') == [contact_id]
+        assert self.search("ahmadi) NEAR(") == []
+        assert self.search("***") == []
@@ -0,0 +1,112 @@
+import json
+from app import create_app, db
+
+
+class TestContactsCursorPagination:
+    """Test keyset pagination on GET /api/contacts"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Contact
+
+            self.test_user = User(
+                username="editor", email="editor@example.com", role="editor"
+            )
+            self.test_user.set_password("password123")
+            db.session.add(self.test_user)
+            db.session.flush()
+
+            names = [("Zed", "Adams"), ("Amy", "Adams"), ("Bob", "Brown")]
+            names += [(f"Person{i:02d}", "Clark") for i in range(10)]
+            db.session.add_all(
+                Contact(first_name=first, last_name=last, created_by=self.test_user.id)
+                for first, last in names
+            )
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def get_page(self, **params):
+        """Helper to fetch one page of contacts"""
+        response = self.client.get("/api/contacts", query_string=params)
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def test_cursor_walks_all_rows_in_name_order(self):
+        """Test that following next_cursor visits every contact once, in order"""
+        seen = []
+        data = self.get_page(cursor="", per_page=4)
+        while True:
+            seen += [(c["last_name"], c["first_name"]) for c in data["contacts"]]
+            cursor = data["pagination"]["next_cursor"]
+            if cursor is None:
+                break
+            data = self.get_page(cursor=cursor, per_page=4)
+
+        assert len(seen) == 13
+        assert seen == sorted(seen)
+        assert seen[:3] == [("Adams", "Amy"), ("Adams", "Zed"), ("Brown", "Bob")]
+
+    def test_total_only_when_requested(self):
+        """Test that the exact total is opt-in in cursor mode"""
+        data = self.get_page(cursor="", per_page=5)
+        assert "total" not in data["pagination"]
+
+        data = self.get_page(cursor="", per_page=5, include_total=1)
+        assert data["pagination"]["total"] == 13
+
+    def test_cursor_with_search(self):
+        """Test that cursor mode combines with the search filter"""
+        data = self.get_page(cursor="", per_page=2, search="clark")
+        assert len(data["contacts"]) == 2
+        data = self.get_page(
+            cursor=data["pagination"]["next_cursor"], per_page=20, search="clark"
+        )
+        assert len(data["contacts"]) == 8
+        assert data["pagination"]["next_cursor"] is None
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get("/api/contacts?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    def test_offset_pagination_unchanged(self):
+        """Test that page/per_page still returns page metadata"""
+        data = self.get_page(page=2, per_page=5)
+        assert data["pagination"]["page"] == 2
+        assert data["pagination"]["total"] == 13
+        assert len(data["contacts"]) == 5
+
+    def test_sort_key_is_served_by_index(self):
+        """Test that the keyset seek uses the composite name index"""
+        from pagination import keyset_page
+        from models import Contact
+        from routes.contacts import CONTACT_SORT_KEY
+
+        with self.app.app_context():
+            _, cursor = keyset_page(Contact.query, CONTACT_SORT_KEY, "", 3)
+            query = Contact.query.order_by(*CONTACT_SORT_KEY)
+            sql = str(
+                query.statement.compile(
+                    db.engine, compile_kwargs={"literal_binds": True}
+                )
+            )
+            plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+            details = " ".join(row[-1] for row in plan)
+            assert cursor is not None
+            assert "ix_contact_name_order" in details
+            assert "TEMP B-TREE" not in details
@@ -0,0 +1,110 @@
+import json
+from app import create_app, db
+from instrumentation import QUERY_COUNT_HEADER
+
+
+class TestContactsQueryCount:
+    """Test that contact endpoints run a constant number of queries"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Company
+
+            self.test_user = User(
+                username="editor", email="editor@example.com", role="editor"
+            )
+            self.test_user.set_password("password123")
+            db.session.add(self.test_user)
+            db.session.flush()
+            self.company_ids = []
+            for i in range(3):
+                company = Company(name=f"Company {i}", created_by=self.test_user.id)
+                db.session.add(company)
+                db.session.flush()
+                self.company_ids.append(company.id)
+            self.user_id = self.test_user.id
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def add_contacts(self, count):
+        """Helper to insert contacts spread over the test companies"""
+        from models import Contact
+
+        with self.app.app_context():
+            db.session.add_all(
+                Contact(
+                    first_name=f"First{i}",
+                    last_name=f"Last{i}",
+                    company_id=self.company_ids[i % len(self.company_ids)],
+                    created_by=self.user_id,
+                )
+                for i in range(count)
+            )
+            db.session.commit()
+
+    def query_count(self, response):
+        """Helper to read the per-request query count"""
+        return int(response.headers[QUERY_COUNT_HEADER])
+
+    def test_list_is_constant_query(self):
+        """Test that page size does not change the number of queries"""
+        self.add_contacts(3)
+        small = self.client.get("/api/contacts?per_page=100")
+        self.add_contacts(60)
+        large = self.client.get("/api/contacts?per_page=100")
+
+        assert len(json.loads(large.data)["contacts"]) == 63
+        assert all("company" in c for c in json.loads(large.data)["contacts"])
+        assert self.query_count(small) == self.query_count(large)
+
+    def test_cursor_list_is_constant_query(self):
+        """Test that cursor pages are constant-query too"""
+        self.add_contacts(3)
+        small = self.client.get("/api/contacts?cursor=&per_page=100")
+        self.add_contacts(60)
+        large = self.client.get("/api/contacts?cursor=&per_page=100")
+
+        assert self.query_count(small) == self.query_count(large)
+
+    def test_create_and_update_do_not_reload(self):
+        """Test that create/update serialize the company without re-querying"""
+        response = self.client.post(
+            "/api/contacts",
+            data=json.dumps(
+                {
+                    "first_name": "Jane",
+                    "last_name": "Smith",
+                    "company_id": self.company_ids[0],
+                }
+            ),
+            content_type="application/json",
+        )
+        data = json.loads(response.data)
+        assert data["contact"]["company"]["name"] == "Company 0"
+        # company lookup, insert
+        assert self.query_count(response) <= 2
+
+        response = self.client.put(
+            f"/api/contacts/{data['contact']['id']}",
+            data=json.dumps({"company_id": self.company_ids[1]}),
+            content_type="application/json",
+        )
+        data = json.loads(response.data)
+        assert data["contact"]["company"]["name"] == "Company 1"
+        # contact lookup, company lookup, update
+        assert self.query_count(response) <= 3
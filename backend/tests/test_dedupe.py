@@ -0,0 +1,213 @@
+import json
+
+from sqlalchemy import select
+
+from app import create_app, db
+from models import Company, Contact, User
+import dedupe
+
+
+class TestDedupeKeys:
+    """Test blocking keys, candidate generation and scoring"""
+
+    def test_phonetic_key_across_spellings(self):
+        """Test that spelling variants and scripts share a phonetic code"""
+        assert dedupe.phonetic_key("Smith") == dedupe.phonetic_key("Smyth")
+        assert dedupe.phonetic_key("Rezaei") == dedupe.phonetic_key("رضایی")
+        assert dedupe.phonetic_key("كريمي") == dedupe.phonetic_key("Karimi")
+        assert dedupe.phonetic_key("Rezaei") != dedupe.phonetic_key("Karimi")
+
+    def test_blocking_keys(self):
+        """Test phone suffix, email local part and name keys"""
+        keys = dedupe.blocking_keys(
+            "John", "Smith", "J.Smith+news@example.com", "2221110219", "12"
+        )
+        assert ("phone", "22211102") in keys
+        assert ("email", "jsmith") in keys
+        assert ("name", "253:25") in keys
+        # Short numbers are not used
+        assert not any(key == "21" for _, key in keys)
+
+    def test_candidates_stay_within_blocks(self):
+        """Test that only contacts sharing a key are paired, and that
+        oversized blocks are skipped"""
+        rows = [
+            (1, "Ali", "Rezaei", "ali@a.com", "2222111219", None),
+            (2, "Ali", "Rezayi", "ali@b.com", None, None),
+            (3, "Sara", "Karimi", None, "2222111219", None),
+            (4, "Reza", "Ahmadi", "info@a.com", None, None),
+            (5, "Maryam", "Hosseini", "info@b.com", None, None),
+            (6, "Nima", "Taheri", "info@c.com", None, None),
+        ]
+        buckets, stats = dedupe.candidate_pairs(iter(rows), max_id=6, max_block_size=2)
+        # Contacts 1 and 2 share a name and an email key; the pair comes out once
+        pairs = [dedupe._unpack_pair(pair) for pair in dedupe.unique_pairs(buckets)]
+        assert pairs == [(1, 2), (1, 3)]
+        assert stats["contacts"] == 6
+        assert stats["oversized_blocks"] == 1
+
+    def test_scores(self):
+        """Test that corroborated matches score high and conflicts low"""
+        ali = dedupe._record("Ali", "Rezaei", None, "2222111219", None)
+        ali_typo = dedupe._record("Ali", "Rezayi", None, "22221112198", None)
+        sara = dedupe._record("Sara", "Karimi", None, "2222111219", None)
+        other_ali = dedupe._record("Ali", "Rezaei", None, "9999888719", None)
+
+        score, reasons = dedupe.score_pair(ali, ali_typo)
+        assert score >= dedupe.MIN_SCORE
+        assert reasons == ["name", "phone"]
+        # A shared landline alone is not enough
+        assert dedupe.score_pair(ali, sara)[0] < dedupe.MIN_SCORE
+        # Same name but different numbers
+        assert dedupe.score_pair(ali, other_ali)[0] < dedupe.MIN_SCORE
+
+
+class TestDuplicatesEndpoints:
+    """Test the duplicate scan, listing and merge endpoints"""
+
+    def setup_method(self):
+        """Set up test app, an editor and contacts with duplicates"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            company = Company(name="Acme", created_by=user.id)
+            db.session.add(company)
+            db.session.flush()
+            for fields in (
+                {"first_name": "Ali", "last_name": "Rezaei", "mobile": "0912 111 2222"},
+                {
+                    "first_name": "Ali",
+                    "last_name": "Rezayi",
+                    "mobile": "+98 912 111 2222",
+                    "email": "ali@example.com",
+                    "company_id": company.id,
+                    "notes": "Met at the fair",
+                },
+                {"first_name": "Sara", "last_name": "Karimi", "email": "s@x.com"},
+                {"first_name": "Sarah", "last_name": "Karimi", "email": "S@x.com"},
+                {
+                    "first_name": "Nima",
+                    "last_name": "Taheri",
+                    "mobile": "0912 111 2222",
+                },
+            ):
+                db.session.add(Contact(**fields, created_by=user.id))
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def scan(self):
+        """Helper running a background scan to completion"""
+        response = self.client.post("/api/contacts/duplicates/scan")
+        assert response.status_code == 202
+        with self.app.app_context():
+            dedupe.get_scan().join(10)
+
+    def test_scan_and_list(self):
+        """Test that a scan stores scored pairs listed best first"""
+        self.scan()
+        response = self.client.get("/api/contacts/duplicates")
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["scan"]["running"] is False
+        assert data["scan"]["contacts"] == 5
+
+        pairs = [
+            (item["contact"]["id"], item["duplicate"]["id"])
+            for item in data["duplicates"]
+        ]
+        assert sorted(pairs) == [(1, 2), (3, 4)]
+        assert data["duplicates"][0]["score"] >= data["duplicates"][1]["score"]
+        first = next(item for item in data["duplicates"] if item["contact"]["id"] == 1)
+        assert first["reasons"] == ["name", "phone"]
+        assert first["duplicate"]["company"]["name"] == "Acme"
+
+        response = self.client.get("/api/contacts/duplicates?contact_id=4")
+        assert json.loads(response.data)["pagination"]["total"] == 1
+
+    def test_merge(self):
+        """Test that a merge fills gaps, deletes duplicates and their pairs"""
+        self.scan()
+        token = json.loads(self.client.get("/api/sync").data)["token"]
+        response = self.client.post(
+            "/api/contacts/1/merge",
+            data=json.dumps({"duplicate_ids": [2]}),
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        contact = json.loads(response.data)["contact"]
+        assert contact["mobile"] == "0912 111 2222"
+        assert contact["email"] == "ali@example.com"
+        assert contact["company"]["name"] == "Acme"
+        assert contact["notes"] == "Met at the fair"
+
+        with self.app.app_context():
+            assert db.session.get(Contact, 2) is None
+            pairs = db.session.execute(select(dedupe.duplicate_pair)).all()
+            assert [(pair.contact_id, pair.duplicate_id) for pair in pairs] == [(3, 4)]
+
+        delta = json.loads(self.client.get(f"/api/sync?since={token}").data)
+        assert delta["deleted"]["contacts"] == [2]
+        response = self.client.get("/api/contacts?search=ali@example.com")
+        assert json.loads(response.data)["pagination"]["total"] == 1
+
+    def test_merge_errors(self):
+        """Test merge validation and missing contacts"""
+        for body in ({}, {"duplicate_ids": []}, {"duplicate_ids": [1]}):
+            response = self.client.post(
+                "/api/contacts/1/merge",
+                data=json.dumps(body),
+                content_type="application/json",
+            )
+            assert response.status_code == 400
+        response = self.client.post(
+            "/api/contacts/1/merge",
+            data=json.dumps({"duplicate_ids": [2, 99]}),
+            content_type="application/json",
+        )
+        assert response.status_code == 404
+        with self.app.app_context():
+            assert db.session.get(Contact, 2) is not None
+
+    def test_requires_editor(self):
+        """Test that plain users cannot list or merge duplicates"""
+        with self.app.app_context():
+            user = User(username="viewer", email="viewer@example.com", role="user")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.commit()
+        client = self.app.test_client()
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "viewer", "password": "password123"}),
+            content_type="application/json",
+        )
+        assert client.get("/api/contacts/duplicates").status_code == 403
+        response = client.post(
+            "/api/contacts/1/merge",
+            data=json.dumps({"duplicate_ids": [2]}),
+            content_type="application/json",
+        )
+        assert response.status_code == 403
+
+    def test_cli(self):
+        """Test the ``find-duplicates`` CLI command"""
+        result = self.app.test_cli_runner().invoke(args=["find-duplicates"])
+        assert result.exit_code == 0, result.output
+        stats = json.loads(result.stdout)
+        assert stats["duplicates"] == 2
+        assert stats["candidates"] >= 2
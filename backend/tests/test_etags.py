@@ -0,0 +1,167 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import create_app, db
+from models import Company, Contact, Notice, User
+import sync
+
+
+class TestConditionalGet:
+    """Test weak ETags and 304 responses on read endpoints"""
+
+    def setup_method(self):
+        """Set up test app, an admin and a few rows"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="boss", email="boss@example.com", role="admin")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            self.user_id = user.id
+            company = Company(name="Acme", created_by=user.id)
+            db.session.add(company)
+            db.session.flush()
+            db.session.add(
+                Contact(
+                    first_name="Ali",
+                    last_name="Rezaei",
+                    company_id=company.id,
+                    created_by=user.id,
+                )
+            )
+            db.session.add(Notice(title="Hello", content="x", created_by=user.id))
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "boss", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def revalidate(self, url, etag):
+        """Helper sending ``If-None-Match: etag``"""
+        return self.client.get(url, headers={"If-None-Match": etag})
+
+    def test_unchanged_resources_get_304(self):
+        """Test that each read endpoint answers a matching tag with 304"""
+        for url in (
+            "/api/contacts",
+            "/api/contacts/1",
+            "/api/companies",
+            "/api/companies/1",
+            "/api/notices",
+            "/api/notices/1",
+        ):
+            response = self.client.get(url)
+            assert response.status_code == 200, url
+            etag = response.headers["ETag"]
+            assert etag.startswith('W/"')
+            assert "no-cache" in response.headers["Cache-Control"]
+
+            response = self.revalidate(url, etag)
+            assert response.status_code == 304, url
+            assert response.data == b""
+            assert response.headers["ETag"] == etag
+
+    def test_304_costs_one_query(self):
+        """Test that a revalidation skips the page query and serialization"""
+        etag = self.client.get("/api/contacts?per_page=5").headers["ETag"]
+        response = self.revalidate("/api/contacts?per_page=5", etag)
+        assert response.status_code == 304
+        assert response.headers["X-Query-Count"] == "1"
+
+    def test_writes_change_the_tag(self):
+        """Test that updates and deletes of a dependency change it"""
+        etag = self.client.get("/api/contacts").headers["ETag"]
+        with self.app.app_context():
+            # A Core write, as a bulk job or another process would make
+            db.session.execute(text("UPDATE company SET name = 'Acme Ltd'"))
+            db.session.commit()
+        response = self.revalidate("/api/contacts", etag)
+        assert response.status_code == 200
+        assert json.loads(response.data)["contacts"][0]["company"]["name"] == (
+            "Acme Ltd"
+        )
+
+        etag = response.headers["ETag"]
+        self.client.delete("/api/contacts/1")
+        response = self.revalidate("/api/contacts", etag)
+        assert response.status_code == 200
+        assert json.loads(response.data)["contacts"] == []
+
+    def test_unrelated_writes_keep_the_tag(self):
+        """Test that a write to another table still revalidates"""
+        etag = self.client.get("/api/companies/1").headers["ETag"]
+        self.client.post(
+            "/api/notices",
+            data=json.dumps({"title": "New", "content": "y"}),
+            content_type="application/json",
+        )
+        assert self.revalidate("/api/companies/1", etag).status_code == 304
+
+    def test_cached_feed_revalidates_with_one_query(self):
+        """Test that the notices feed is tagged from its cached body"""
+        etag = self.client.get("/api/notices").headers["ETag"]
+        response = self.revalidate("/api/notices", etag)
+        assert response.status_code == 304
+        assert response.headers["X-Query-Count"] == "1"
+
+    def test_username_change_changes_feed_tag(self):
+        """Test that a username change refreshes the notices feed"""
+        etag = self.client.get("/api/notices").headers["ETag"]
+        self.client.put(
+            f"/api/users/{self.user_id}",
+            data=json.dumps({"username": "chief"}),
+            content_type="application/json",
+        )
+        response = self.revalidate("/api/notices", etag)
+        assert response.status_code == 200
+        notices = json.loads(response.data)["notices"]
+        assert notices[0]["created_by"]["username"] == "chief"
+
+    def test_notice_expiry_changes_the_tag(self):
+        """Test that the feed tag changes once a notice has expired"""
+        with self.app.app_context():
+            notice = db.session.get(Notice, 1)
+            notice.expires_at = datetime.utcnow() + timedelta(seconds=0.5)
+            db.session.commit()
+        etag = self.client.get("/api/notices").headers["ETag"]
+        assert self.revalidate("/api/notices", etag).status_code == 304
+
+        time.sleep(0.6)
+        response = self.revalidate("/api/notices", etag)
+        assert response.status_code == 200
+        assert json.loads(response.data)["notices"] == []
+
+    def test_pruning_changes_the_tag(self):
+        """Test that pruning tombstones cannot bring back an old tag"""
+        self.client.post(
+            "/api/contacts",
+            data=json.dumps({"first_name": "Sara", "last_name": "Karimi"}),
+            content_type="application/json",
+        )
+        etag = self.client.get("/api/contacts").headers["ETag"]
+        self.client.delete("/api/contacts/2")
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                assert sync.prune_tombstones(connection, days=-1) == 1
+        assert self.revalidate("/api/contacts", etag).status_code == 200
+
+    def test_errors_have_no_tag(self):
+        """Test that 404s carry no ETag and need login"""
+        response = self.client.get("/api/contacts/99")
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
+
+        response = self.app.test_client().get("/api/contacts/1")
+        assert response.status_code == 401
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import threading
+
+from sqlalchemy import create_engine, text
+
+from app import create_app, db
+from models import User
+
+
+class TestEvents:
+    """Test the /api/events change stream and its hub"""
+
+    def setup_method(self):
+        """Set up an app with fast polling on a database file"""
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+                "SECRET_KEY": "test-secret-key",
+                "EVENTS_POLL_INTERVAL": 0.02,
+                "EVENTS_KEEPALIVE": 0.2,
+            }
+        )
+        self.hub = self.app.extensions["event_hub"]
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="editor", email="editor@example.com", role="admin")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+        self.streams = []
+
+    def teardown_method(self):
+        """Close the streams, stop the hub and remove the database file"""
+        for response in self.streams:
+            response.close()
+        self.hub.close()
+        with self.app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+
+    def open_stream(self, url="/api/events", **kwargs):
+        """Helper returning a chunk iterator over an event stream"""
+        response = self.client.get(url, buffered=False, **kwargs)
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        self.streams.append(response)
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry:")
+        return chunks
+
+    def next_events(self, chunks, name="change"):
+        """Helper reading chunks until one holds ``name`` events"""
+        for _ in range(50):
+            chunk = next(chunks).decode()
+            if f"event: {name}" in chunk:
+                return [
+                    json.loads(line[len("data: ") :])
+                    for line in chunk.splitlines()
+                    if line.startswith("data: ")
+                ]
+        raise AssertionError(f"no {name} event")
+
+    def create_contact(self, first_name):
+        """Helper creating a contact; returns its id"""
+        response = self.client.post(
+            "/api/contacts",
+            data=json.dumps({"first_name": first_name, "last_name": "Test"}),
+            content_type="application/json",
+        )
+        return json.loads(response.data)["contact"]["id"]
+
+    def test_changes_are_streamed(self):
+        """Test upsert and delete events with their versions"""
+        chunks = self.open_stream()
+        contact_id = self.create_contact("Ali")
+        [event] = self.next_events(chunks)
+        assert event["entity"] == "contacts"
+        assert event["id"] == contact_id
+        assert event["op"] == "upsert"
+
+        self.client.delete(f"/api/contacts/{contact_id}")
+        [deleted] = self.next_events(chunks)
+        assert deleted["op"] == "delete"
+        assert deleted["version"] > event["version"]
+
+    def test_writes_from_other_processes(self):
+        """Test that writes through another connection are picked up"""
+        chunks = self.open_stream()
+        engine = create_engine(f"sqlite:///{self.path}")
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO notice (title, content, created_at, created_by) "
+                    "VALUES ('Hi', 'x', CURRENT_TIMESTAMP, 1)"
+                )
+            )
+        engine.dispose()
+        [event] = self.next_events(chunks)
+        assert (event["entity"], event["op"]) == ("notices", "upsert")
+
+    def test_last_event_id_replays_missed_events(self):
+        """Test that a reconnecting client gets what it missed"""
+        chunks = self.open_stream()
+        self.create_contact("A")
+        [first] = self.next_events(chunks)
+        self.create_contact("B")
+        [second] = self.next_events(chunks)
+
+        chunks = self.open_stream(headers={"Last-Event-ID": str(first["version"])})
+        assert self.next_events(chunks) == [second]
+
+    def test_entity_filter(self):
+        """Test that ``entities`` limits the stream"""
+        chunks = self.open_stream("/api/events?entities=notices")
+        self.create_contact("Skipped")
+        self.client.post(
+            "/api/notices",
+            data=json.dumps({"title": "Hello", "content": "x"}),
+            content_type="application/json",
+        )
+        [event] = self.next_events(chunks)
+        assert event["entity"] == "notices"
+
+        response = self.client.get("/api/events?entities=users")
+        assert response.status_code == 400
+
+    def test_unknown_history_asks_for_resync(self):
+        """Test resync events for future tokens and pruned backlogs"""
+        chunks = self.open_stream("/api/events?since=999")
+        assert self.next_events(chunks, "resync") == [0]
+
+        self.hub.backlog = 1
+        self.create_contact("A")
+        self.create_contact("B")
+        while self.hub.version < 2:
+            next(chunks)
+        assert self.hub.floor == 1
+        chunks = self.open_stream("/api/events?since=0")
+        assert self.next_events(chunks, "resync") == [2]
+
+    def test_idle_streams_share_one_poller(self):
+        """Test keepalives and that listeners do not add threads"""
+        streams = [self.open_stream() for _ in range(5)]
+        for chunks in streams:
+            assert next(chunks) == b": keepalive\n\n"
+        pollers = [t for t in threading.enumerate() if t.name == "phonebook-events"]
+        assert len(pollers) == 1
+        assert self.hub.listeners == 5
+
+        for response in self.streams:
+            response.close()
+        assert self.hub.listeners == 0
+
+    def test_bad_requests(self):
+        """Test login and token validation"""
+        response = self.app.test_client().get("/api/events")
+        assert response.status_code == 401
+        response = self.client.get("/api/events?since=abc")
+        assert response.status_code == 400
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from models import Company, Contact, Notice, User
+import exporter
+import importer
+
+
+class TestExport:
+    """Test the streaming export endpoints"""
+
+    def setup_method(self):
+        """Set up test app, a user and some rows"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="boss", email="boss@example.com", role="admin")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            company = Company(name="Acme; Inc", phone="021 1234", created_by=user.id)
+            db.session.add(company)
+            db.session.flush()
+            db.session.add(
+                Contact(
+                    first_name="Ali",
+                    last_name="Rezaei",
+                    email="ali@example.com",
+                    mobile="0912 111 2222",
+                    city="Tehran",
+                    notes="Line one\nLine two, with comma " + "x" * 80,
+                    company_id=company.id,
+                    created_by=user.id,
+                )
+            )
+            db.session.add(
+                Contact(first_name="Sara", last_name="Karimi", created_by=user.id)
+            )
+            db.session.add(Notice(title="Live", content="Hello", created_by=user.id))
+            db.session.add(
+                Notice(
+                    title="Old",
+                    content="Gone",
+                    expires_at=datetime.utcnow() - timedelta(days=1),
+                    created_by=user.id,
+                )
+            )
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "boss", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def test_contacts_csv(self):
+        """Test CSV export with the company name joined in"""
+        response = self.client.get("/api/contacts/export?format=csv")
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert "contacts.csv" in response.headers["Content-Disposition"]
+        assert response.is_streamed
+
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert [row["first_name"] for row in rows] == ["Ali", "Sara"]
+        assert rows[0]["company"] == "Acme; Inc"
+        assert rows[0]["notes"].startswith("Line one\nLine two")
+        assert rows[1]["company"] == ""
+        assert "search_key" not in rows[0]
+
+    def test_contacts_ndjson(self):
+        """Test NDJSON export, one object per line"""
+        response = self.client.get("/api/contacts/export?format=ndjson")
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["company"] == "Acme; Inc"
+        assert lines[0]["mobile"] == "0912 111 2222"
+        datetime.fromisoformat(lines[0]["created_at"])
+
+    def test_contacts_vcard_round_trip(self):
+        """Test that exported vCards are folded and import back unchanged"""
+        response = self.client.get("/api/contacts/export?format=vcf")
+        assert response.mimetype == "text/vcard"
+        text = response.get_data(as_text=True)
+        assert text.count("BEGIN:VCARD") == 2
+        assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+        assert "ORG:Acme\\; Inc" in text
+
+        cards = [row for _, row in importer.parse_vcard(io.StringIO(text))]
+        fields, company = importer.normalize_row(cards[0])
+        assert company == "Acme; Inc"
+        assert fields["mobile"] == "0912 111 2222"
+        assert fields["city"] == "Tehran"
+        assert fields["notes"] == "Line one\nLine two, with comma " + "x" * 80
+
+    def test_csv_round_trip(self):
+        """Test that an exported CSV imports with every column recognized"""
+        response = self.client.get("/api/contacts/export?format=csv")
+        rows = list(importer.parse_csv(io.StringIO(response.get_data(as_text=True))))
+        fields, company = importer.normalize_row(rows[0][1])
+        assert (fields["first_name"], fields["email"], company) == (
+            "Ali",
+            "ali@example.com",
+            "Acme; Inc",
+        )
+
+    def test_companies_and_notices(self):
+        """Test company exports and that notices export only active ones"""
+        response = self.client.get("/api/companies/export?format=vcf")
+        assert response.status_code == 200
+        assert "X-ABSHOWAS:COMPANY" in response.get_data(as_text=True)
+
+        response = self.client.get("/api/notices/export?format=ndjson")
+        notices = [json.loads(line) for line in response.data.splitlines()]
+        assert [notice["title"] for notice in notices] == ["Live"]
+        assert notices[0]["created_by_username"] == "boss"
+
+    def test_bad_format(self):
+        """Test unknown formats and vCard notices are rejected"""
+        response = self.client.get("/api/contacts/export?format=pdf")
+        assert response.status_code == 400
+        response = self.client.get("/api/notices/export?format=vcf")
+        assert response.status_code == 400
+
+    def test_requires_login(self):
+        """Test that exports require authentication"""
+        response = self.app.test_client().get("/api/contacts/export")
+        assert response.status_code == 401
+
+    def test_batches_stream_separately(self, monkeypatch):
+        """Test that rows are rendered one ``yield_per`` batch at a time"""
+        monkeypatch.setattr(exporter, "EXPORT_BATCH_SIZE", 1)
+        with self.app.test_request_context():
+            chunks = list(exporter.export_chunks("contacts", "csv"))
+        # Header, then one chunk per contact
+        assert len(chunks) == 3
+        assert chunks[0].startswith("id,first_name,last_name")
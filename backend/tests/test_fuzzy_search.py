@@ -0,0 +1,168 @@
+import json
+from app import create_app, db
+from fuzzy import TrigramIndex, trigrams
+import routes.contacts
+
+
+class TestTrigramIndex:
+    """Test the trigram posting-list index"""
+
+    def test_trigrams(self):
+        """Test that words are padded and normalized"""
+        assert trigrams("Ali") == {"  a", " al", "ali", "li "}
+        assert trigrams("علي") == trigrams("علی")
+        assert trigrams("") == set()
+
+    def test_ranked_by_similarity(self):
+        """Test that closer spellings rank first and noise is dropped"""
+        index = TrigramIndex()
+        index.load(
+            [
+                (1, "Mohammad Rezaei"),
+                (2, "Mohamad Rezaie"),
+                (3, "Sara Ahmadi"),
+            ]
+        )
+
+        results = index.search("mohammad")
+        assert [entry_id for entry_id, _ in results] == [1, 2]
+        assert results[0][1] == 1.0
+        assert results[1][1] < 1.0
+        assert index.search("zzzz") == []
+
+    def test_add_and_remove(self):
+        """Test incremental updates of the posting lists"""
+        index = TrigramIndex()
+        index.load([(5, "Sara Ahmadi")])
+        index.add(2, "Sarah Ahmady")
+        index.add(5, "Zahra Karimi")
+
+        assert [entry_id for entry_id, _ in index.search("ahmadi")] == [2]
+        index.remove(2)
+        assert index.search("ahmadi") == []
+        assert len(index) == 1
+
+    def test_common_trigrams_are_capped(self):
+        """Test that common trigrams only confirm candidates"""
+        index = TrigramIndex(max_scanned=50)
+        index.load(
+            [(i, f"Ali Rezaei{i}") for i in range(1, 1001)]
+            + [(5000, "Ali Zanjirehgostar")]
+        )
+
+        # The rare trigrams of the surname find it among the common names
+        assert index.search("ali zanjirehgostar")[0] == (5000, 1.0)
+        # A query of common trigrams only reads a sample
+        results = index.search("ali", limit=1000)
+        assert len(results) == 50
+        assert all(score == 1.0 for _, score in results)
+        # An unknown trigram does not stop the sample
+        results = index.search("alii", limit=1000)
+        assert len(results) == 50
+
+
+class TestFuzzyContactSearch:
+    """Test GET /api/contacts?fuzzy=1"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Contact
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(
+                Contact(first_name="Mohammad", last_name="Rezaei", created_by=user.id)
+            )
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def search(self, term):
+        """Helper returning (first_name, similarity) of fuzzy matches"""
+        response = self.client.get(
+            "/api/contacts", query_string={"search": term, "fuzzy": 1}
+        )
+        assert response.status_code == 200
+        return [
+            (c["first_name"], c["similarity"])
+            for c in json.loads(response.data)["contacts"]
+        ]
+
+    def test_misspelled_name_is_found(self):
+        """Test that a misspelling still matches and exact search does not"""
+        results = self.search("mohamad rezai")
+        assert [name for name, _ in results] == ["Mohammad"]
+        assert 0 < results[0][1] < 1
+
+        response = self.client.get("/api/contacts?search=mohamad")
+        assert json.loads(response.data)["contacts"] == []
+
+    def test_index_follows_writes(self):
+        """Test that created and deleted contacts update the index"""
+        self.search("anything")
+
+        response = self.client.post(
+            "/api/contacts",
+            data=json.dumps({"first_name": "Fatemeh", "last_name": "Hosseini"}),
+            content_type="application/json",
+        )
+        contact_id = json.loads(response.data)["contact"]["id"]
+        assert [name for name, _ in self.search("fateme hoseini")] == ["Fatemeh"]
+
+        self.client.delete(f"/api/contacts/{contact_id}")
+        assert self.search("fateme hoseini") == []
+
+    def test_company_filter_walks_past_other_matches(self, monkeypatch):
+        """Test that a company's matches fill the page when better matches
+        elsewhere outnumber it"""
+        from models import Company, Contact
+
+        with self.app.app_context():
+            company = Company(name="Acme", created_by=1)
+            db.session.add(company)
+            db.session.flush()
+            company_id = company.id
+            for _ in range(30):
+                db.session.add(
+                    Contact(first_name="Mohammad", last_name="Rezaei", created_by=1)
+                )
+            for first_name in ("Mohamad", "Mohammed"):
+                db.session.add(
+                    Contact(
+                        first_name=first_name,
+                        last_name="Rezaie",
+                        company_id=company_id,
+                        created_by=1,
+                    )
+                )
+            db.session.commit()
+
+        monkeypatch.setattr(routes.contacts, "FUZZY_CHUNK", 10)
+        response = self.client.get(
+            "/api/contacts",
+            query_string={
+                "search": "mohammad rezaei",
+                "fuzzy": 1,
+                "per_page": 5,
+                "company_id": company_id,
+            },
+        )
+        contacts = json.loads(response.data)["contacts"]
+        assert sorted(c["first_name"] for c in contacts) == ["Mohamad", "Mohammed"]
+        assert all(c["company_id"] == company_id for c in contacts)
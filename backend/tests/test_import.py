@@ -0,0 +1,271 @@
+import io
+import json
+
+import pytest
+
+from app import create_app, db
+from models import Company, Contact, User
+import importer
+
+CSV = (
+    "First Name,Last Name,E-mail,Mobile,City,Company\n"
+    "Ali,Rezaei,ali@example.com,0912 111 2222,Tehran,Pars Energy\n"
+    "Sara,Karimi,not-an-email,,Shiraz,pars energy\n"
+    ",Nameless,,,,\n"
+    "John,Smith,JOHN@example.com,+1 555 0100,Boston,Acme\n"
+)
+
+VCARD = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "N:Hosseini;Maryam;;;\r\n"
+    "FN:Maryam Hosseini\r\n"
+    "ORG:Acme;Sales\r\n"
+    "EMAIL;TYPE=INTERNET:maryam@example.com\r\n"
+    "TEL;TYPE=CELL,VOICE:0912-333-4444\r\n"
+    "TEL;TYPE=WORK:021 8888 7777\r\n"
+    "ADR;TYPE=WORK:;;Valiasr St\\, No 12;Tehran;;1234;Iran\r\n"
+    "NOTE:Met at the fair\\nCall back\r\n"
+    "END:VCARD\r\n"
+    "BEGIN:VCARD\r\n"
+    "VERSION:4.0\r\n"
+    "FN:Peter\r\n"
+    "  Jones\r\n"
+    'TEL;VALUE=uri;TYPE="cell,voice":tel:+98-912-555-6666\r\n'
+    "END:VCARD\r\n"
+)
+
+
+class TestImportParsing:
+    """Test the streaming file parsers and row validation"""
+
+    def test_csv_headers_and_line_numbers(self):
+        """Test that CSV headers map to fields and rows keep their lines"""
+        rows = list(importer.open_rows(io.BytesIO(CSV.encode()), "csv"))
+        assert [line for line, _ in rows] == [2, 3, 4, 5]
+        assert rows[0][1] == {
+            "first_name": "Ali",
+            "last_name": "Rezaei",
+            "email": "ali@example.com",
+            "mobile": "0912 111 2222",
+            "city": "Tehran",
+            "company": "Pars Energy",
+        }
+
+    def test_vcard_versions(self):
+        """Test vCard 3.0 and 4.0 properties, escapes and folded lines"""
+        cards = list(importer.open_rows(io.BytesIO(VCARD.encode()), "vcf"))
+        assert [line for line, _ in cards] == [1, 12]
+
+        first = cards[0][1]
+        assert first["first_name"] == "Maryam"
+        assert first["last_name"] == "Hosseini"
+        assert first["company"] == "Acme"
+        assert first["mobile"] == "0912-333-4444"
+        assert first["phone"] == "021 8888 7777"
+        assert first["address"] == "Valiasr St, No 12"
+        assert first["zip_code"] == "1234"
+        assert first["notes"] == "Met at the fair\nCall back"
+
+        fields, company = importer.normalize_row(cards[1][1])
+        assert (fields["first_name"], fields["last_name"]) == ("Peter", "Jones")
+        assert fields["mobile"] == "+98-912-555-6666"
+        assert company is None
+
+    def test_normalize_row_errors(self):
+        """Test that invalid rows raise ``RowError`` with a reason"""
+        with pytest.raises(importer.RowError, match="First name"):
+            importer.normalize_row({"last_name": "Only"})
+        with pytest.raises(importer.RowError, match="email"):
+            importer.normalize_row(
+                {"first_name": "A", "last_name": "B", "email": "nope"}
+            )
+        with pytest.raises(importer.RowError, match="phone"):
+            importer.normalize_row({"first_name": "A", "last_name": "B", "phone": "x"})
+        with pytest.raises(importer.RowError, match="longer"):
+            importer.normalize_row({"first_name": "A" * 51, "last_name": "B"})
+
+    def test_format_detection(self):
+        """Test format detection from the file name and explicit choice"""
+        assert importer.detect_format("people.CSV") == "csv"
+        assert importer.detect_format("cards.vcf") == "vcf"
+        assert importer.detect_format("upload", "xlsx") == "xlsx"
+        with pytest.raises(importer.ImportFormatError):
+            importer.detect_format("people.pdf")
+
+
+class TestImportEndpoint:
+    """Test POST /api/contacts/import"""
+
+    def setup_method(self):
+        """Set up test app and an editor"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.add(Company(name="Acme", created_by=1))
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def upload(self, text, filename, **options):
+        """Helper posting ``text`` as an uploaded file"""
+        data = {"file": (io.BytesIO(text.encode()), filename), **options}
+        return self.client.post(
+            "/api/contacts/import", data=data, content_type="multipart/form-data"
+        )
+
+    def test_csv_import(self):
+        """Test imported rows, per-row errors and company resolution"""
+        response = self.upload(CSV, "people.csv", batch_size="1")
+        assert response.status_code == 200
+        result = json.loads(response.data)["import"]
+        assert result["rows"] == 4
+        assert result["imported"] == 2
+        assert result["failed"] == 2
+        assert result["batches"] == 2
+        assert result["companies_created"] == 1
+        assert [error["line"] for error in result["errors"]] == [3, 4]
+
+        with self.app.app_context():
+            ali = Contact.query.filter_by(email="ali@example.com").one()
+            assert ali.company.name == "Pars Energy"
+            assert ali.mobile_rev == "2222111219"
+            assert "rezaei" in ali.search_key
+            john = Contact.query.filter_by(last_name="Smith").one()
+            assert john.email == "john@example.com"
+            assert john.company.name == "Acme"
+            assert Company.query.count() == 2
+
+        # Imported rows are searchable and suggested right away
+        response = self.client.get("/api/contacts?search=rezaei")
+        assert json.loads(response.data)["pagination"]["total"] == 1
+        response = self.client.get("/api/lookup/phone/09121112222")
+        assert response.status_code == 200
+
+    def test_batch_inserts_one_statement(self):
+        """Test that a batch costs the same statements for 3 or 300 rows"""
+        counts = []
+        for size in (3, 300):
+            lines = "".join(f"N{i},Row,Co{size}-{i}\n" for i in range(size))
+            response = self.upload(
+                "first,last,company\n" + lines, "people.csv", batch_size="500"
+            )
+            result = json.loads(response.data)["import"]
+            assert result["imported"] == size
+            assert result["companies_created"] == size
+            counts.append(int(response.headers["X-Query-Count"]))
+        assert counts[0] == counts[1]
+
+    def test_batch_retried_row_by_row(self, monkeypatch):
+        """Test the fallback when returned ids cannot be matched to rows"""
+        checks = []
+
+        def consecutive(ids, count):
+            checks.append(count)
+            return len(checks) > 1
+
+        monkeypatch.setattr(importer, "_consecutive", consecutive)
+        response = self.upload(CSV, "people.csv")
+        result = json.loads(response.data)["import"]
+        assert checks == [2]
+        assert result["imported"] == 2
+        assert result["batches"] == 1
+        with self.app.app_context():
+            assert Contact.query.count() == 2
+            assert Company.query.count() == 2
+        response = self.client.get("/api/contacts/suggest?q=Ali")
+        assert len(json.loads(response.data)["suggestions"]) == 1
+
+    def test_existing_company_matched_case_insensitively(self):
+        """Test that companies are matched by normalized name"""
+        csv_text = "first_name,last_name,company\nA,B,ACME\nC,D,acme\n"
+        response = self.upload(csv_text, "people.csv")
+        result = json.loads(response.data)["import"]
+        assert result["imported"] == 2
+        assert result["companies_created"] == 0
+        with self.app.app_context():
+            assert {c.company_id for c in Contact.query} == {1}
+
+    def test_vcard_import(self):
+        """Test importing a vCard file"""
+        response = self.upload(VCARD, "cards.vcf")
+        result = json.loads(response.data)["import"]
+        assert result["imported"] == 2
+        with self.app.app_context():
+            maryam = Contact.query.filter_by(first_name="Maryam").one()
+            assert maryam.company_id == 1
+            assert maryam.city == "Tehran"
+
+    def test_progress_stream(self):
+        """Test NDJSON progress lines with ``progress=1``"""
+        lines = "".join(f"F{i},L{i}\n" for i in range(5))
+        response = self.upload(
+            "first,last\n" + lines, "people.csv", batch_size="2", progress="1"
+        )
+        assert response.mimetype == "application/x-ndjson"
+        events = [json.loads(line) for line in response.data.splitlines()]
+        assert [event["progress"]["imported"] for event in events[:-1]] == [2, 4, 5]
+        assert events[-1]["success"] is True
+        assert events[-1]["result"]["imported"] == 5
+
+    def test_bad_requests(self):
+        """Test missing files, unknown formats and unreadable text"""
+        response = self.client.post("/api/contacts/import")
+        assert response.status_code == 400
+
+        response = self.upload("x", "people.pdf")
+        assert response.status_code == 400
+
+        response = self.upload("nothing,useful\n1,2\n", "people.csv")
+        assert response.status_code == 400
+        assert "columns" in json.loads(response.data)["error"]
+
+        data = {"file": (io.BytesIO(b"first,last\n\xff\xfe,x\n"), "people.csv")}
+        response = self.client.post(
+            "/api/contacts/import", data=data, content_type="multipart/form-data"
+        )
+        assert response.status_code == 400
+        assert "utf-8" in json.loads(response.data)["error"]
+
+    def test_requires_editor(self):
+        """Test that plain users cannot import"""
+        with self.app.app_context():
+            user = User(username="viewer", email="viewer@example.com", role="user")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.commit()
+        client = self.app.test_client()
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "viewer", "password": "password123"}),
+            content_type="application/json",
+        )
+        data = {"file": (io.BytesIO(CSV.encode()), "people.csv")}
+        response = client.post(
+            "/api/contacts/import", data=data, content_type="multipart/form-data"
+        )
+        assert response.status_code == 403
+
+    def test_cli(self, tmp_path):
+        """Test the ``import-contacts`` CLI command"""
+        path = tmp_path / "people.csv"
+        path.write_text(CSV, encoding="utf-8")
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["import-contacts", str(path), "--user", "editor"])
+        assert result.exit_code == 0, result.output
+        summary = json.loads(result.stdout)
+        assert summary["imported"] == 2
+        assert summary["failed"] == 2
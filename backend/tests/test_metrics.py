@@ -0,0 +1,202 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+
+from app import create_app, db
+import metrics
+
+
+def sample(body, line_prefix):
+    """Helper returning the value of the exposition line starting with a prefix"""
+    for line in body.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User
+
+            boss = User(username="boss", email="boss@example.com", role="admin")
+            boss.set_password("password123")
+            db.session.add(boss)
+            db.session.commit()
+
+    def scrape(self):
+        """Helper returning the metrics text"""
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        return response.get_data(as_text=True)
+
+    def login(self):
+        """Helper to log in as the admin"""
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "boss", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def test_request_counts_and_latency(self):
+        """Test per-endpoint counters, histograms and password timing"""
+        requests = (
+            "phonebook_http_requests_total"
+            '{endpoint="contacts.get_contacts",method="GET",status="200"}'
+        )
+        latency = (
+            "phonebook_http_request_duration_seconds_count"
+            '{endpoint="contacts.get_contacts"}'
+        )
+        before = self.scrape()
+
+        self.login()
+        for _ in range(3):
+            self.client.get("/api/contacts")
+        after = self.scrape()
+
+        assert sample(after, requests) - sample(before, requests) == 3
+        assert sample(after, latency) - sample(before, latency) == 3
+        inf_bucket = latency.replace("_count{", "_bucket{").replace(
+            '"}', '",le="+Inf"}'
+        )
+        assert sample(after, inf_bucket) == sample(after, latency)
+        assert (
+            sample(after, "phonebook_password_check_seconds_count")
+            - sample(before, "phonebook_password_check_seconds_count")
+            >= 1
+        )
+        assert sample(after, "phonebook_process_resident_memory_bytes") > 0
+
+    def test_cache_hit_ratio(self):
+        """Test that named caches report lookups and a hit ratio"""
+        self.login()
+        self.client.get("/api/stats")
+        self.client.get("/api/stats")
+        body = self.scrape()
+
+        hits = sample(
+            body, 'phonebook_cache_requests_total{cache="stats_cache",result="hit"}'
+        )
+        misses = sample(
+            body, 'phonebook_cache_requests_total{cache="stats_cache",result="miss"}'
+        )
+        ratio = sample(body, 'phonebook_cache_hit_ratio{cache="stats_cache"}')
+        assert hits >= 1 and misses >= 1
+        assert ratio == hits / (hits + misses)
+
+    def test_disabled(self):
+        """Test that METRICS = False removes the endpoint"""
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "METRICS": False,
+            }
+        )
+        response = app.test_client().get("/metrics")
+        assert "phonebook_http_requests_total" not in response.get_data(as_text=True)
+
+
+class TestMetricAggregation:
+    """Test thread shards and cross-process aggregation"""
+
+    def test_threads_are_summed(self):
+        """Test that observations from finished threads are kept"""
+        histogram = metrics.Histogram("test_thread_seconds", "test", ("kind",))
+        try:
+
+            def work():
+                for _ in range(100):
+                    histogram.observe(0.02, "a")
+
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            histogram.observe(20, "a")
+
+            counts = histogram.collect()[("a",)]
+            assert sum(counts[:-1]) == 801
+            assert counts[histogram.buckets.index(0.025)] == 800
+            assert counts[-2] == 1
+        finally:
+            metrics.REGISTRY.remove(histogram)
+
+    def test_processes_are_merged(self):
+        """Test counters summed across worker snapshots, gauges per live pid"""
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "METRICS_DIR": tempfile.mkdtemp(),
+            }
+        )
+        writer = metrics.SnapshotWriter(app, app.config["METRICS_DIR"], 60)
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+
+        def worker_snapshot(pid, count):
+            return {
+                "pid": pid,
+                "families": {
+                    "phonebook_http_requests_total": {
+                        "type": "counter",
+                        "help": "HTTP requests",
+                        "labelnames": ["endpoint", "method", "status"],
+                        "samples": [[["auth.login", "POST", "200"], count]],
+                    },
+                    "phonebook_process_resident_memory_bytes": {
+                        "type": "gauge",
+                        "help": "RSS",
+                        "labelnames": [],
+                        "samples": [[[], 1000]],
+                    },
+                },
+            }
+
+        for pid, count in ((os.getppid(), 5), (dead.pid, 7)):
+            path = os.path.join(writer.directory, f"metrics-{pid}-0.json")
+            with open(path, "w") as out:
+                json.dump(worker_snapshot(pid, count), out)
+
+        logins = (
+            "phonebook_http_requests_total"
+            '{endpoint="auth.login",method="POST",status="200"}'
+        )
+        own = sample(
+            metrics.render(metrics.merge_snapshots([metrics.snapshot(app)])), logins
+        )
+        body = metrics.render(metrics.merge_snapshots(writer.collect()))
+
+        assert sample(body, logins) == own + 12
+        rss_pids = re.findall(
+            r'phonebook_process_resident_memory_bytes\{pid="(\d+)"\}', body
+        )
+        assert sorted(rss_pids) == sorted([str(os.getpid()), str(os.getppid())])
+
+        # The exited worker's file is gone and its totals live on in ours
+        files = sorted(os.listdir(writer.directory))
+        assert files == sorted(
+            [f"metrics-{os.getppid()}-0.json", os.path.basename(writer.path)]
+        )
+        body = metrics.render(metrics.merge_snapshots(writer.collect()))
+        assert sample(body, logins) == own + 12
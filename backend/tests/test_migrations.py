@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine, inspect, text
+
+from app import create_app, db, init_db
+import migrations
+
+
+class TestMigrations:
+    """Test the versioned schema migration runner"""
+
+    def setup_method(self):
+        """Create a temporary database file"""
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+
+    def teardown_method(self):
+        """Remove the database file and its WAL companions"""
+        self.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+
+    def versions(self):
+        """Helper returning the applied migration versions"""
+        with self.engine.connect() as connection:
+            return [
+                row.version
+                for row in connection.execute(
+                    text("SELECT version FROM schema_version ORDER BY version")
+                )
+            ]
+
+    def indexes(self, table):
+        """Helper returning index names on ``table``"""
+        return {index["name"] for index in inspect(self.engine).get_indexes(table)}
+
+    def test_fresh_database(self):
+        """Test that init_db builds the schema and records every version"""
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        init_db(app)
+        with app.app_context():
+            db.engine.dispose()
+
+        latest = migrations.MIGRATIONS[-1][0]
+        assert self.versions() == list(range(1, latest + 1))
+        assert "ix_contact_email" in self.indexes("contact")
+        assert "ix_notice_expires_at" in self.indexes("notice")
+        assert migrations.upgrade(self.engine) == []
+
+    def test_unversioned_database_is_upgraded(self):
+        """Test that a database from before versioning gets the new indexes"""
+        db.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_contact_email"))
+            connection.execute(text("DROP INDEX ix_notice_expires_at"))
+            connection.execute(
+                text(
+                    "INSERT INTO user (username, email, password_hash, role) "
+                    "VALUES ('boss', 'boss@example.com', 'x', 'admin')"
+                )
+            )
+
+        applied = migrations.upgrade(self.engine)
+
+        assert applied[:2] == [1, 2]
+        assert "ix_contact_email" in self.indexes("contact")
+        assert "ix_notice_expires_at" in self.indexes("notice")
+        with self.engine.connect() as connection:
+            assert connection.scalar(text("SELECT username FROM user")) == "boss"
+
+    def test_only_pending_steps_run(self):
+        """Test that a migration added later runs once on an existing database"""
+        migrations.upgrade(self.engine)
+        latest = migrations.MIGRATIONS[-1][0]
+        calls = []
+
+        @migrations.migration(latest + 1, "test step")
+        def _step(connection):
+            calls.append(connection.execute(text("SELECT 1")).scalar())
+
+        try:
+            assert migrations.upgrade(self.engine) == [latest + 1]
+            assert migrations.upgrade(self.engine) == []
+            assert calls == [1]
+        finally:
+            migrations.MIGRATIONS.pop()
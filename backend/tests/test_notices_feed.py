@@ -0,0 +1,115 @@
+import json
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app import create_app, db
+from instrumentation import QUERY_COUNT_HEADER
+from models import Notice, User
+
+
+class TestNoticesFeedCache:
+    """Test the cached active-notices feed"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            boss = User(username="boss", email="boss@example.com", role="admin")
+            boss.set_password("password123")
+            db.session.add(boss)
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "boss", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def create_notice(self, title, **fields):
+        """Helper to create a notice"""
+        response = self.client.post(
+            "/api/notices",
+            data=json.dumps({"title": title, "content": "text", **fields}),
+            content_type="application/json",
+        )
+        return json.loads(response.data)["notice"]
+
+    def feed(self):
+        """Helper returning (titles, query count) of the feed"""
+        response = self.client.get("/api/notices")
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        titles = [n["title"] for n in json.loads(response.data)["notices"]]
+        return titles, int(response.headers[QUERY_COUNT_HEADER])
+
+    def test_feed_is_cached_until_write(self):
+        """Test that repeat reads only check the version and writes
+        invalidate"""
+        self.create_notice("First")
+        titles, queries = self.feed()
+        assert titles == ["First"]
+        assert queries == 2
+
+        assert self.feed() == (["First"], 1)
+
+        notice = self.create_notice("Second")
+        assert self.feed()[0] == ["Second", "First"]
+
+        self.client.put(
+            f"/api/notices/{notice['id']}",
+            data=json.dumps({"title": "Second (edited)"}),
+            content_type="application/json",
+        )
+        assert self.feed()[0] == ["Second (edited)", "First"]
+
+        self.client.delete(f"/api/notices/{notice['id']}")
+        assert self.feed()[0] == ["First"]
+
+    def test_creator_username_included(self):
+        """Test that creators come from the joined query"""
+        self.create_notice("Hello")
+        response = self.client.get("/api/notices")
+        notice = json.loads(response.data)["notices"][0]
+        assert notice["created_by"]["username"] == "boss"
+
+    def test_expired_notice_drops_out_without_write(self):
+        """Test that the cache refreshes at the next expiry boundary"""
+        expires_at = datetime.utcnow() + timedelta(seconds=1)
+        self.create_notice("Soon gone", expires_at=expires_at.isoformat())
+        self.create_notice("Stays")
+
+        assert self.feed()[0] == ["Stays", "Soon gone"]
+        assert self.feed()[1] == 1
+
+        time.sleep(1.2)
+        titles, queries = self.feed()
+        assert titles == ["Stays"]
+        assert queries == 2
+
+    def test_write_by_another_worker_refreshes_feed(self):
+        """Test that writes this process's hooks never saw still show"""
+        notice = self.create_notice("Before")
+        assert self.feed()[0] == ["Before"]
+
+        # Straight through the engine, like a commit in another process
+        with self.app.app_context(), db.engine.begin() as connection:
+            connection.execute(
+                update(Notice.__table__)
+                .where(Notice.id == notice["id"])
+                .values(title="After")
+            )
+        assert self.feed() == (["After"], 2)
+
+        with self.app.app_context(), db.engine.begin() as connection:
+            connection.execute(update(User.__table__).values(username="chief"))
+        response = self.client.get("/api/notices")
+        notices = json.loads(response.data)["notices"]
+        assert notices[0]["created_by"]["username"] == "chief"
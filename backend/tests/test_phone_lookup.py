@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import tempfile
+from sqlalchemy import update
+from app import create_app, db, init_db
+from phones import normalize_phone, reversed_digits
+
+
+class TestPhoneNormalization:
+    """Test phone number normalization"""
+
+    def test_normalize_phone(self):
+        """Test that formatting and prefixes are stripped"""
+        assert normalize_phone("+98 (912) 123-4567") == "989121234567"
+        assert normalize_phone("0098 912 123 4567") == "989121234567"
+        assert normalize_phone("0912-123-4567") == "9121234567"
+        assert normalize_phone("۰۹۱۲۱۲۳۴۵۶۷") == "9121234567"
+        assert normalize_phone("٠٩١٢١٢٣٤٥٦٧") == "9121234567"
+        assert normalize_phone("n/a") == ""
+        assert normalize_phone(None) is None
+        assert reversed_digits("+1-555-0123") == "32105551"
+
+
+class TestPhoneLookup:
+    """Test GET /api/lookup/phone/<number>"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Contact, Company
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            company = Company(name="Acme", phone="+98 21 8888 1234", created_by=user.id)
+            db.session.add(company)
+            db.session.flush()
+            self.contact = Contact(
+                first_name="Sara",
+                last_name="Ahmadi",
+                mobile="0912 123 4567",
+                company_id=company.id,
+                created_by=user.id,
+            )
+            db.session.add(self.contact)
+            db.session.commit()
+            self.contact_id = self.contact.id
+            self.user_id = user.id
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def lookup(self, number):
+        """Helper to call the lookup endpoint"""
+        response = self.client.get(f"/api/lookup/phone/{number}")
+        return response.status_code, json.loads(response.data)
+
+    def test_lookup_contact_by_any_format(self):
+        """Test that differently formatted numbers resolve to the contact"""
+        for number in ("+989121234567", "09121234567", "00989121234567"):
+            status, data = self.lookup(number)
+            assert status == 200
+            assert data["type"] == "contact"
+            assert data["matched_field"] == "mobile"
+            assert data["contact"]["id"] == self.contact_id
+            assert data["contact"]["company"]["name"] == "Acme"
+
+    def test_lookup_falls_back_to_company(self):
+        """Test that company numbers are matched when no contact matches"""
+        status, data = self.lookup("02188881234")
+        assert status == 200
+        assert data["type"] == "company"
+        assert data["company"]["name"] == "Acme"
+
+    def test_unknown_number_is_negatively_cached_until_write(self):
+        """Test that the negative cache is cleared by phone writes"""
+        status, _ = self.lookup("09351112222")
+        assert status == 404
+        status, _ = self.lookup("09351112222")
+        assert status == 404
+
+        self.client.put(
+            f"/api/contacts/{self.contact_id}",
+            data=json.dumps({"phone": "0935 111 2222"}),
+            content_type="application/json",
+        )
+        status, data = self.lookup("09351112222")
+        assert status == 200
+        assert data["matched_field"] == "phone"
+
+    def test_negative_cache_sees_writes_from_other_workers(self):
+        """Test that a number added outside this process is found"""
+        response = self.client.get("/api/lookup/phone/09351112222")
+        assert response.status_code == 404
+        response = self.client.get("/api/lookup/phone/09351112222")
+        assert response.status_code == 404
+        assert response.headers["X-Query-Count"] == "1"
+
+        from models import Contact
+
+        # Straight through the engine, like a commit in another process
+        with self.app.app_context(), db.engine.begin() as connection:
+            connection.execute(
+                update(Contact.__table__)
+                .where(Contact.id == self.contact_id)
+                .values(phone="0935 111 2222", phone_rev=reversed_digits("09351112222"))
+            )
+        status, data = self.lookup("09351112222")
+        assert status == 200
+        assert data["matched_field"] == "phone"
+
+    def test_invalid_number(self):
+        """Test that too-short input is rejected"""
+        status, _ = self.lookup("12")
+        assert status == 400
+
+
+class TestPhoneBackfill:
+    """Test that existing databases get the new columns and values"""
+
+    def test_existing_rows_are_backfilled(self):
+        """Test that init_db adds *_rev columns and fills them"""
+        db_fd, db_path = tempfile.mkstemp()
+        connection = sqlite3.connect(db_path)
+        connection.executescript(
+            """
+            CREATE TABLE contact (
+                id INTEGER PRIMARY KEY, first_name VARCHAR(50) NOT NULL,
+                last_name VARCHAR(50) NOT NULL, email VARCHAR(100),
+                phone VARCHAR(20), mobile VARCHAR(20), address TEXT,
+                city VARCHAR(50), state VARCHAR(50), zip_code VARCHAR(10),
+                country VARCHAR(50), company_id INTEGER, notes TEXT,
+                created_at DATETIME, updated_at DATETIME,
+                created_by INTEGER NOT NULL
+            );
+            INSERT INTO contact (first_name, last_name, phone, created_by)
+            VALUES ('Old', 'Row', '021-4444-5555', 1);
+            """
+        )
+        connection.close()
+
+        try:
+            app = create_app(
+                {
+                    "TESTING": True,
+                    "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+                    "SECRET_KEY": "test-secret-key",
+                }
+            )
+            init_db(app)
+            with app.app_context():
+                from models import Contact
+
+                contact = Contact.query.one()
+                assert contact.phone_rev == "5555444412"
+                assert contact.mobile_rev is None
+                db.engine.dispose()
+        finally:
+            os.close(db_fd)
+            os.unlink(db_path)
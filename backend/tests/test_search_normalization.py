@@ -0,0 +1,103 @@
+import json
+from app import create_app, db
+from normalization import contact_search_key, normalize_text
+
+
+class TestNormalizeText:
+    """Test Persian/Arabic-aware text normalization"""
+
+    def test_arabic_letter_forms_fold_to_persian(self):
+        """Test that Arabic yeh and kaf match their Persian forms"""
+        assert normalize_text("علي كريمي") == normalize_text("علی کریمی")
+
+    def test_diacritics_tatweel_and_zwnj(self):
+        """Test that marks and joiners are removed"""
+        assert normalize_text("مُحَمَّد") == "محمد"
+        assert normalize_text("مـــحمد") == "محمد"
+        assert normalize_text("عبد‌الله") == "عبد الله"
+
+    def test_digits_and_latin(self):
+        """Test that digits become ASCII and Latin text is case-folded"""
+        assert normalize_text("۰۹۱۲ ٣٤٥") == "0912 345"
+        assert normalize_text("  José   MÜLLER ") == "jose muller"
+        assert normalize_text(None) == ""
+
+    def test_contact_search_key(self):
+        """Test that phone numbers are indexed spaced and digits-only"""
+        key = contact_search_key("Sara", "Ahmadi", None, "۰۲۱-۸۸۸۸", None, "تهران")
+        assert key == "sara ahmadi 021-8888 0218888 تهران"
+
+
+class TestNormalizedContactSearch:
+    """Test that GET /api/contacts matches across spelling variants"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def post(self, url, data):
+        """Helper to POST JSON and return the decoded body"""
+        response = self.client.post(
+            url, data=json.dumps(data), content_type="application/json"
+        )
+        return json.loads(response.data)
+
+    def search(self, term):
+        """Helper returning the ids matched by a search term"""
+        response = self.client.get("/api/contacts", query_string={"search": term})
+        return [c["id"] for c in json.loads(response.data)["contacts"]]
+
+    def test_arabic_and_persian_spellings_match(self):
+        """Test that a name stored with Arabic letters is found in Persian"""
+        contact = self.post(
+            "/api/contacts",
+            {"first_name": "علي", "last_name": "كريمي", "mobile": "۰۹۱۲۱۲۳۴۵۶۷"},
+        )["contact"]
+
+        assert self.search("علی") == [contact["id"]]
+        assert self.search("کریمی") == [contact["id"]]
+        assert self.search("علي كريمي") == [contact["id"]]
+        assert self.search("0912") == [contact["id"]]
+        assert self.search("۰۹۱۲۱۲۳") == [contact["id"]]
+
+    def test_company_name_is_normalized(self):
+        """Test that the linked company name is matched in normalized form"""
+        company = self.post("/api/companies", {"name": "شركت نمونه"})["company"]
+        contact = self.post(
+            "/api/contacts",
+            {"first_name": "Reza", "last_name": "Rahimi", "company_id": company["id"]},
+        )["contact"]
+
+        assert self.search("شرکت") == [contact["id"]]
+
+    def test_search_key_is_stored(self):
+        """Test that search_key is filled on write"""
+        contact = self.post(
+            "/api/contacts", {"first_name": "مُحَمَّد", "last_name": "Rezaei"}
+        )["contact"]
+
+        with self.app.app_context():
+            from models import Contact
+
+            assert db.session.get(Contact, contact["id"]).search_key == "محمد rezaei"
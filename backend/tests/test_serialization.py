@@ -0,0 +1,160 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import request
+import pytest
+
+from app import create_app, db
+from models import (
+    COMPANY_DICT_FIELDS,
+    CONTACT_DICT_FIELDS,
+    Company,
+    Contact,
+    User,
+)
+from routes.contacts import contact_payload
+import serialization
+
+
+def make_app(**config):
+    """Helper creating an app on an in-memory database"""
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "SECRET_KEY": "test-secret-key",
+            **config,
+        }
+    )
+
+
+class TestJSONProvider:
+    """Test that both encoders produce the same JSON"""
+
+    VALUE = {
+        "name": "رضا",
+        "created_at": datetime(2024, 3, 1, 12, 30, 5, 120),
+        "price": Decimal("1.50"),
+        "big": 2**70,
+        "counts": {2: [None, True, 1.5], 1: []},
+    }
+
+    def test_encoders_agree(self):
+        """Test orjson and stdlib output for dates, decimals and big ints"""
+        pytest.importorskip("orjson")
+        fast = make_app(JSON_SERIALIZER="orjson").json
+        stdlib = make_app(JSON_SERIALIZER="json").json
+        assert fast.orjson is not None and stdlib.orjson is None
+
+        for value in (self.VALUE, {k: v for k, v in self.VALUE.items() if k != "big"}):
+            decoded = json.loads(fast.dumps(value))
+            assert decoded == json.loads(stdlib.dumps(value))
+        assert decoded["created_at"] == "2024-03-01T12:30:05.000120"
+        assert list(decoded) == sorted(decoded)
+        assert list(decoded["counts"]) == ["1", "2"]
+
+        assert fast.loads('{"a": [1, NaN]}')["a"][0] == 1
+        with pytest.raises(ValueError):
+            fast.loads("{")
+
+    def test_responses(self):
+        """Test jsonify output and request bodies through the provider"""
+        app = make_app()
+        with app.test_request_context():
+            response = app.json.response({"b": 1, "a": "x"})
+        assert response.mimetype == "application/json"
+        assert response.get_data() == b'{"a":"x","b":1}\n'
+        app.debug = True
+        with app.test_request_context():
+            assert b'\n  "a"' in app.json.response({"a": 1}).get_data()
+
+        with app.test_request_context(
+            data='{"q": "رضا"}', content_type="application/json"
+        ):
+            assert request.get_json() == {"q": "رضا"}
+
+    def test_unknown_serializer(self):
+        """Test that a bad JSON_SERIALIZER fails at startup"""
+        with pytest.raises(ValueError):
+            make_app(JSON_SERIALIZER="simplejson")
+
+
+class TestColumnRendering:
+    """Test that lists rendered from column tuples match to_dict()"""
+
+    def setup_method(self):
+        """Set up an admin with companies and contacts"""
+        self.app = make_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="admin", email="admin@example.com", role="admin")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            company = Company(name="Acme", city="Tehran", created_by=user.id)
+            db.session.add_all([company, Company(name="Beta", created_by=user.id)])
+            db.session.flush()
+            db.session.add_all(
+                [
+                    Contact(
+                        first_name="Ali",
+                        last_name="Rezaei",
+                        email="ali@example.com",
+                        company_id=company.id,
+                        created_by=user.id,
+                    ),
+                    Contact(first_name="Sara", last_name="Karimi", created_by=user.id),
+                ]
+            )
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "admin", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def test_field_lists_match_to_dict(self):
+        """Test that the column lists name exactly the to_dict() keys"""
+        with self.app.app_context():
+            assert tuple(db.session.get(Contact, 1).to_dict()) == CONTACT_DICT_FIELDS
+            assert tuple(db.session.get(Company, 1).to_dict()) == COMPANY_DICT_FIELDS
+
+    def test_lists_match_instance_payloads(self):
+        """Test contact and company pages in page and cursor mode"""
+        with self.app.app_context():
+            contacts = {
+                contact.id: json.loads(json.dumps(contact_payload(contact)))
+                for contact in Contact.query
+            }
+            companies = {
+                company.id: json.loads(json.dumps(company.to_dict()))
+                for company in Company.query
+            }
+
+        for url in (
+            "/api/contacts",
+            "/api/contacts?cursor=",
+            "/api/contacts?search=ali",
+        ):
+            items = json.loads(self.client.get(url).data)["contacts"]
+            assert items and all(item == contacts[item["id"]] for item in items)
+        for url in ("/api/companies", "/api/companies?cursor=&sort=-created_at"):
+            items = json.loads(self.client.get(url).data)["companies"]
+            assert len(items) == 2
+            assert all(item == companies[item["id"]] for item in items)
+
+        response = self.client.get(
+            "/api/companies?view=summary&sort=created_at&cursor="
+        )
+        summary = json.loads(response.data)["companies"]
+        assert summary[0] == {"id": 1, "name": "Acme", "contact_count": 1}
+
+    def test_row_dicts(self):
+        """Test rendering tuples, ignoring columns beyond the keys"""
+        rows = [(1, "Acme", "extra"), (2, None, "extra")]
+        assert serialization.row_dicts(rows, ("id", "name")) == [
+            {"id": 1, "name": "Acme"},
+            {"id": 2, "name": None},
+        ]
@@ -0,0 +1,81 @@
+import json
+import logging
+
+from app import create_app, db
+from instrumentation import QUERY_COUNT_HEADER, SERVER_TIMING_HEADER, parameter_shape
+
+
+class TestServerTiming:
+    """Test Server-Timing headers and the slow-query log"""
+
+    def make_client(self, **config):
+        """Helper returning a logged-in client for an app with ``config``"""
+        app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+                **config,
+            }
+        )
+        with app.app_context():
+            db.create_all()
+            from models import User, Contact
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(
+                Contact(first_name="Sara", last_name="Ahmadi", created_by=user.id)
+            )
+            db.session.commit()
+
+        client = app.test_client()
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+        return client
+
+    def test_disabled_by_default(self):
+        """Test that no Server-Timing header is sent unless enabled"""
+        response = self.make_client().get("/api/contacts")
+        assert SERVER_TIMING_HEADER not in response.headers
+
+    def test_header_reports_db_and_json_time(self):
+        """Test the header metrics and that the query count matches"""
+        response = self.make_client(SERVER_TIMING=True).get("/api/contacts")
+        header = response.headers[SERVER_TIMING_HEADER]
+        metrics = {part.split(";")[0].strip(): part for part in header.split(",")}
+
+        assert set(metrics) == {"db", "json", "total"}
+        queries = response.headers[QUERY_COUNT_HEADER]
+        assert f'desc="{queries} queries"' in metrics["db"]
+        for part in metrics.values():
+            assert float(part.rsplit("dur=", 1)[1]) >= 0
+
+    def test_slow_query_log(self, caplog):
+        """Test that slow statements are logged with shape and query plan"""
+        client = self.make_client(SLOW_QUERY_MS=0)
+        with caplog.at_level(logging.WARNING, logger="phonebook.slow_query"):
+            client.put(
+                "/api/contacts/1",
+                data=json.dumps({"city": "Tehran"}),
+                content_type="application/json",
+            )
+
+        messages = [record.getMessage() for record in caplog.records]
+        lookup = next(m for m in messages if "FROM contact \nWHERE" in m)
+        assert "Parameters: (int" in lookup
+        assert "SEARCH contact USING INTEGER PRIMARY KEY" in lookup
+        assert "Sara" not in lookup
+
+    def test_parameter_shape(self):
+        """Test that parameters are described by type only"""
+        assert parameter_shape((1, "x", None)) == "(int, str, NoneType)"
+        assert parameter_shape({"id": 1}) == "{id: int}"
+        assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == (
+            "2 x (int, str)"
+        )
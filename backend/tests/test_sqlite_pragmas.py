@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from database import SQLITE_PRAGMA_DEFAULTS, sqlite_pragmas
+
+
+class TestSqlitePragmas:
+    """Test per-connection SQLite tuning"""
+
+    def setup_method(self):
+        """Create a temporary database file"""
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def teardown_method(self):
+        """Remove the database file and its WAL companions"""
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+
+    def make_app(self, **config):
+        """Helper to build an app on the temporary file"""
+        return create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+                "SECRET_KEY": "test-secret-key",
+                **config,
+            }
+        )
+
+    def pragma(self, app, name):
+        """Helper to read a pragma from a pooled connection"""
+        with app.app_context():
+            return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_defaults_applied(self):
+        """Test that WAL and the other defaults are set on connect"""
+        app = self.make_app()
+        assert self.pragma(app, "journal_mode") == "wal"
+        assert self.pragma(app, "synchronous") == 1
+        assert self.pragma(app, "busy_timeout") == 5000
+        assert self.pragma(app, "cache_size") == -64000
+        assert self.pragma(app, "temp_store") == 2
+
+    def test_config_override(self):
+        """Test that SQLITE_PRAGMAS overrides and drops defaults"""
+        app = self.make_app(SQLITE_PRAGMAS={"busy_timeout": 250, "journal_mode": None})
+        assert self.pragma(app, "busy_timeout") == 250
+        assert self.pragma(app, "journal_mode") == "delete"
+
+    def test_environment_override(self):
+        """Test that PHONEBOOK_SQLITE_<NAME> wins over config"""
+        pragmas = sqlite_pragmas(
+            {"SQLITE_PRAGMAS": {"busy_timeout": 250}},
+            environ={"PHONEBOOK_SQLITE_BUSY_TIMEOUT": "9000"},
+        )
+        assert pragmas["busy_timeout"] == "9000"
+        assert pragmas["journal_mode"] == SQLITE_PRAGMA_DEFAULTS["journal_mode"]
+
+    def test_invalid_value_rejected(self):
+        """Test that pragma values cannot inject SQL"""
+        with pytest.raises(ValueError):
+            self.make_app(SQLITE_PRAGMAS={"cache_size": "1; DROP TABLE user"})
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import app as app_module
+from app import create_app, db
+from models import User
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup:
+    """Test that importing and building the app has no database side effects"""
+
+    def setup_method(self):
+        """Pick a database path that does not exist yet"""
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "phonebook.db")
+
+    def teardown_method(self):
+        """Remove the database file and its WAL companions"""
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+        os.rmdir(self.dir)
+
+    def make_app(self):
+        """Helper to build an app on the temporary path"""
+        return create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+
+    def test_create_app_touches_no_database(self):
+        """Test that neither import nor create_app creates the database"""
+        self.make_app()
+        assert not os.path.exists(self.path)
+        assert app_module._app_instance is None
+
+    def test_init_db_and_ensure_admin_commands(self):
+        """Test the CLI commands that prepare a database"""
+        app = self.make_app()
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=["init-db"])
+        assert result.exit_code == 0
+        assert "Applied migrations: [1" in result.output
+        assert "none" in runner.invoke(args=["init-db"]).output
+
+        result = runner.invoke(args=["ensure-admin"])
+        assert "Created default admin user" in result.output
+        assert "already exists" in runner.invoke(args=["ensure-admin"]).output
+
+        with app.app_context():
+            assert User.query.filter_by(role="admin").count() == 1
+            db.engine.dispose()
+
+    def test_import_and_create_app_run_no_sql(self):
+        """Test that a cold ``import app`` and ``create_app`` neither connect
+        nor execute SQL"""
+        script = (
+            "from sqlalchemy import event\n"
+            "from sqlalchemy.engine import Engine\n"
+            "from sqlalchemy.pool import Pool\n"
+            "seen = []\n"
+            "event.listen(Pool, 'connect', lambda *args: seen.append('connect'))\n"
+            "event.listen(\n"
+            "    Engine, 'before_cursor_execute', lambda *args: seen.append(args[2])\n"
+            ")\n"
+            "import app\n"
+            "app.create_app(\n"
+            "    {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + PATH, 'SECRET_KEY': 'x'}\n"
+            ")\n"
+            "print(seen)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", f"PATH = {self.path!r}\n" + script],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+        assert not os.path.exists(self.path)
@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timedelta
+from app import create_app, db
+from instrumentation import QUERY_COUNT_HEADER
+
+
+class TestStats:
+    """Test GET /api/stats"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Company, Contact, Notice
+
+            boss = User(username="boss", email="boss@example.com", role="admin")
+            boss.set_password("password123")
+            editor = User(username="editor", email="editor@example.com", role="editor")
+            editor.set_password("password123")
+            db.session.add_all([boss, editor])
+            db.session.flush()
+
+            acme = Company(name="Acme", created_by=boss.id)
+            globex = Company(name="Globex", created_by=boss.id)
+            db.session.add_all([acme, globex])
+            db.session.flush()
+            self.acme_id = acme.id
+
+            db.session.add_all(
+                Contact(
+                    first_name=f"A{i}",
+                    last_name="X",
+                    company_id=acme.id if i < 3 else globex.id,
+                    created_by=boss.id,
+                )
+                for i in range(4)
+            )
+            db.session.add(Contact(first_name="B", last_name="Y", created_by=boss.id))
+
+            now = datetime.utcnow()
+            db.session.add_all(
+                [
+                    Notice(title="a", content="a", created_by=boss.id),
+                    Notice(
+                        title="b",
+                        content="b",
+                        created_by=boss.id,
+                        expires_at=now - timedelta(days=1),
+                    ),
+                    Notice(title="c", content="c", is_active=False, created_by=boss.id),
+                ]
+            )
+            db.session.commit()
+
+    def login_as(self, username):
+        """Helper to login as specific user"""
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": username, "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def test_counts(self):
+        """Test that the aggregates match the data"""
+        self.login_as("boss")
+        response = self.client.get("/api/stats?top=1")
+        assert response.status_code == 200
+        stats = json.loads(response.data)["stats"]
+
+        assert stats["contacts"] == 5
+        assert stats["companies"] == 2
+        assert stats["users"]["total"] == 2
+        assert stats["users"]["by_role"] == {"admin": 1, "editor": 1, "user": 0}
+        assert stats["active_notices"] == 1
+        assert stats["top_companies"] == [
+            {"id": self.acme_id, "name": "Acme", "contact_count": 3}
+        ]
+
+    def test_cached_until_write(self):
+        """Test that repeat requests are served from cache until a write"""
+        self.login_as("boss")
+        self.client.get("/api/stats")
+        response = self.client.get("/api/stats")
+        assert int(response.headers[QUERY_COUNT_HEADER]) == 0
+
+        self.client.post(
+            "/api/contacts",
+            data=json.dumps({"first_name": "New", "last_name": "Person"}),
+            content_type="application/json",
+        )
+        response = self.client.get("/api/stats")
+        assert int(response.headers[QUERY_COUNT_HEADER]) > 0
+        assert json.loads(response.data)["stats"]["contacts"] == 6
+
+    def test_admin_only(self):
+        """Test that non-admins cannot read stats"""
+        self.login_as("editor")
+        assert self.client.get("/api/stats").status_code == 403
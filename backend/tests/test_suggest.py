@@ -0,0 +1,116 @@
+import json
+from app import create_app, db
+from suggest import PrefixIndex
+
+
+class TestPrefixIndex:
+    """Test the sorted-array prefix index"""
+
+    def test_search_add_remove(self):
+        """Test prefix search with incremental updates"""
+        index = PrefixIndex()
+        index.load([(1, ("sara ahmadi",), "Sara"), (2, ("sam lee",), "Sam")])
+
+        assert index.search("sa") == [(2, "Sam"), (1, "Sara")]
+        assert index.search("sar") == [(1, "Sara")]
+        assert index.search("x") == []
+
+        index.add(3, ("saba",), "Saba")
+        index.add(1, ("zahra",), "Zahra")
+        assert index.search("sa") == [(3, "Saba"), (2, "Sam")]
+        assert index.search("z") == [(1, "Zahra")]
+
+        index.remove(2)
+        index.remove(99)
+        assert index.search("sa") == [(3, "Saba")]
+        assert len(index) == 2
+
+    def test_limit_and_duplicate_keys(self):
+        """Test that an id with several matching keys is returned once"""
+        index = PrefixIndex()
+        index.load([(i, (f"a{i}", f"aa{i}"), str(i)) for i in range(20)])
+
+        results = index.search("a", limit=5)
+        assert len(results) == 5
+        assert len({entry_id for entry_id, _ in results}) == 5
+
+
+class TestSuggestEndpoints:
+    """Test GET /api/contacts/suggest and /api/companies/suggest"""
+
+    def setup_method(self):
+        """Set up test client and database"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            from models import User, Contact
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(
+                Contact(first_name="Sara", last_name="Ahmadi", created_by=user.id)
+            )
+            db.session.commit()
+
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def suggest(self, kind, q):
+        """Helper returning suggested names"""
+        response = self.client.get(f"/api/{kind}/suggest", query_string={"q": q})
+        assert response.status_code == 200
+        return [s["name"] for s in json.loads(response.data)["suggestions"]]
+
+    def post(self, url, data):
+        """Helper to POST JSON and return the decoded body"""
+        response = self.client.post(
+            url, data=json.dumps(data), content_type="application/json"
+        )
+        return json.loads(response.data)
+
+    def test_contacts_by_first_or_last_name(self):
+        """Test that existing rows are loaded and matched on either name"""
+        assert self.suggest("contacts", "sa") == ["Sara Ahmadi"]
+        assert self.suggest("contacts", "AHM") == ["Sara Ahmadi"]
+        assert self.suggest("contacts", "sara a") == ["Sara Ahmadi"]
+        assert self.suggest("contacts", "") == []
+
+    def test_contacts_index_follows_writes(self):
+        """Test that create, update and delete update the loaded index"""
+        assert self.suggest("contacts", "ali") == []
+
+        contact = self.post(
+            "/api/contacts", {"first_name": "علي", "last_name": "Karimi"}
+        )["contact"]
+        assert self.suggest("contacts", "علی") == ["علي Karimi"]
+
+        self.client.put(
+            f"/api/contacts/{contact['id']}",
+            data=json.dumps({"first_name": "Reza"}),
+            content_type="application/json",
+        )
+        assert self.suggest("contacts", "علی") == []
+        assert self.suggest("contacts", "karimi") == ["Reza Karimi"]
+
+        self.client.delete(f"/api/contacts/{contact['id']}")
+        assert self.suggest("contacts", "karimi") == []
+
+    def test_companies(self):
+        """Test that created companies are suggested"""
+        assert self.suggest("companies", "ac") == []
+        self.post("/api/companies", {"name": "Acme"})
+        self.post("/api/companies", {"name": "Acorn"})
+        assert self.suggest("companies", "ac") == ["Acme", "Acorn"]
+        assert self.suggest("companies", "aco") == ["Acorn"]
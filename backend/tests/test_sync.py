@@ -0,0 +1,170 @@
+import json
+
+from sqlalchemy import text
+
+from app import create_app, db
+from models import Contact, Notice, User
+import sync
+
+
+class TestSync:
+    """Test GET /api/sync change tokens and tombstones"""
+
+    def setup_method(self):
+        """Set up test app with an editor and one contact"""
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "SECRET_KEY": "test-secret-key",
+            }
+        )
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="editor", email="editor@example.com", role="admin")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            self.user_id = user.id
+            db.session.add(
+                Contact(first_name="Ali", last_name="Rezaei", created_by=user.id)
+            )
+            db.session.commit()
+        self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+
+    def changes(self, since=0, **params):
+        """Helper returning the sync response for ``since``"""
+        response = self.client.get("/api/sync", query_string={"since": since, **params})
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def create_contact(self, first_name):
+        """Helper creating a contact through the API; returns its id"""
+        response = self.client.post(
+            "/api/contacts",
+            data=json.dumps({"first_name": first_name, "last_name": "Test"}),
+            content_type="application/json",
+        )
+        return json.loads(response.data)["contact"]["id"]
+
+    def test_full_then_incremental(self):
+        """Test that creates, updates and deletes show up after the token"""
+        full = self.changes()
+        assert [c["first_name"] for c in full["contacts"]] == ["Ali"]
+        assert full["has_more"] is False
+        token = full["token"]
+
+        new_id = self.create_contact("Sara")
+        self.client.put(
+            "/api/contacts/1",
+            data=json.dumps({"city": "Tehran"}),
+            content_type="application/json",
+        )
+        delta = self.changes(token)
+        assert sorted(c["id"] for c in delta["contacts"]) == [1, new_id]
+        assert delta["token"] > token
+
+        self.client.delete(f"/api/contacts/{new_id}")
+        delta = self.changes(delta["token"])
+        assert delta["contacts"] == []
+        assert delta["deleted"]["contacts"] == [new_id]
+
+    def test_no_changes_costs_one_query(self):
+        """Test that an up-to-date client costs a single counter probe"""
+        token = self.changes()["token"]
+        response = self.client.get(f"/api/sync?since={token}")
+        assert response.headers["X-Query-Count"] == "1"
+        data = json.loads(response.data)
+        assert data["token"] == token
+        assert data["contacts"] == data["companies"] == data["notices"] == []
+
+    def test_pagination(self):
+        """Test that ``limit`` pages through changes in sequence order"""
+        for i in range(4):
+            self.create_contact(f"C{i}")
+        with self.app.app_context():
+            db.session.add(Notice(title="N", content="x", created_by=self.user_id))
+            db.session.commit()
+
+        seen, token, pages = [], 0, 0
+        while True:
+            page = self.changes(token, limit=2)
+            seen += [("contact", c["id"]) for c in page["contacts"]]
+            seen += [("notice", n["id"]) for n in page["notices"]]
+            token = page["token"]
+            pages += 1
+            if not page["has_more"]:
+                break
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 6
+
+    def test_bulk_writes_are_tracked(self):
+        """Test that Core writes outside the ORM get change numbers too"""
+        token = self.changes()["token"]
+        with self.app.app_context():
+            db.session.execute(
+                text(
+                    "INSERT INTO contact "
+                    "(first_name, last_name, created_at, created_by) "
+                    "VALUES ('Bulk', 'Row', CURRENT_TIMESTAMP, :user)"
+                ),
+                {"user": self.user_id},
+            )
+            db.session.execute(text("DELETE FROM contact WHERE id = 1"))
+            db.session.commit()
+        delta = self.changes(token)
+        assert [c["first_name"] for c in delta["contacts"]] == ["Bulk"]
+        assert delta["deleted"]["contacts"] == [1]
+
+    def test_reused_id_is_not_reported_deleted(self):
+        """Test that a deleted id reused by a later insert is only upserted"""
+        new_id = self.create_contact("Temp")
+        token = self.changes()["token"]
+        self.client.delete(f"/api/contacts/{new_id}")
+        assert self.create_contact("Again") == new_id
+
+        delta = self.changes(token)
+        assert [c["first_name"] for c in delta["contacts"]] == ["Again"]
+        assert delta["deleted"]["contacts"] == []
+
+    def test_expired_and_invalid_tokens(self):
+        """Test pruned, future and malformed tokens"""
+        token = self.changes()["token"]
+        self.client.delete("/api/contacts/1")
+        self.create_contact("After")
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                assert sync.prune_tombstones(connection, days=-1) == 1
+
+        response = self.client.get(f"/api/sync?since={token}")
+        assert response.status_code == 410
+        assert self.client.get("/api/sync?since=999").status_code == 410
+        assert self.client.get("/api/sync?since=abc").status_code == 400
+        assert self.client.get("/api/sync?since=-1").status_code == 400
+        assert self.changes()["contacts"][0]["first_name"] == "After"
+
+    def test_existing_rows_are_numbered(self):
+        """Test that rows written before change tracking get numbers"""
+        with self.app.app_context():
+            for table in ("contact", "company", "notice"):
+                for op in ("ai", "au", "ad"):
+                    db.session.execute(text(f"DROP TRIGGER {table}_sync_{op}"))
+            db.session.execute(text("UPDATE contact SET change_seq = NULL"))
+            db.session.execute(text("UPDATE sync_counter SET value = 0"))
+            db.session.commit()
+            db.create_all()
+            assert db.session.scalar(text("SELECT change_seq FROM contact")) == 1
+
+        assert self.changes()["token"] == 1
+        self.create_contact("Next")
+        assert self.changes(1)["contacts"][0]["first_name"] == "Next"
+
+    def test_requires_login(self):
+        """Test that sync requires authentication"""
+        response = self.app.test_client().get("/api/sync")
+        assert response.status_code == 401
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+
+from app import create_app, db
+
+
+class TestWriteQueue:
+    """Test the single-writer group-commit queue"""
+
+    def setup_method(self):
+        """Set up an app with the write queue on a database file"""
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app(
+            {
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+                "SECRET_KEY": "test-secret-key",
+                "WRITE_QUEUE": True,
+                "WRITE_QUEUE_MAX_DELAY": 0.2,
+            }
+        )
+        self.queue = self.app.extensions["write_queue"]
+        with self.app.app_context():
+            db.create_all()
+            from models import User
+
+            user = User(username="editor", email="editor@example.com", role="editor")
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+    def teardown_method(self):
+        """Stop the writer and remove the database file"""
+        self.queue.close()
+        with self.app.app_context():
+            db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+
+    def login(self):
+        """Helper returning a logged-in test client"""
+        client = self.app.test_client()
+        client.post(
+            "/api/auth/login",
+            data=json.dumps({"username": "editor", "password": "password123"}),
+            content_type="application/json",
+        )
+        return client
+
+    def add_notice_job(self, title):
+        """Helper job inserting a notice"""
+        from models import Notice
+
+        notice = Notice(title=title, content="text", created_by=self.user_id)
+        db.session.add(notice)
+        db.session.flush()
+        return notice.id
+
+    def failing_job(self):
+        """Helper job that fails after writing"""
+        self.add_notice_job("rolled back")
+        raise ValueError("bad job")
+
+    def notice_titles(self):
+        """Helper returning all notice titles"""
+        from models import Notice
+
+        with self.app.app_context():
+            return sorted(n.title for n in Notice.query.all())
+
+    def test_jobs_committed_as_one_group(self):
+        """Test that jobs queued together share one commit"""
+        futures = [self.queue.submit(self.add_notice_job, f"N{i}") for i in range(5)]
+        ids = [future.result(5) for future in futures]
+        assert len(set(ids)) == 5
+        assert self.queue.batches == 1
+        assert self.queue.jobs == 5
+        assert self.notice_titles() == ["N0", "N1", "N2", "N3", "N4"]
+
+    def test_failing_job_does_not_sink_group(self):
+        """Test that a failure is isolated to its own request"""
+        good = self.queue.submit(self.add_notice_job, "good")
+        bad = self.queue.submit(self.failing_job)
+        other = self.queue.submit(self.add_notice_job, "other")
+
+        assert good.result(5) and other.result(5)
+        with pytest.raises(ValueError):
+            bad.result(5)
+        assert self.notice_titles() == ["good", "other"]
+
+    def test_concurrent_contact_writes(self):
+        """Test create, update and delete through the API"""
+        results = []
+
+        def create(i):
+            client = self.login()
+            response = client.post(
+                "/api/contacts",
+                data=json.dumps({"first_name": f"Sara{i}", "last_name": "Ahmadi"}),
+                content_type="application/json",
+            )
+            results.append((response.status_code, json.loads(response.data)))
+
+        threads = [threading.Thread(target=create, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [status for status, _ in results] == [201] * 8
+        assert len({data["contact"]["id"] for _, data in results}) == 8
+        assert self.queue.batches < 8
+
+        client = self.login()
+        contact_id = results[0][1]["contact"]["id"]
+        response = client.put(
+            f"/api/contacts/{contact_id}",
+            data=json.dumps({"city": "Tehran"}),
+            content_type="application/json",
+        )
+        assert json.loads(response.data)["contact"]["city"] == "Tehran"
+
+        response = client.get("/api/contacts/suggest?q=sara")
+        assert len(json.loads(response.data)["suggestions"]) == 8
+
+        assert client.delete(f"/api/contacts/{contact_id}").status_code == 200
+        response = client.get("/api/contacts")
+        assert json.loads(response.data)["pagination"]["total"] == 7
@@ -0,0 +1,158 @@
+"""
+Single-writer queue with group commit.
+
+SQLite has one write lock. When many requests write at once each one opens
+its own transaction and they queue up on that lock, paying one commit each.
+With ``WRITE_QUEUE`` enabled, handlers hand their writes to one background
+thread instead. The thread runs the jobs it has collected in one transaction
+(up to ``WRITE_QUEUE_MAX_BATCH`` jobs, waiting at most
+``WRITE_QUEUE_MAX_DELAY`` seconds for more) and commits once for the group.
+
+A write job is a function that changes ``db.session`` and returns plain data
+(dicts, ids), never ORM objects: it runs in the writer thread's session, and
+its result is handed back only after the commit succeeded. Jobs must not
+have side effects outside the database, since a job may be run twice: if
+one job in a group fails the group is rolled back and every job is retried
+in its own transaction.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+from database import db
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_DELAY = 0.002
+# Seconds a request waits for its write before giving up
+DEFAULT_TIMEOUT = 30
+
+_STOP = object()
+
+
+class WriteQueue:
+    """One writer thread that commits queued jobs in groups"""
+
+    def __init__(self, app, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = app.config.get("WRITE_QUEUE_TIMEOUT", DEFAULT_TIMEOUT)
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job, *args, **kwargs):
+        """Queue ``job(*args, **kwargs)`` and return a Future for its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, job, args, kwargs))
+        return future
+
+    def close(self):
+        """Finish the queued jobs and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="phonebook-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self, first):
+        """Gather jobs queued behind ``first`` until the group is full"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [
+                    entry
+                    for entry in self._collect(item)
+                    if entry[0].set_running_or_notify_cancel()
+                ]
+                if batch:
+                    self._commit_group(batch)
+            db.session.remove()
+
+    def _commit_group(self, batch):
+        """Run ``batch`` in one transaction, or one by one if any job fails"""
+        results = []
+        try:
+            for future, job, args, kwargs in batch:
+                results.append(job(*args, **kwargs))
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0][0].set_exception(exc)
+                return
+            for entry in batch:
+                self._commit_group([entry])
+            return
+
+        self.batches += 1
+        self.jobs += len(batch)
+        for (future, _, _, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+def write_queue_enabled(config, environ=os.environ):
+    """Whether writes go through the queue for an app with ``config``"""
+    value = environ.get("PHONEBOOK_WRITE_QUEUE")
+    if value is not None:
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(config.get("WRITE_QUEUE", False))
+
+
+def init_app(app):
+    """Attach a write queue to ``app`` when it is enabled"""
+    if write_queue_enabled(app.config):
+        app.extensions["write_queue"] = WriteQueue(
+            app,
+            max_batch=app.config.get("WRITE_QUEUE_MAX_BATCH", DEFAULT_MAX_BATCH),
+            max_delay=app.config.get("WRITE_QUEUE_MAX_DELAY", DEFAULT_MAX_DELAY),
+        )
+
+
+def run_write(job, *args, **kwargs):
+    """Run a write job and commit it; return the job's result.
+
+    Without a write queue the job runs in the request's session and is
+    committed right away. With one, it is committed as part of a group by
+    the writer thread and this call blocks until that commit finished.
+    Exceptions raised by the job are re-raised here.
+    """
+    write_queue = current_app.extensions.get("write_queue")
+    if write_queue is None:
+        result = job(*args, **kwargs)
+        db.session.commit()
+        return result
+    return write_queue.submit(job, *args, **kwargs).result(write_queue.timeout)
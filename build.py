@@ -158,6 +158,18 @@ exe = EXE(
         print("Warning: Executable not found at expected location")
         return False
 
+    # Step 6: Bring an existing packaged database up to the current schema
+    packaged_db = dist_dir / "instance" / "phonebook.db"
+    if packaged_db.exists():
+        print("\nStep 6: Upgrading packaged database schema...")
+        if not run_command(
+            f'"{sys.executable}" migrations.py "{packaged_db}"',
+            cwd=backend_dir,
+            description="Apply schema migrations",
+        ):
+            print("Database migration failed!")
+            return False
+
     print("\n" + "=" * 50)
     print("BUILD SUCCESSFUL!")
     print("=" * 50)
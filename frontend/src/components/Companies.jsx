@@ -3,6 +3,8 @@ import { useState, useEffect } from 'react'
 function Companies({ user }) {
   const [companies, setCompanies] = useState([])
   const [loading, setLoading] = useState(true)
+  const [page, setPage] = useState(1)
+  const [pagination, setPagination] = useState(null)
   const [showForm, setShowForm] = useState(false)
   const [editingCompany, setEditingCompany] = useState(null)
   const [formData, setFormData] = useState({
@@ -21,15 +23,21 @@ function Companies({ user }) {
 
   useEffect(() => {
     fetchCompanies()
-  }, [])
+  }, [page])
 
   const fetchCompanies = async () => {
     try {
-      const response = await fetch('/api/companies')
+      const params = new URLSearchParams({
+        page: page.toString(),
+        per_page: '20'
+      })
+
+      const response = await fetch(`/api/companies?${params}`)
       const data = await response.json()
 
       if (data.companies) {
         setCompanies(data.companies)
+        setPagination(data.pagination)
       }
     } catch (error) {
       console.error('Error fetching companies:', error)
@@ -422,6 +430,31 @@ function Companies({ user }) {
           )}
         </div>
       )}
+
+      {/* Pagination */}
+      {pagination && pagination.pages > 1 && (
+        <div className="mt-6 flex items-center justify-between">
+          <div className="text-sm text-muted-foreground">
+            Showing {((pagination.page - 1) * pagination.per_page) + 1} to {Math.min(pagination.page * pagination.per_page, pagination.total)} of {pagination.total} results
+          </div>
+          <div className="flex space-x-2">
+            <button
+              onClick={() => setPage(Math.max(1, page - 1))}
+              disabled={page === 1}
+              className="px-3 py-1 border border-gray-300 rounded-md text-sm disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              Previous
+            </button>
+            <button
+              onClick={() => setPage(Math.min(pagination.pages, page + 1))}
+              disabled={page === pagination.pages}
+              className="px-3 py-1 border border-gray-300 rounded-md text-sm disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              Next
+            </button>
+          </div>
+        </div>
+      )}
     </div>
   )
 }
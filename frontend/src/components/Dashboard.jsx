@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react'
+import { subscribeToChanges } from '../utils/api'
 import Contacts from './Contacts'
 import Companies from './Companies'
 import NoticeBoard from './NoticeBoard'
@@ -28,6 +29,11 @@ function Dashboard({ user, onLogout }) {
   useEffect(() => {
     if (currentView === 'dashboard') {
       fetchDashboardData()
+      // Admins also see contact and company counts
+      const entities = user.role === 'admin'
+        ? ['notices', 'contacts', 'companies']
+        : ['notices']
+      return subscribeToChanges(entities, fetchDashboardData)
     }
   }, [currentView])
 
@@ -52,21 +58,16 @@ function Dashboard({ user, onLogout }) {
 
       // Fetch stats if admin
       if (user.role === 'admin') {
-        const [contactsRes, companiesRes, usersRes] = await Promise.all([
-          fetch('/api/contacts'),
-          fetch('/api/companies'),
-          fetch('/api/users')
-        ])
+        const statsRes = await fetch('/api/stats')
+        const statsData = await statsRes.json()
 
-        const contactsData = await contactsRes.json()
-        const companiesData = await companiesRes.json()
-        const usersData = await usersRes.json()
-
-        setStats({
-          contacts: contactsData.contacts?.length || 0,
-          companies: companiesData.companies?.length || 0,
-          users: usersData.users?.length || 0
-        })
+        if (statsData.stats) {
+          setStats({
+            contacts: statsData.stats.contacts,
+            companies: statsData.stats.companies,
+            users: statsData.stats.users.total
+          })
+        }
       }
     } catch (error) {
       console.error('Error fetching dashboard data:', error)
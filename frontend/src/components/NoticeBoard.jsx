@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react'
+import { subscribeToChanges } from '../utils/api'
 
 function NoticeBoard({ user }) {
   const [notices, setNotices] = useState([])
@@ -14,6 +15,8 @@ function NoticeBoard({ user }) {
 
   useEffect(() => {
     fetchNotices()
+    // Reload when anyone changes a notice instead of polling
+    return subscribeToChanges(['notices'], fetchNotices)
   }, [])
 
   const fetchNotices = async () => {
@@ -38,3 +38,31 @@ export const showSuccessToast = (message) => {
   // Simple success display - could be enhanced with a toast library
   alert(message)
 }
+
+// Call onChange when any of the entities changes on the server. Bursts of
+// change events (imports, bulk edits) are coalesced into one call. Returns
+// a function that closes the stream.
+export const subscribeToChanges = (entities, onChange, delay = 500) => {
+  if (typeof EventSource === 'undefined') {
+    return () => {}
+  }
+
+  let timer = null
+  const source = new EventSource(`/api/events?entities=${entities.join(',')}`)
+  const schedule = () => {
+    if (timer === null) {
+      timer = setTimeout(() => {
+        timer = null
+        onChange()
+      }, delay)
+    }
+  }
+  source.addEventListener('change', schedule)
+  // The server lost track of what we missed; reload everything
+  source.addEventListener('resync', schedule)
+
+  return () => {
+    clearTimeout(timer)
+    source.close()
+  }
+}